@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Agent CLI - Single entry point for the IDE agents, with an optional resident server
+
+One-shot:   python3 agent_cli.py diagnose-error "ModuleNotFoundError: No module named 'x'"
+Resident:   python3 agent_cli.py serve &
+            python3 agent_cli.py --server diagnose-error "..."   (forwarded to the server)
+
+The server speaks newline-delimited JSON over a Unix socket, one request per line:
+    {"command": "diagnose-error", "args": {"message": "..."}}
+and answers each with {"ok": true, "result": ...} or {"ok": false, "error": "..."}.
+Editor integrations can keep the connection open and send many requests over it.
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Agents keep their historical script names, some of which are not importable as modules
+AGENT_SCRIPTS = {
+    "error_handler": "error-handler-agent.py",
+    "diagnose_terminal": "diagnose_terminal.py",
+    "functional_test": "functional-test-agent.py",
+    "tech_stack": "analyze_tech_stack.py",
+}
+
+DEFAULT_SOCKET_PATH = os.environ.get(
+    "IDE_AGENT_SOCKET", os.path.join("/tmp", f"claude-ide-agent-{os.getuid()}.sock")
+)
+
+_loaded_agents = {}
+
+
+def load_agent_module(name):
+    """Import an agent script by its AGENT_SCRIPTS key, once per process"""
+    module = _loaded_agents.get(name)
+    if module is None:
+        import importlib.util
+        path = os.path.join(ROOT, AGENT_SCRIPTS[name])
+        spec = importlib.util.spec_from_file_location(f"ide_agent_{name}", path)
+        module = importlib.util.module_from_spec(spec)
+        # Registered before exec so dataclasses (and forked pool workers) can resolve the module by name
+        sys.modules[spec.name] = module
+        spec.loader.exec_module(module)
+        _loaded_agents[name] = module
+    return module
+
+
+class AgentRuntime:
+    """Loaded agent modules and long-lived agent instances shared by every request"""
+
+    def __init__(self, root=None):
+        self.root = root or os.getcwd()
+        self._error_handler = None
+        self._terminal_agent = None
+        self.started_at = time.time()
+        self.requests_served = 0
+
+    @property
+    def error_handler(self):
+        if self._error_handler is None:
+            # The plug-ins error-handler-agent.py enables by default, rooted at the project
+            from error_knowledge import DEFAULT_KB_PATH, KnowledgeBase
+            from source_context import SourceContext
+            from source_maps import SourceMapResolver
+            self._error_handler = load_agent_module("error_handler").ErrorHandlerAgent(
+                knowledge_base=KnowledgeBase(os.path.join(self.root, DEFAULT_KB_PATH)),
+                source_context=SourceContext(self.root), source_maps=SourceMapResolver(self.root))
+        return self._error_handler
+
+    @property
+    def terminal_agent(self):
+        if self._terminal_agent is None:
+            self._terminal_agent = load_agent_module("diagnose_terminal").create_terminal_agent()
+        return self._terminal_agent
+
+    def warm_up(self):
+        """Load every agent so the first real request pays no import cost"""
+        for name in AGENT_SCRIPTS:
+            load_agent_module(name)
+        self.error_handler
+        self.terminal_agent
+
+    def ping(self):
+        return {"pid": os.getpid(), "uptime": round(time.time() - self.started_at, 3),
+                "requests_served": self.requests_served}
+
+    def diagnose_error(self, message, context=None):
+        agent = self.error_handler
+        error_context = agent.analyze_error(message, context)
+        report = agent.generate_report(error_context)
+        agent.knowledge_base.remember(error_context)
+        return report
+
+    def diagnose_terminal(self):
+        return load_agent_module("diagnose_terminal").collect_diagnostics(self.terminal_agent)
+
+    def analyze_stack(self):
+        tech_stack = load_agent_module("tech_stack")
+        return tech_stack.build_findings_document(tech_stack.iter_analysis_records(self.root))
+
+    def functional_test(self, base_url="http://localhost:3000"):
+        # Progress banners go to stderr so stdout stays a clean JSON result. The agent writes
+        # there itself: swapping sys.stdout would redirect every concurrent request too
+        agent = load_agent_module("functional_test").FunctionalTestAgent(base_url=base_url, output=sys.stderr)
+        return agent.run_all_tests()
+
+    def handle(self, request):
+        """Dispatch one decoded request and return the response envelope"""
+        handler = COMMANDS.get(request.get("command"))
+        if handler is None:
+            return {"ok": False, "error": f"unknown command: {request.get('command')!r}"}
+        try:
+            result = handler(self, **request.get("args", {}))
+        except Exception as e:
+            return {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        self.requests_served += 1
+        return {"ok": True, "result": result}
+
+
+COMMANDS = {
+    "ping": AgentRuntime.ping,
+    "diagnose-error": AgentRuntime.diagnose_error,
+    "diagnose-terminal": AgentRuntime.diagnose_terminal,
+    "analyze-stack": AgentRuntime.analyze_stack,
+    "functional-test": AgentRuntime.functional_test,
+}
+
+
+def serve(runtime, socket_path):
+    """Serve requests on a Unix socket until interrupted, keeping the runtime warm"""
+    import signal
+    import socketserver
+
+    class RequestHandler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                if not line.strip():
+                    continue
+                try:
+                    response = runtime.handle(json.loads(line))
+                except ValueError as e:
+                    response = {"ok": False, "error": f"invalid JSON request: {e}"}
+                self.wfile.write(json.dumps(response, default=str).encode("utf-8") + b"\n")
+                self.wfile.flush()
+
+    class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+    if os.path.exists(socket_path):
+        if request_server(socket_path, {"command": "ping"}) is not None:
+            raise RuntimeError(f"An agent server is already listening on {socket_path}")
+        os.unlink(socket_path)  # stale socket from a server that did not shut down cleanly
+
+    runtime.warm_up()
+    # Treat SIGTERM like Ctrl+C so the socket file is always removed
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    with Server(socket_path, RequestHandler) as server:
+        print(f"🤖 Agent server listening on {socket_path} (pid {os.getpid()})", flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.unlink(socket_path)
+
+
+def request_server(socket_path, request, timeout=None):
+    """Send one request to a running server; returns None if no server is listening"""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(timeout)
+            client.connect(socket_path)
+            client.sendall(json.dumps(request).encode("utf-8") + b"\n")
+            with client.makefile("rb") as reader:
+                line = reader.readline()
+    except (FileNotFoundError, ConnectionRefusedError):
+        return None
+    return json.loads(line) if line else None
+
+
+def build_request(args):
+    if args.command == "diagnose-error":
+        return {"command": "diagnose-error", "args": {"message": args.message}}
+    if args.command == "functional-test":
+        return {"command": "functional-test", "args": {"base_url": args.base_url}}
+    return {"command": args.command, "args": {}}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run IDE agents from one process")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET_PATH, help="Unix socket path (default: %(default)s)")
+    parser.add_argument("--server", action="store_true",
+                        help="forward to the resident server, running in-process if none is listening")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("serve", help="run a resident server on a Unix socket")
+    subparsers.add_parser("ping", help="check that the server is alive")
+    error_parser = subparsers.add_parser("diagnose-error", help="classify an error and suggest fixes")
+    error_parser.add_argument("message", help="error message to analyze")
+    subparsers.add_parser("diagnose-terminal", help="check node/npm/port setup")
+    subparsers.add_parser("analyze-stack", help="tech stack findings as JSON")
+    test_parser = subparsers.add_parser("functional-test", help="run the functional test suite")
+    test_parser.add_argument("--base-url", default="http://localhost:3000")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        serve(AgentRuntime(), args.socket)
+        return 0
+
+    request = build_request(args)
+    response = request_server(args.socket, request) if args.server else None
+    if response is None:
+        response = AgentRuntime().handle(request)
+
+    if not response["ok"]:
+        print(f"❌ {response['error']}", file=sys.stderr)
+        return 1
+    print(json.dumps(response["result"], indent=2, default=str))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Dev Server Log Analyzer - Compile times and request latencies from Next.js dev output
+
+Reads dev_server.log (and its rotations, oldest first) one line at a time and folds
+
+    ✓ Compiled /api/terminal in 725ms        per-route compile times (HMR rebuilds as "(hmr)")
+    GET /api/terminal?sessionId=x 200 in 9ms per-endpoint request latencies
+    ▲ Next.js 15.4.5 / ✓ Ready in 900ms      server restarts and startup time
+
+into fixed-size histograms. Memory grows with the number of distinct routes, not
+with the log size. Logs carry no timestamps, so "over time" means log order: each
+route's samples are cut into windows and a window whose median is well above the
+best earlier window is reported as a regression.
+
+    python3 analyze_dev_log.py dev_server.log
+    python3 analyze_dev_log.py /var/log/next/dev.log --slow-compile-ms 2000 --json
+"""
+
+import os
+import re
+import sys
+import json
+import heapq
+import argparse
+from collections import deque
+from statistics import median
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from error_handler import iter_log_lines, rotated_logs  # noqa: E402
+from perf_stats import LatencyHistogram  # noqa: E402
+
+COMPILED = re.compile(r"[✓✔] Compiled(?: (\S+))? in ([\d.]+)(ms|s)\b")
+READY = re.compile(r"[✓✔] Ready in ([\d.]+)(ms|s)\b")
+REQUEST = re.compile(r"^\s*(GET|POST|PUT|PATCH|DELETE|HEAD|OPTIONS) (\S+) (\d{3}) in ([\d.]+)(ms|s)\b")
+SERVER_START = re.compile(r"▲ Next\.js (\S+)")
+# Numeric ids, UUIDs and long hex hashes collapse so /api/items/42 and /api/items/43 share a histogram
+DYNAMIC_SEGMENT = re.compile(r"/(?:\d+|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}|[0-9a-f]{16,})(?=/|$)",
+                             re.IGNORECASE)
+# SSE endpoints log how long the stream stayed open, not how long the request took
+STREAMING_ENDPOINTS = ("GET /api/terminal",)
+HMR_ROUTE = "(hmr)"
+MAX_REGRESSIONS = 20
+MAX_SESSIONS = 100
+
+
+def to_ms(value, unit):
+    return float(value) * (1000.0 if unit == "s" else 1.0)
+
+
+def normalize_path(path):
+    return DYNAMIC_SEGMENT.sub("/:id", path.split("?", 1)[0])
+
+
+class Series:
+    """Histogram of one route or endpoint plus windowed medians for regression checks"""
+
+    __slots__ = ("histogram", "window", "window_start", "best", "regressions", "slow", "statuses")
+
+    def __init__(self):
+        self.histogram = LatencyHistogram()
+        self.window = []
+        self.window_start = None
+        self.best = None
+        self.regressions = []
+        self.slow = 0
+        self.statuses = {}
+
+    def add(self, ms, line_number, session, analyzer):
+        self.histogram.record(ms / 1000.0)
+        if not self.window:
+            self.window_start = line_number
+        self.window.append(ms)
+        if len(self.window) >= analyzer.window_size:
+            self.close_window(line_number, session, analyzer)
+
+    def close_window(self, line_number, session, analyzer):
+        window_median = median(self.window)
+        if self.best is not None and window_median >= self.best * analyzer.regression_ratio \
+                and window_median - self.best >= analyzer.regression_min_ms \
+                and len(self.regressions) < MAX_REGRESSIONS:
+            self.regressions.append({
+                "lines": [self.window_start, line_number],
+                "session": session,
+                "samples": len(self.window),
+                "median_ms": round(window_median, 1),
+                "baseline_ms": round(self.best, 1),
+                "ratio": round(window_median / self.best, 2),
+            })
+        self.best = window_median if self.best is None else min(self.best, window_median)
+        self.window = []
+
+    def summary(self):
+        result = {"latency": self.histogram.summary(), "regressions": self.regressions}
+        if self.slow:
+            result["slow"] = self.slow
+        if self.statuses:
+            result["statuses"] = dict(sorted(self.statuses.items()))
+        return result
+
+
+class DevLogAnalyzer:
+    """Folds dev server log lines into per-route compile and per-endpoint request statistics"""
+
+    def __init__(self, slow_compile_ms=1000.0, slow_request_ms=1000.0, window_size=10,
+                 regression_ratio=1.5, regression_min_ms=50.0, top=10, streaming=STREAMING_ENDPOINTS):
+        self.slow_compile_ms = slow_compile_ms
+        self.slow_request_ms = slow_request_ms
+        self.window_size = window_size
+        self.regression_ratio = regression_ratio
+        self.regression_min_ms = regression_min_ms
+        self.top = top
+        self.streaming = set(streaming)
+        self.compiles = {}
+        self.requests = {}
+        self.streams = {}
+        self.sessions = deque(maxlen=MAX_SESSIONS)
+        self.slowest_compiles = []
+        self.slowest_requests = []
+        self.lines = 0
+        self.session = 0
+
+    def _series(self, table, key):
+        series = table.get(key)
+        if series is None:
+            series = table[key] = Series()
+        return series
+
+    def _keep_slowest(self, heap, ms, entry):
+        # Min-heap of the top N: memory stays at N entries however many samples pass through
+        item = (ms, self.lines, entry)
+        if len(heap) < self.top:
+            heapq.heappush(heap, item)
+        elif ms > heap[0][0]:
+            heapq.heapreplace(heap, item)
+
+    def feed(self, line):
+        self.lines += 1
+        # Every line of interest contains " in "; most log lines are rejected by this test alone
+        if " in " not in line:
+            match = SERVER_START.search(line)
+            if match:
+                self.session += 1
+                self.sessions.append({"session": self.session, "line": self.lines, "version": match.group(1),
+                                      "ready_ms": None, "compiles": 0, "compile_ms": 0.0})
+            return
+        match = REQUEST.match(line)
+        if match:
+            method, path, status, value, unit = match.groups()
+            ms = to_ms(value, unit)
+            endpoint = f"{method} {normalize_path(path)}"
+            if endpoint in self.streaming:
+                self._series(self.streams, endpoint).add(ms, self.lines, self.session, self)
+                return
+            series = self._series(self.requests, endpoint)
+            series.statuses[status] = series.statuses.get(status, 0) + 1
+            series.add(ms, self.lines, self.session, self)
+            if ms >= self.slow_request_ms:
+                series.slow += 1
+                self._keep_slowest(self.slowest_requests, ms, {"endpoint": endpoint, "status": int(status)})
+            return
+        match = COMPILED.search(line)
+        if match:
+            route, value, unit = match.groups()
+            ms = to_ms(value, unit)
+            route = route or HMR_ROUTE
+            series = self._series(self.compiles, route)
+            series.add(ms, self.lines, self.session, self)
+            if self.sessions:
+                self.sessions[-1]["compiles"] += 1
+                self.sessions[-1]["compile_ms"] += ms
+            if ms >= self.slow_compile_ms:
+                series.slow += 1
+                self._keep_slowest(self.slowest_compiles, ms, {"route": route})
+            return
+        match = READY.search(line)
+        if match and self.sessions:
+            self.sessions[-1]["ready_ms"] = to_ms(*match.groups())
+
+    def feed_file(self, path, rotated=True):
+        for line in iter_log_lines(path, rotated=rotated):
+            self.feed(line)
+
+    def report(self):
+        for table in (self.compiles, self.requests, self.streams):
+            for series in table.values():
+                # A trailing half-full window still counts; a handful of samples does not
+                if len(series.window) >= max(2, self.window_size // 2):
+                    series.close_window(self.lines, self.session, self)
+
+        def by_p95(table):
+            ordered = sorted(table.items(), key=lambda item: -item[1].histogram.percentile(0.95))
+            return {key: series.summary() for key, series in ordered}
+
+        def slowest(heap, key):
+            return [dict(entry, **{key: round(ms, 1), "line": line}) for ms, line, entry in sorted(heap, reverse=True)]
+
+        for session in self.sessions:
+            session["compile_ms"] = round(session["compile_ms"], 1)
+        return {
+            "lines": self.lines,
+            "server_starts": self.session,
+            "sessions": list(self.sessions),
+            "thresholds": {"slow_compile_ms": self.slow_compile_ms, "slow_request_ms": self.slow_request_ms,
+                           "window": self.window_size, "regression_ratio": self.regression_ratio},
+            "compiles": by_p95(self.compiles),
+            "requests": by_p95(self.requests),
+            "streams": by_p95(self.streams),
+            "slowest_compiles": slowest(self.slowest_compiles, "compile_ms"),
+            "slowest_requests": slowest(self.slowest_requests, "latency_ms"),
+        }
+
+
+def print_report(report, files):
+    print("📜 Dev Server Log Analysis")
+    print("=" * 60)
+    print(f"{report['lines']:,} lines from {', '.join(files)}; {report['server_starts']} server start(s)")
+    for session in report["sessions"][-5:]:
+        ready = f"{session['ready_ms']:.0f}ms" if session["ready_ms"] is not None else "?"
+        print(f"  #{session['session']} Next.js {session['version']} ready in {ready}, "
+              f"{session['compiles']} compiles ({session['compile_ms']:.0f}ms) at line {session['line']}")
+
+    for title, key in (("🛠️  Compile times", "compiles"), ("🌐 Request latency", "requests"),
+                       ("📡 Stream durations", "streams")):
+        if not report[key]:
+            continue
+        print(f"\n{title} (slowest p95 first):")
+        for name, stats in report[key].items():
+            latency = stats["latency"]
+            extra = f"  slow {stats['slow']}" if stats.get("slow") else ""
+            errors = sum(count for status, count in stats.get("statuses", {}).items() if status >= "500")
+            if errors:
+                extra += f"  5xx {errors}"
+            print(f"  {name:<40} n={latency['count']:<5} p50 {latency['p50_ms']:>9}ms  p95 {latency['p95_ms']:>9}ms  "
+                  f"max {latency['max_ms']:>9}ms{extra}")
+
+    regressions = [(name, regression) for key in ("compiles", "requests")
+                   for name, stats in report[key].items() for regression in stats["regressions"]]
+    if regressions:
+        print("\n📈 Regressions (window median vs best earlier window):")
+        for name, regression in regressions:
+            print(f"  {name}: {regression['baseline_ms']}ms -> {regression['median_ms']}ms "
+                  f"(x{regression['ratio']}) lines {regression['lines'][0]}-{regression['lines'][1]}")
+    if report["slowest_compiles"]:
+        print(f"\n🐢 Slowest compiles (>= {report['thresholds']['slow_compile_ms']:.0f}ms):")
+        for entry in report["slowest_compiles"]:
+            print(f"  {entry['compile_ms']:>9}ms  {entry['route']}  (line {entry['line']})")
+    if report["slowest_requests"]:
+        print(f"\n🐢 Slowest requests (>= {report['thresholds']['slow_request_ms']:.0f}ms):")
+        for entry in report["slowest_requests"]:
+            print(f"  {entry['latency_ms']:>9}ms  {entry['endpoint']} {entry['status']}  (line {entry['line']})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile-time and request-latency statistics from a Next.js dev log")
+    parser.add_argument("log", nargs="?", default="dev_server.log", help="log file; rotations (.1, .2.gz) are read too")
+    parser.add_argument("--no-rotated", action="store_true", help="read only the named file")
+    parser.add_argument("--slow-compile-ms", type=float, default=1000.0)
+    parser.add_argument("--slow-request-ms", type=float, default=1000.0)
+    parser.add_argument("--window", type=int, default=10, help="samples per regression window")
+    parser.add_argument("--regression-ratio", type=float, default=1.5, help="window median / best median to flag")
+    parser.add_argument("--regression-min-ms", type=float, default=50.0, help="ignore smaller absolute increases")
+    parser.add_argument("--streaming", action="append", default=list(STREAMING_ENDPOINTS),
+                        help="'METHOD /path' whose logged time is a stream lifetime (repeatable)")
+    parser.add_argument("--top", type=int, default=10, help="slowest compiles and requests to list")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    files = [args.log] if args.no_rotated else rotated_logs(args.log)
+    if not files:
+        print(f"❌ {args.log} not found", file=sys.stderr)
+        return None
+    analyzer = DevLogAnalyzer(args.slow_compile_ms, args.slow_request_ms, args.window, args.regression_ratio,
+                              args.regression_min_ms, args.top, args.streaming)
+    analyzer.feed_file(args.log, rotated=not args.no_rotated)
+    report = analyzer.report()
+    report["files"] = files
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report, files)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -4,10 +4,217 @@ Tech Stack Analysis Script - Using the Tech Stack Analyzer Agent
 """
 
 import json
-import subprocess
 import os
+import re
+import sys
+import time
+import bisect
+import hashlib
+import argparse
+from datetime import datetime, timezone
 from pathlib import Path
 
+# Bump whenever a record's shape changes so dashboards can tell runs apart
+FINDINGS_SCHEMA = "tech-stack-findings"
+FINDINGS_SCHEMA_VERSION = 1
+
+# Bump whenever the render-pattern rules change so cached findings are rescanned
+RENDER_SCAN_VERSION = 1
+RENDER_CACHE_PATH = os.path.join('.agent-cache', 'react_render_patterns.json')
+# Below this many uncached files a process pool costs more than it saves
+RENDER_SCAN_PARALLEL_THRESHOLD = 8
+
+VIRTUALIZATION_PACKAGES = (
+    'react-window',
+    'react-virtualized',
+    'react-virtuoso',
+    '@tanstack/react-virtual',
+)
+
+# A JSX tag opening: "<Name" not preceded by an identifier (which would be a generic like useState<T>)
+JSX_TAG_RE = re.compile(r'(?<![\w.)\]])<([A-Za-z][\w.]*)')
+MAP_CALL_RE = re.compile(r'[\w)\]]\??\.map\(')
+IMPORT_RE = re.compile(r'import\s+(?:(\w+)\s*,?\s*)?(?:\{([^}]*)\})?\s*from\s*[\'"]([^\'"]+)[\'"]')
+MEMO_DEF_RE = re.compile(r'(?:export\s+)?const\s+(\w+)\s*=\s*(?:React\.)?memo\(')
+COMPONENT_DEF_RE = re.compile(r'(?:export\s+)?(?:default\s+)?(?:function\s+([A-Z]\w*)|const\s+([A-Z]\w*)\s*=)')
+ARRAY_LITERAL_RE = re.compile(r'const\s+(\w+)(?:\s*:\s*[^=]+)?\s*=\s*\[')
+PLAIN_HANDLER_RE = re.compile(r'const\s+(\w+)\s*=\s*(?:async\s*)?(?:\([^)]*\)|\w+)\s*(?::\s*[^=]+)?=>')
+INLINE_OBJECT_PROP_RE = re.compile(r'(\w+)=\{\s*[\{\[]')
+INLINE_FUNCTION_PROP_RE = re.compile(r'(\w+)=\{\s*(?:async\s*)?(?:\([^)]*\)|\w+)\s*=>|(\w+)=\{\s*function\b')
+IDENTIFIER_PROP_RE = re.compile(r'(\w+)=\{\s*(\w+)\s*\}')
+
+
+def _find_closing(source, start, open_char, close_char):
+    """Return the index just past the bracket matching source[start], or len(source)"""
+    depth = 0
+    quote = None
+    i = start
+    while i < len(source):
+        char = source[i]
+        if quote:
+            if char == '\\':
+                i += 2
+                continue
+            if char == quote:
+                quote = None
+        elif char in '"\'`':
+            quote = char
+        elif char == open_char:
+            depth += 1
+        elif char == close_char:
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return len(source)
+
+
+def _receiver_before(source, end):
+    """Return the expression ending at source[end] (e.g. "items.slice(0, 5)" before ".map(")"""
+    closers = {')': '(', ']': '['}
+    i = end
+    while i >= 0:
+        char = source[i]
+        if char in closers:
+            depth = 0
+            while i >= 0:
+                if source[i] == char:
+                    depth += 1
+                elif source[i] == closers[char]:
+                    depth -= 1
+                    if depth == 0:
+                        break
+                i -= 1
+        elif not (char.isalnum() or char in '_$.?'):
+            break
+        i -= 1
+    return source[i + 1:end + 1]
+
+
+def _tag_attributes_end(source, start):
+    """Return the index of the '>' closing a JSX opening tag, skipping {...} expressions"""
+    i = start
+    while i < len(source):
+        char = source[i]
+        if char == '{':
+            i = _find_closing(source, i, '{', '}')
+            continue
+        if char == '>':
+            return i
+        i += 1
+    return len(source)
+
+
+def _is_component_tag(name):
+    return name[0].isupper() or '.' in name
+
+
+def scan_component_source(source):
+    """Extract render-pattern facts from one component file.
+
+    Returns a dict of file-local findings plus the facts needed to resolve
+    cross-file findings (which components are rendered in lists, which are memoized).
+    Everything returned is JSON-serializable so it can be cached by content hash.
+    """
+    line_starts = [0] + [m.end() for m in re.finditer(r'\n', source)]
+
+    def line_of(offset):
+        return bisect.bisect_right(line_starts, offset)
+
+    findings = []
+    imports = {}
+    for match in IMPORT_RE.finditer(source):
+        default_name, named, module = match.groups()
+        if default_name:
+            imports[default_name] = module
+        for name in (named or '').split(','):
+            name = name.strip().split(' as ')[-1].strip()
+            if name:
+                imports[name] = module
+
+    plain_handlers = set(PLAIN_HANDLER_RE.findall(source))
+    array_literals = set(ARRAY_LITERAL_RE.findall(source))
+
+    for match in JSX_TAG_RE.finditer(source):
+        tag = match.group(1)
+        if not _is_component_tag(tag):
+            continue
+        attributes = source[match.end():_tag_attributes_end(source, match.end())]
+        line = line_of(match.start())
+        for prop in INLINE_OBJECT_PROP_RE.finditer(attributes):
+            findings.append({
+                "pattern": "inline-object-prop",
+                "line": line,
+                "detail": f"<{tag} {prop.group(1)}={{...}}> creates a new object/array every render"
+            })
+        for prop in INLINE_FUNCTION_PROP_RE.finditer(attributes):
+            findings.append({
+                "pattern": "inline-function-prop",
+                "line": line,
+                "detail": f"<{tag} {prop.group(1) or prop.group(2)}={{() => ...}}> creates a new function every render"
+            })
+        for prop, value in IDENTIFIER_PROP_RE.findall(attributes):
+            if value in plain_handlers:
+                findings.append({
+                    "pattern": "unstable-callback-prop",
+                    "line": line,
+                    "detail": f"<{tag} {prop}={{{value}}}> passes a handler not wrapped in useCallback"
+                })
+
+    virtualized = any(module in VIRTUALIZATION_PACKAGES for module in imports.values())
+    map_renders = []
+    for match in MAP_CALL_RE.finditer(source):
+        call_start = match.end() - 1
+        callback = source[call_start:_find_closing(source, call_start, '(', ')')]
+        tags = JSX_TAG_RE.findall(callback)
+        if not tags:
+            continue
+        receiver = _receiver_before(source, match.start()).rstrip('?')
+        line = line_of(match.start())
+        root_tag = tags[0]
+        if _is_component_tag(root_tag):
+            map_renders.append({"component": root_tag, "module": imports.get(root_tag), "line": line})
+        # Literal arrays declared in the file and explicit slices are bounded lists
+        bounded = receiver in array_literals or '.slice(' in receiver
+        if not virtualized and not bounded:
+            findings.append({
+                "pattern": "unvirtualized-list",
+                "line": line,
+                "detail": f"{receiver}.map() renders <{root_tag}> for every item without virtualization"
+            })
+
+    components = set()
+    for match in COMPONENT_DEF_RE.finditer(source):
+        components.add(match.group(1) or match.group(2))
+
+    return {
+        "findings": findings,
+        "map_renders": map_renders,
+        "components": sorted(components),
+        "memoized": sorted(set(MEMO_DEF_RE.findall(source))),
+    }
+
+
+def _scan_component_file(path):
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        return scan_component_source(f.read())
+
+
+def _resolve_component_module(from_file, module, src_root):
+    """Resolve a relative or @/ import to a component file path, if it is local"""
+    if module is None:
+        return from_file
+    if module.startswith('@/'):
+        base = os.path.join(src_root, module[2:])
+    elif module.startswith('.'):
+        base = os.path.normpath(os.path.join(os.path.dirname(from_file), module))
+    else:
+        return None
+    for candidate in (base + '.tsx', base + '.jsx', os.path.join(base, 'index.tsx'), base):
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
 # Simplified Tech Stack Analyzer for this specific codebase
 class TechStackAnalyzerAgent:
     def __init__(self):
@@ -24,6 +231,15 @@ class TechStackAnalyzerAgent:
         self.performance_issues = []
         self.enhancement_opportunities = []
         self.modernization_suggestions = []
+        self.render_findings = None
+        # Structured, emoji-free records of what was measured; see iter_analysis_records()
+        self.records = []
+
+    def _measure(self, name, value, unit, **location):
+        self.records.append({"type": "measurement", "name": name, "value": value, "unit": unit, **location})
+
+    def _find(self, category, code, subject, **location):
+        self.records.append({"type": "finding", "category": category, "code": code, "subject": subject, **location})
         
     def analyze_package_json(self, package_path):
         """Analyze package.json for optimization opportunities"""
@@ -32,6 +248,9 @@ class TechStackAnalyzerAgent:
         
         dependencies = package_data.get('dependencies', {})
         dev_dependencies = package_data.get('devDependencies', {})
+        self._measure("package.size", os.path.getsize(package_path), "bytes", file=package_path)
+        self._measure("package.dependencies", len(dependencies), "count", file=package_path)
+        self._measure("package.dev_dependencies", len(dev_dependencies), "count", file=package_path)
         
         # Check for outdated patterns
         if 'react' in dependencies:
@@ -42,9 +261,11 @@ class TechStackAnalyzerAgent:
         # Check for missing performance optimizations
         if '@next/bundle-analyzer' not in dev_dependencies:
             self.enhancement_opportunities.append("📊 Add @next/bundle-analyzer for bundle size optimization")
+            self._find("enhancement", "missing-dev-dependency", "@next/bundle-analyzer", file=package_path)
         
         if '@next/eslint-plugin-next' not in dev_dependencies and 'eslint-config-next' in dev_dependencies:
             self.enhancement_opportunities.append("🔍 Consider @next/eslint-plugin-next for better Next.js specific linting")
+            self._find("enhancement", "missing-dev-dependency", "@next/eslint-plugin-next", file=package_path)
             
         # Check for modern dependencies
         modern_suggestions = {
@@ -59,29 +280,48 @@ class TechStackAnalyzerAgent:
         for dep, reason in modern_suggestions.items():
             if dep not in dependencies and dep not in dev_dependencies:
                 self.modernization_suggestions.append(f"💡 {dep}: {reason}")
+                self._find("modernization", "missing-dependency", dep, file=package_path)
     
     def analyze_next_config(self, config_path):
         """Analyze Next.js configuration for optimizations"""
         try:
             with open(config_path, 'r') as f:
                 content = f.read()
+            self._measure("next_config.size", len(content.encode('utf-8')), "bytes", file=config_path)
                 
             if 'experimental' not in content:
                 self.enhancement_opportunities.append("⚡ Enable Next.js experimental features for better performance")
+                self._find("enhancement", "next-config-missing-key", "experimental", file=config_path)
             
             if 'images' not in content:
                 self.enhancement_opportunities.append("🖼️ Configure Next.js Image optimization")
+                self._find("enhancement", "next-config-missing-key", "images", file=config_path)
                 
             if 'webpack' not in content:
                 self.enhancement_opportunities.append("📦 Consider custom webpack optimizations")
+                self._find("enhancement", "next-config-missing-key", "webpack", file=config_path)
                 
         except FileNotFoundError:
             self.performance_issues.append("❌ Next.js config file not found or empty")
+            self._find("performance_issue", "missing-file", "next.config", file=config_path)
     
     def analyze_file_structure(self, src_path):
         """Analyze file structure for organization improvements"""
         src_dir = Path(src_path)
         
+        file_count = 0
+        total_bytes = 0
+        by_extension = {}
+        for path in src_dir.rglob('*'):
+            if path.is_file():
+                file_count += 1
+                total_bytes += path.stat().st_size
+                by_extension[path.suffix] = by_extension.get(path.suffix, 0) + 1
+        self._measure("src.files", file_count, "count", file=src_path)
+        self._measure("src.size", total_bytes, "bytes", file=src_path)
+        for extension, count in sorted(by_extension.items()):
+            self._measure(f"src.files{extension or '.<none>'}", count, "count", file=src_path)
+        
         # Check for proper separation of concerns
         has_utils = (src_dir / 'utils').exists()
         has_lib = (src_dir / 'lib').exists()
@@ -89,33 +329,133 @@ class TechStackAnalyzerAgent:
         
         if not has_utils and not has_lib:
             self.enhancement_opportunities.append("📁 Create utils/ or lib/ directory for shared utilities")
+            self._find("enhancement", "missing-directory", "utils", file=src_path)
             
         if not has_constants:
             self.enhancement_opportunities.append("📝 Create constants/ directory for app constants")
+            self._find("enhancement", "missing-directory", "constants", file=src_path)
         
         # Check for component organization
         components_dir = src_dir / 'components'
         if components_dir.exists():
             subdirs = [d for d in components_dir.iterdir() if d.is_dir()]
+            self._measure("components.directories", len(subdirs), "count", file=str(components_dir))
             if len(subdirs) < 3:
                 self.enhancement_opportunities.append("🧩 Consider better component organization (UI, features, layout)")
+                self._find("enhancement", "flat-component-layout", "components", file=str(components_dir))
     
+    def analyze_react_render_patterns(self, components_path, cache_path=RENDER_CACHE_PATH):
+        """Find concrete expensive render patterns in components, reported as file:line.
+
+        Files are scanned in parallel and results are cached per content hash,
+        so only files changed since the last run are rescanned.
+        """
+        components_dir = Path(components_path)
+        src_root = str(components_dir.parent)
+        files = sorted(str(p) for p in components_dir.rglob('*') if p.suffix in ('.tsx', '.jsx'))
+
+        try:
+            with open(cache_path, 'r') as f:
+                cache = json.load(f)
+            if cache.get('version') != RENDER_SCAN_VERSION:
+                cache = {}
+        except (FileNotFoundError, ValueError):
+            cache = {}
+        cached_files = cache.get('files', {})
+
+        facts = {}
+        digests = {}
+        pending = []
+        for path in files:
+            with open(path, 'rb') as f:
+                digest = hashlib.sha1(f.read()).hexdigest()
+            digests[path] = digest
+            entry = cached_files.get(path)
+            if entry and entry['hash'] == digest:
+                facts[path] = entry['facts']
+            else:
+                pending.append(path)
+
+        parallel = len(pending) >= RENDER_SCAN_PARALLEL_THRESHOLD
+        if parallel:
+            # Imported here: the process pool machinery is only worth loading for big rescans
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            # Forked workers only: agent_cli registers this script under its own module name in
+            # the parent's sys.modules alone, so a spawned worker cannot unpickle _scan_component_file
+            parallel = 'fork' in multiprocessing.get_all_start_methods()
+        if parallel:
+            with ProcessPoolExecutor(mp_context=multiprocessing.get_context('fork')) as pool:
+                scanned = list(pool.map(_scan_component_file, pending))
+        else:
+            scanned = [_scan_component_file(path) for path in pending]
+        facts.update(zip(pending, scanned))
+
+        if pending or set(cached_files) != set(files):
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            with open(cache_path, 'w') as f:
+                json.dump({
+                    'version': RENDER_SCAN_VERSION,
+                    'files': {path: {'hash': digests[path], 'facts': facts[path]} for path in files}
+                }, f)
+
+        findings = []
+        for path in files:
+            file_facts = facts[path]
+            for finding in file_facts['findings']:
+                findings.append({"file": path, **finding})
+            # A component rendered per list item re-renders with its parent unless memoized
+            for render in file_facts['map_renders']:
+                target = _resolve_component_module(path, render['module'], src_root)
+                target_facts = facts.get(target)
+                if not target_facts or render['component'] not in target_facts['components']:
+                    continue
+                if render['component'] not in target_facts['memoized']:
+                    findings.append({
+                        "file": path,
+                        "line": render['line'],
+                        "pattern": "unmemoized-map-child",
+                        "component": render['component'],
+                        "detail": f"<{render['component']}> rendered inside .map() is not wrapped in React.memo"
+                    })
+
+        findings.sort(key=lambda finding: (finding['file'], finding['line']))
+        self.render_findings = findings
+        self._measure("components.files", len(files), "count", file=str(components_dir))
+        self._measure("components.files_rescanned", len(pending), "count", file=str(components_dir))
+        for finding in findings:
+            self._find("render_pattern", finding['pattern'], finding.get('component') or finding['detail'],
+                       file=finding['file'], line=finding['line'])
+        return findings
+
     def analyze_performance_opportunities(self):
         """Identify performance optimization opportunities"""
+        memo_suggestion = "⚡ Implement React.memo() for expensive components"
+        virtualization_suggestion = "🚀 Implement virtualization for large file lists"
+        if self.render_findings is not None:
+            # Only suggest what the render-pattern scan actually found
+            unmemoized = sorted({f['component'] for f in self.render_findings
+                                 if f['pattern'] == 'unmemoized-map-child'})
+            unvirtualized = [f for f in self.render_findings if f['pattern'] == 'unvirtualized-list']
+            memo_suggestion = (f"⚡ Implement React.memo() for list item components: {', '.join(unmemoized)}"
+                               if unmemoized else None)
+            virtualization_suggestion = (f"🚀 Implement virtualization for {len(unvirtualized)} unbounded lists"
+                                         if unvirtualized else None)
+
         performance_suggestions = [
-            "⚡ Implement React.memo() for expensive components",
+            memo_suggestion,
             "🔄 Add React Suspense for better loading states", 
             "💾 Implement service worker for offline functionality",
             "🗂️ Use dynamic imports for code splitting",
             "📱 Add PWA capabilities for better mobile experience",
-            "🚀 Implement virtualization for large file lists",
+            virtualization_suggestion,
             "⚡ Add request deduplication for API calls",
             "📊 Implement telemetry and error tracking",
             "🎯 Add keyboard shortcuts optimization",
             "💨 Use React 19's concurrent features"
         ]
         
-        return performance_suggestions
+        return [suggestion for suggestion in performance_suggestions if suggestion]
     
     def analyze_security_opportunities(self):
         """Identify security enhancement opportunities"""
@@ -214,30 +554,87 @@ class TechStackAnalyzerAgent:
             }
         }
 
-def main():
+def iter_analysis_records(root, analyzer=None):
+    """Run every analysis pass over root, yielding structured records as each pass finishes.
+
+    Nothing here renders text, so the analysis can run headless and its records
+    can be streamed straight to a file.
+    """
+    analyzer = analyzer or TechStackAnalyzerAgent()
+    yield {
+        "type": "header",
+        "schema": FINDINGS_SCHEMA,
+        "schema_version": FINDINGS_SCHEMA_VERSION,
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "root": root,
+    }
+
+    src_path = os.path.join(root, 'src')
+    passes = [
+        ("package_json", os.path.join(root, 'package.json'), analyzer.analyze_package_json),
+        ("next_config", os.path.join(root, 'next.config.ts'), analyzer.analyze_next_config),
+        ("file_structure", src_path, analyzer.analyze_file_structure),
+        ("react_render_patterns", os.path.join(src_path, 'components'), analyzer.analyze_react_render_patterns),
+    ]
+    total_start = time.perf_counter()
+    for name, path, analyze in passes:
+        if not os.path.exists(path):
+            yield {"type": "pass", "name": name, "status": "skipped", "duration_ms": 0.0}
+            continue
+        emitted = len(analyzer.records)
+        start = time.perf_counter()
+        analyze(path)
+        duration_ms = (time.perf_counter() - start) * 1000
+        for record in analyzer.records[emitted:]:
+            # Root-relative paths keep runs from different checkouts diffable
+            if "file" in record:
+                record = {**record, "file": os.path.relpath(record["file"], root)}
+            yield record
+        yield {"type": "pass", "name": name, "status": "completed", "duration_ms": round(duration_ms, 3)}
+
+    yield {
+        "type": "summary",
+        "measurements": sum(1 for r in analyzer.records if r["type"] == "measurement"),
+        "findings": sum(1 for r in analyzer.records if r["type"] == "finding"),
+        "duration_ms": round((time.perf_counter() - total_start) * 1000, 3),
+    }
+
+
+def build_findings_document(records):
+    """Fold a record stream into one schema-versioned JSON document"""
+    document = {}
+    sections = {"measurement": [], "finding": [], "pass": []}
+    for record in records:
+        fields = {k: v for k, v in record.items() if k != "type"}
+        if record["type"] == "header":
+            document.update(fields)
+        elif record["type"] == "summary":
+            document["summary"] = fields
+        else:
+            sections[record["type"]].append(fields)
+    document["measurements"] = sections["measurement"]
+    document["findings"] = sections["finding"]
+    document["passes"] = sections["pass"]
+    return document
+
+
+def write_findings(records, stream, output_format):
+    """Write records as NDJSON (flushed per record) or as a single JSON document"""
+    if output_format == "ndjson":
+        for record in records:
+            stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+            stream.flush()
+        return None
+    document = build_findings_document(records)
+    json.dump(document, stream, indent=2, ensure_ascii=False)
+    stream.write("\n")
+    return document
+
+
+def render_text_report(analyzer, enhancement_plan):
     print("🚀 Tech Stack Analysis for Claude Code IDE")
     print("=" * 60)
     
-    analyzer = TechStackAnalyzerAgent()
-    
-    # Analyze current setup
-    current_dir = os.getcwd()
-    package_json_path = os.path.join(current_dir, 'package.json')
-    next_config_path = os.path.join(current_dir, 'next.config.ts')
-    src_path = os.path.join(current_dir, 'src')
-    
-    if os.path.exists(package_json_path):
-        analyzer.analyze_package_json(package_json_path)
-    
-    if os.path.exists(next_config_path):
-        analyzer.analyze_next_config(next_config_path)
-    
-    if os.path.exists(src_path):
-        analyzer.analyze_file_structure(src_path)
-    
-    # Generate comprehensive plan
-    enhancement_plan = analyzer.generate_enhancement_plan()
-    
     # Print results
     print("\n📊 CURRENT STACK STRENGTHS:")
     for strength in enhancement_plan["current_stack_analysis"]["strengths"]:
@@ -251,6 +648,12 @@ def main():
     for optimization in enhancement_plan["performance_optimizations"][:5]:
         print(f"  {optimization}")
     
+    if analyzer.render_findings:
+        print(f"\n🧩 REACT RENDER PATTERNS ({len(analyzer.render_findings)} found):")
+        for finding in analyzer.render_findings:
+            print(f"  {os.path.relpath(finding['file'])}:{finding['line']} "
+                  f"[{finding['pattern']}] {finding['detail']}")
+    
     print("\n🛡️ SECURITY ENHANCEMENTS:")
     for security in enhancement_plan["security_enhancements"][:5]:
         print(f"  {security}")
@@ -269,7 +672,30 @@ def main():
     print("  🛡️ Security enhancements are important for production")
     print("  👨‍💻 Developer experience improvements will boost productivity")
     print("  🏗️ Architecture patterns will improve maintainability")
-    
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze the IDE tech stack")
+    parser.add_argument("--format", choices=["text", "json", "ndjson"], default="text",
+                        help="text report, one JSON document, or one JSON record per line")
+    parser.add_argument("--json", dest="format", action="store_const", const="json",
+                        help="shorthand for --format json")
+    parser.add_argument("--output", "-o", help="write json/ndjson output to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    analyzer = TechStackAnalyzerAgent()
+    records = iter_analysis_records(os.getcwd(), analyzer)
+
+    if args.format != "text":
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                return write_findings(records, f, args.format)
+        return write_findings(records, sys.stdout, args.format)
+
+    # Drain the passes, then build the text-only plan from the analyzer state
+    for _ in records:
+        pass
+    enhancement_plan = analyzer.generate_enhancement_plan()
+    render_text_report(analyzer, enhancement_plan)
     return enhancement_plan
 
 if __name__ == "__main__":
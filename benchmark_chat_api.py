@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Chat API Benchmark - Throughput and latency of /api/chat against the mock OpenAI server
+
+Every scenario is sent twice: straight to the mock upstream, then through the app's
+/api/chat route (which forwards to the same mock). The difference between the two is
+the cost of the route itself: request JSON parsing, the per-request OpenAI client,
+the upstream round-trip from Node and response serialization.
+
+    python3 mock_openai_server.py --port 8787 &
+    OPENAI_BASE_URL=http://127.0.0.1:8787/v1 OPENAI_API_KEY=mock npm run dev &
+    python3 benchmark_chat_api.py --mock-url http://127.0.0.1:8787
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import http.client
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from perf_stats import percentiles  # noqa: E402
+
+SYSTEM_PROMPT = ("You are an expert programming assistant integrated into a VS Code-like IDE. "
+                 "Be concise but thorough.")
+
+
+class HTTPTarget:
+    """A keep-alive connection per worker thread to one origin"""
+
+    def __init__(self, base_url):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.prefix = parts.path.rstrip("/")
+        self.local = threading.local()
+
+    def _connection(self):
+        if getattr(self.local, "connection", None) is None:
+            self.local.connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+        return self.local.connection
+
+    def request(self, method, path, payload=None):
+        body = json.dumps(payload).encode() if payload is not None else None
+        headers = {"Content-Type": "application/json"} if body else {}
+        connection = self._connection()
+        try:
+            connection.request(method, self.prefix + path, body=body, headers=headers)
+            response = connection.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException):
+            self.local.connection = None
+            connection.close()
+            raise
+        return response.status, data
+
+
+def build_messages(count, chars):
+    """A conversation of `count` alternating turns, each about `chars` characters"""
+    words = ("function component state render effect props ") * (chars // 40 + 1)
+    return [{"role": "user" if i % 2 == 0 else "assistant", "content": words[:chars]} for i in range(count)]
+
+
+def run_load(send, total, concurrency):
+    latencies = []
+    failures = []
+    lock = threading.Lock()
+
+    def one(_):
+        start = time.perf_counter()
+        try:
+            status, _ = send()
+        except (OSError, http.client.HTTPException) as e:
+            status = str(e)
+        elapsed = time.perf_counter() - start
+        with lock:
+            if status == 200:
+                latencies.append(elapsed)
+            else:
+                failures.append(status)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total)))
+    wall = time.perf_counter() - start
+    return {
+        "latency": percentiles(latencies),
+        "requests_per_sec": round(len(latencies) / wall, 1),
+        "failures": len(failures),
+        "failure_statuses": sorted({str(status) for status in failures}),
+    }
+
+
+def overhead(route, direct):
+    if not route["latency"] or not direct["latency"]:
+        return None
+    return {key: round(route["latency"][key] - direct["latency"][key], 2)
+            for key in ("p50_ms", "p95_ms", "p99_ms")}
+
+
+def run_suite(args):
+    mock = HTTPTarget(args.mock_url)
+    app = HTTPTarget(args.app_url) if args.app_url else None
+    app_error = None
+    if app:
+        try:
+            app.request("GET", "/")
+        except (OSError, http.client.HTTPException) as e:
+            app_error = f"{args.app_url} unreachable ({e}); measuring the mock directly only"
+            app = None
+    status, _ = mock.request("POST", "/mock/config", {
+        "latency_ms": args.mock_latency_ms, "tokens_per_sec": args.tokens_per_sec,
+        "completion_tokens": args.completion_tokens, "error_rate": args.error_rate, "jitter_ms": 0,
+    })
+    if status != 200:
+        raise ConnectionError(f"mock server at {args.mock_url} rejected /mock/config ({status})")
+
+    scenarios = []
+    for message_count in args.message_counts:
+        messages = build_messages(message_count, args.message_chars)
+        direct_payload = {"model": "gpt-4o-mini", "max_tokens": 2000,
+                          "messages": [{"role": "system", "content": SYSTEM_PROMPT}] + messages}
+        for concurrency in args.concurrency:
+            scenario = {"messages": message_count, "concurrency": concurrency,
+                        "request_bytes": len(json.dumps({"messages": messages}))}
+            scenario["direct"] = run_load(lambda: mock.request("POST", "/v1/chat/completions", direct_payload),
+                                          args.requests, concurrency)
+            if app:
+                scenario["route"] = run_load(lambda: app.request("POST", "/api/chat", {"messages": messages}),
+                                             args.requests, concurrency)
+                scenario["route_overhead_ms"] = overhead(scenario["route"], scenario["direct"])
+            scenarios.append(scenario)
+    return {"mock_url": args.mock_url, "app_url": args.app_url if app else None, "app_error": app_error,
+            "requests_per_scenario": args.requests,
+            "upstream": {"latency_ms": args.mock_latency_ms, "tokens_per_sec": args.tokens_per_sec,
+                         "completion_tokens": args.completion_tokens, "error_rate": args.error_rate},
+            "scenarios": scenarios}
+
+
+def print_report(report):
+    print("💬 Chat API Benchmark")
+    print("=" * 60)
+    print(f"Upstream mock: {report['mock_url']} {json.dumps(report['upstream'])}")
+    print(f"App route: {report['app_url'] or report['app_error'] or 'not tested (pass --app-url)'}")
+    for scenario in report["scenarios"]:
+        print(f"\n▶ {scenario['messages']} messages ({scenario['request_bytes']:,} B), "
+              f"concurrency {scenario['concurrency']}")
+        for label in ("direct", "route"):
+            result = scenario.get(label)
+            if not result:
+                continue
+            latency = result["latency"] or {}
+            print(f"  {label:<7} p50 {latency.get('p50_ms', '-')}ms  p95 {latency.get('p95_ms', '-')}ms  "
+                  f"p99 {latency.get('p99_ms', '-')}ms  {result['requests_per_sec']} req/s  "
+                  f"failures {result['failures']} {result['failure_statuses'] or ''}")
+        if scenario.get("route_overhead_ms"):
+            cost = scenario["route_overhead_ms"]
+            print(f"  route overhead: p50 +{cost['p50_ms']}ms  p95 +{cost['p95_ms']}ms  p99 +{cost['p99_ms']}ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark /api/chat against a mock OpenAI upstream")
+    parser.add_argument("--mock-url", default="http://127.0.0.1:8787", help="mock_openai_server.py origin")
+    parser.add_argument("--app-url", default="http://localhost:3000",
+                        help="Next.js origin whose OPENAI_BASE_URL points at the mock ('' to skip)")
+    parser.add_argument("--start-mock", action="store_true", help="start the mock in this process")
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario and target")
+    parser.add_argument("--concurrency", type=lambda v: [int(x) for x in v.split(",")], default=[1, 8, 32])
+    parser.add_argument("--message-counts", type=lambda v: [int(x) for x in v.split(",")], default=[1, 20])
+    parser.add_argument("--message-chars", type=int, default=400, help="characters per message")
+    parser.add_argument("--mock-latency-ms", type=float, default=0.0, help="0 isolates route overhead")
+    parser.add_argument("--tokens-per-sec", type=float, default=0.0)
+    parser.add_argument("--completion-tokens", type=int, default=50)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    if args.start_mock:
+        from mock_openai_server import start_in_thread
+        mock_port = urlsplit(args.mock_url).port or 80
+        start_in_thread(port=mock_port)
+
+    report = run_suite(args)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""
+Error Engine Benchmark - Classification throughput of the shared error handler engine
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from error_handler import ERROR_PATTERNS, ErrorType, ErrorHandlerAgent  # noqa: E402
+from diagnose_terminal import create_terminal_agent  # noqa: E402
+from error_knowledge import KnowledgeBase  # noqa: E402
+from source_maps import SourceMapResolver  # noqa: E402
+
+# Messages in the shape the agents actually see, mixing matches and misses
+SAMPLE_MESSAGES = [
+    "ModuleNotFoundError: No module named 'requests'",
+    "SyntaxError: Unexpected token '<' at src/app/page.tsx:12:5",
+    "Error: listen EADDRINUSE: address already in use :::3000",
+    "npm ERR! code ERESOLVE unable to resolve dependency tree",
+    "bash: node: command not found",
+    "TypeError: Cannot read properties of undefined (reading 'map')",
+    "connect ECONNREFUSED 127.0.0.1:3000 connection refused",
+    "EACCES: permission denied, open '/usr/local/lib/node_modules'",
+    "Terminal stream error: TypeError: Invalid state: Controller is already closed",
+    "Warning: Each child in a list should have a unique \"key\" prop.",
+]
+
+
+def load_corpus(log_path, repeat):
+    messages = list(SAMPLE_MESSAGES)
+    if os.path.exists(log_path):
+        with open(log_path, 'r', encoding='utf-8', errors='replace') as f:
+            messages.extend(line.rstrip('\n') for line in f if line.strip())
+    return messages * repeat
+
+
+def legacy_classify(error_message):
+    """The pre-engine classifier: every pattern string re-looked-up per message"""
+    for error_type, patterns in ERROR_PATTERNS.items():
+        for pattern in patterns:
+            if re.search(pattern, error_message, re.IGNORECASE):
+                return error_type
+    return ErrorType.RUNTIME
+
+
+def time_classifier(name, classify, messages):
+    start = time.perf_counter()
+    for message in messages:
+        classify(message)
+    elapsed = time.perf_counter() - start
+    return {
+        "classifier": name,
+        "messages": len(messages),
+        "seconds": round(elapsed, 4),
+        "messages_per_sec": round(len(messages) / elapsed),
+        "us_per_message": round(elapsed / len(messages) * 1e6, 3),
+    }
+
+
+# Incident shapes for the knowledge-base benchmark; {0} and {1} are filled with random identifiers
+INCIDENT_TEMPLATES = [
+    "ModuleNotFoundError: No module named '{0}'",
+    "Module not found: Can't resolve '{0}/{1}' in src/app/{1}",
+    "TypeError: Cannot read properties of undefined (reading '{0}') at {1} (src/components/{1}.tsx:{2}:7)",
+    "ReferenceError: {0} is not defined at src/lib/{1}.ts:{2}:3",
+    "Error: listen EADDRINUSE: address already in use :::{2}",
+    "npm ERR! 404 Not Found - GET https://registry.npmjs.org/{0} - Not found",
+    "SyntaxError: Unexpected token '{0}' in src/app/{1}/page.tsx:{2}:1",
+    "Type error: Property '{0}' does not exist on type '{1}Props'",
+    "Error: ENOENT: no such file or directory, open '/home/dev/{0}/{1}.json'",
+    "Warning: React has detected a change in the order of Hooks called by {0}",
+]
+
+
+# Real-world shapes the regex rules miss, by the type a person would file them under
+UNMATCHED_TEMPLATES = {
+    "dependency": [
+        "Module not found: Can't resolve '{0}' in '/home/dev/app/src/{1}'",
+        "Cannot find module '{0}' imported from /home/dev/app/{1}.mjs",
+        "npm ERR! 404 '{0}@^{2}.0.0' is not in this registry",
+        "ERESOLVE could not resolve peer {0}@{2}.x from {1}@{2}.1.0",
+        "Error: Cannot find package '{0}' imported from {1}",
+    ],
+    "network": [
+        "FetchError: request to https://api.{0}.com/{1} failed, reason: getaddrinfo ENOTFOUND api.{0}.com",
+        "Error: socket hang up at TLSSocket.{1} (node:_tls_wrap:{2}:12)",
+        "read ECONNRESET while streaming from {0}:{2}",
+        "AbortError: The operation was aborted after {2}ms waiting for {0}",
+        "Error: getaddrinfo EAI_AGAIN registry.{0}.org",
+    ],
+    "permission": [
+        "EACCES: open '/usr/local/lib/node_modules/{0}/{1}.js'",
+        "EPERM: operation not permitted, unlink '/home/dev/{0}/{1}'",
+        "403 Forbidden - PUT https://registry.npmjs.org/{0} - You do not have rights to publish",
+        "Operation not permitted: chmod /home/dev/{0}/bin/{1}",
+    ],
+    "syntax": [
+        "Unexpected end of JSON input while parsing '{0}' near '{1}'",
+        "Parsing ecmascript source code failed: Expected '{1}', got '{0}' at src/{0}.tsx:{2}:3",
+        "Expression expected in src/app/{0}/page.tsx:{2}:9",
+        "Unterminated string constant ({2}:14) in {1}.js",
+    ],
+    "compilation": [
+        "Type error: Property '{0}' does not exist on type '{1}Props'",
+        "Type error: Argument of type 'string' is not assignable to parameter of type '{1}'",
+        "TS2304: Cannot find name '{0}' in src/lib/{1}.ts",
+        "Failed to compile ./src/components/{1}.tsx: {0} is exported more than once",
+    ],
+    "runtime": [
+        "TypeError: Cannot read properties of undefined (reading '{0}')",
+        "ReferenceError: {0} is not defined at {1} (src/lib/{1}.ts:{2}:3)",
+        "RangeError: Maximum call stack size exceeded in {0}",
+        "Unhandled Runtime Error: {0}.map is not a function",
+        "Warning: Each child in a list should have a unique key prop. Check the render method of {1}.",
+    ],
+}
+
+
+def synthetic_labeled_errors(size, seed=11):
+    """Labeled messages, and whether each came from the last template of its type (never trained on)"""
+    rng = random.Random(seed)
+    words = [f"{rng.choice('abcdefghijklmnopqrstuvwxyz')}{rng.getrandbits(20):x}" for _ in range(500)]
+    messages, labels, unseen = [], [], []
+    for _ in range(size):
+        label = rng.choice(list(UNMATCHED_TEMPLATES))
+        templates = UNMATCHED_TEMPLATES[label]
+        template = rng.choice(templates)
+        messages.append(template.format(rng.choice(words), rng.choice(words), rng.randint(1, 999)))
+        labels.append(label)
+        unseen.append(template is templates[-1])
+    return messages, labels, unseen
+
+
+def time_fallback_model(size, labeled_path=None):
+    """Train on labeled errors the rules miss, then compare held-out accuracy against the RUNTIME fallback
+
+    Synthetic data holds out 20% of the messages from trained templates plus every message
+    of one template per type, which measures how the model does on error shapes it never saw.
+    """
+    from error_model import FallbackClassifier, accuracy, load_training_data
+
+    if labeled_path:
+        messages, labels = load_training_data(labeled_path)
+        unseen = [False] * len(messages)
+    else:
+        messages, labels, unseen = synthetic_labeled_errors(size)
+    agent = ErrorHandlerAgent()
+    unmatched = [(m, l, u) for m, l, u in zip(messages, labels, unseen) if agent.classifier.classify(m) is None]
+    seen = [(m, l) for m, l, u in unmatched if not u]
+    split = int(len(seen) * 0.8)
+    train, test = seen[:split], seen[split:]
+    test_unseen = [(m, l) for m, l, u in unmatched if u]
+    start = time.perf_counter()
+    model = FallbackClassifier.train([m for m, _ in train], [l for _, l in train])
+    train_seconds = time.perf_counter() - start
+    test_messages, test_labels = [m for m, _ in test], [l for _, l in test]
+
+    start = time.perf_counter()
+    predicted = model.predict(test_messages)
+    batch_seconds = time.perf_counter() - start
+    unseen_result = None
+    if test_unseen:
+        unseen_labels = [l for _, l in test_unseen]
+        unseen_result = {
+            "messages": len(test_unseen),
+            "runtime_fallback_accuracy": round(accuracy([None] * len(test_unseen), unseen_labels), 3),
+            "model_accuracy": round(accuracy(model.predict([m for m, _ in test_unseen]), unseen_labels), 3),
+        }
+    sample = test_messages[:500]
+    start = time.perf_counter()
+    for message in sample:
+        model.predict([message])
+    single_seconds = (time.perf_counter() - start) / len(sample) * len(test_messages)
+    return {
+        "messages": len(messages),
+        "unmatched_by_rules": len(unmatched),
+        "train_messages": len(train),
+        "test_messages": len(test),
+        "train_seconds": round(train_seconds, 2),
+        "runtime_fallback_accuracy": round(accuracy([None] * len(test), test_labels), 3),
+        "model_accuracy": round(accuracy(predicted, test_labels), 3),
+        "unseen_templates": unseen_result,
+        "batch_messages_per_sec": round(len(test) / batch_seconds),
+        "single_messages_per_sec": round(len(test) / single_seconds),
+    }
+
+
+def synthetic_knowledge_base(size, seed=7):
+    rng = random.Random(seed)
+    words = [f"{rng.choice('abcdefghijklmnopqrstuvwxyz')}{rng.getrandbits(24):x}" for _ in range(size // 4 + 100)]
+    knowledge_base = KnowledgeBase(path=None)
+    agent = ErrorHandlerAgent()
+    queries = []
+    for i in range(size):
+        message = rng.choice(INCIDENT_TEMPLATES).format(rng.choice(words), rng.choice(words), rng.randint(1, 9999))
+        context = agent.analyze_error(message)
+        knowledge_base.record_resolution(context, f"fix #{i % 50}")
+        if i % (size // 200 or 1) == 0:
+            # Same error, different line number and port: must find the stored incident
+            queries.append(agent.analyze_error(message.replace("src/", "./src/").replace(":::", ":::1")))
+    return knowledge_base, queries
+
+
+def time_knowledge_base(size):
+    start = time.perf_counter()
+    knowledge_base, queries = synthetic_knowledge_base(size)
+    build = time.perf_counter() - start
+    latencies = []
+    found = 0
+    for query in queries:
+        start = time.perf_counter()
+        nearest = knowledge_base.nearest(query, k=5)
+        latencies.append(time.perf_counter() - start)
+        found += bool(nearest)
+    latencies.sort()
+    return {
+        "incidents": len(knowledge_base),
+        "build_seconds": round(build, 2),
+        "queries": len(queries),
+        "found": found,
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 3),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3),
+    }
+
+
+_BASE64 = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/"
+
+
+def encode_vlq(values):
+    encoded = []
+    for value in values:
+        value = (-value << 1) | 1 if value < 0 else value << 1
+        while True:
+            digit, value = value & 31, value >> 5
+            encoded.append(_BASE64[digit | (32 if value else 0)])
+            if not value:
+                break
+    return "".join(encoded)
+
+
+def synthetic_build(root, segments, seed=5):
+    """A .next server chunk with a source map of about `segments` segments, and frames with known answers"""
+    rng = random.Random(seed)
+    sources = [f"webpack://claude-code-ide/./src/app/route{i}.ts" for i in range(40)]
+    sources.append("webpack://claude-code-ide/./node_modules/next/dist/server/base-server.js")
+    chunk = os.path.join(root, ".next", "server", "chunks", "123.js")
+    os.makedirs(os.path.dirname(chunk))
+    with open(os.path.join(root, ".next", "BUILD_ID"), "w") as f:
+        f.write("synthetic")
+
+    lines, expected = [], []
+    previous = [0, 0, 0]
+    per_line = 200
+    for line in range(segments // per_line + 1):
+        column = previous_column = 0
+        encoded = []
+        for _ in range(per_line):
+            column += rng.randint(1, 40)
+            source, original_line, original_column = rng.randrange(len(sources)), rng.randrange(5000), rng.randrange(120)
+            encoded.append(encode_vlq([column - previous_column, source - previous[0], original_line - previous[1],
+                                       original_column - previous[2]]))
+            previous_column, previous = column, [source, original_line, original_column]
+            if rng.random() < 0.002:
+                expected.append((line + 1, column + 1, sources[source].split("/./", 1)[1], original_line + 1))
+        lines.append(",".join(encoded))
+    with open(chunk, "w") as f:
+        f.write("\n".join("x" * 10 for _ in lines) + "\n//# sourceMappingURL=123.js.map\n")
+    with open(chunk + ".map", "w") as f:
+        json.dump({"version": 3, "sources": sources, "names": [], "mappings": ";".join(lines)}, f)
+    return chunk, expected
+
+
+def time_source_maps(segments):
+    root = tempfile.mkdtemp(prefix="sourcemap-bench-")
+    try:
+        chunk, expected = synthetic_build(root, segments)
+        resolver = SourceMapResolver(root)
+        start = time.perf_counter()
+        source_map = resolver.source_map(chunk)
+        decode = time.perf_counter() - start
+
+        frames = [f"    at handler ({chunk}:{line}:{column})" for line, column, _, _ in expected]
+        stack = "\n".join(frames[:10])
+        start = time.perf_counter()
+        correct = sum(resolver.resolve(chunk, line, column)[:2] == (source, original_line)
+                      for line, column, source, original_line in expected)
+        frame_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        rounds = 200
+        for _ in range(rounds):
+            resolver.resolve_stack(stack)
+        stack_seconds = time.perf_counter() - start
+        return {
+            "segments": source_map.segments,
+            "map_mb": round(os.path.getsize(chunk + ".map") / 1e6, 1),
+            "decode_seconds": round(decode, 3),
+            "frames": len(expected),
+            "correct": correct,
+            "warm_us_per_frame": round(frame_seconds / max(len(expected), 1) * 1e6, 2),
+            "us_per_10_frame_stack": round(stack_seconds / rounds * 1e6, 1),
+            "decodes": resolver.decoded,
+        }
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark error classification throughput")
+    parser.add_argument("--log", default="dev_server.log", help="log file whose lines are added to the corpus")
+    parser.add_argument("--repeat", type=int, default=50, help="times the corpus is repeated")
+    parser.add_argument("--kb-size", type=int, default=0, help="also time nearest-incident search over N incidents")
+    parser.add_argument("--fallback-model", type=int, default=0, metavar="N",
+                        help="also train and score the NumPy fallback model on N labeled errors")
+    parser.add_argument("--labeled", help="JSON lines of labeled errors to use instead of synthetic ones")
+    parser.add_argument("--source-map-segments", type=int, default=0, metavar="N",
+                        help="also time decoding and frame lookup in a synthetic source map of N segments")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    messages = load_corpus(args.log, args.repeat)
+    base_agent = ErrorHandlerAgent()
+    terminal_agent = create_terminal_agent()
+    results = [
+        time_classifier("legacy re.search loop", legacy_classify, messages),
+        time_classifier("engine (built-in rules)", base_agent.classify, messages),
+        time_classifier("engine + terminal rule pack", terminal_agent.classify, messages),
+    ]
+
+    knowledge = time_knowledge_base(args.kb_size) if args.kb_size else None
+    fallback = time_fallback_model(args.fallback_model, args.labeled) if args.fallback_model or args.labeled else None
+    source_maps = time_source_maps(args.source_map_segments) if args.source_map_segments else None
+
+    if args.json:
+        extra = {key: value for key, value in (("knowledge_base", knowledge), ("fallback_model", fallback),
+                                               ("source_maps", source_maps)) if value}
+        print(json.dumps(dict(classifiers=results, **extra) if extra else results, indent=2))
+        return results
+
+    print("⏱️  Error Engine Benchmark")
+    print("=" * 60)
+    print(f"Corpus: {len(messages)} messages")
+    for result in results:
+        print(f"  {result['classifier']:<30} {result['messages_per_sec']:>10,} msg/s  "
+              f"{result['us_per_message']:>8} µs/msg")
+    if knowledge:
+        print(f"\nKnowledge base: {knowledge['incidents']:,} incidents built in {knowledge['build_seconds']}s; "
+              f"{knowledge['found']}/{knowledge['queries']} queries matched, "
+              f"p50 {knowledge['p50_ms']}ms  p99 {knowledge['p99_ms']}ms  max {knowledge['max_ms']}ms")
+    if fallback:
+        print(f"\nFallback model: {fallback['unmatched_by_rules']:,} of {fallback['messages']:,} labeled errors miss "
+              f"every rule; trained on {fallback['train_messages']:,} in {fallback['train_seconds']}s")
+        print(f"  accuracy on {fallback['test_messages']:,} held out: RUNTIME fallback "
+              f"{fallback['runtime_fallback_accuracy']:.1%}, model {fallback['model_accuracy']:.1%}")
+        unseen = fallback["unseen_templates"]
+        if unseen:
+            print(f"  accuracy on {unseen['messages']:,} from never-seen templates: RUNTIME fallback "
+                  f"{unseen['runtime_fallback_accuracy']:.1%}, model {unseen['model_accuracy']:.1%}")
+        print(f"  throughput: batch {fallback['batch_messages_per_sec']:,} msg/s, "
+              f"one at a time {fallback['single_messages_per_sec']:,} msg/s")
+    if source_maps:
+        print(f"\nSource maps: {source_maps['segments']:,} segments ({source_maps['map_mb']} MB) decoded in "
+              f"{source_maps['decode_seconds']}s; {source_maps['correct']}/{source_maps['frames']} frames resolved "
+              f"correctly, {source_maps['warm_us_per_frame']} µs/frame warm, "
+              f"{source_maps['us_per_10_frame_stack']} µs per 10-frame stack ({source_maps['decodes']} decode)")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Startup Benchmark - Time to first output and import cost of each agent script
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+import statistics
+
+# Scripts that run as git hooks and editor save hooks, with the arguments they are launched with
+AGENT_SCRIPTS = {
+    "error-handler-agent.py": [],
+    "diagnose_terminal.py": [],
+    "functional-test-agent.py": [],
+    "analyze_tech_stack.py": [],
+}
+
+STARTUP_BUDGET_MS = 50.0
+
+
+def measure_first_output(script, args, extra_flags=()):
+    """Launch script and return (ms until its first stdout byte, stderr text).
+
+    The process is killed as soon as it produces output; only startup is measured.
+    Returns None for the time if the script exited without printing anything.
+    """
+    env = dict(os.environ, PYTHONUNBUFFERED="1")
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, *extra_flags, script, *args],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE if extra_flags else subprocess.DEVNULL,
+        env=env,
+    )
+    first_byte = proc.stdout.read(1)
+    elapsed_ms = (time.perf_counter() - start) * 1000 if first_byte else None
+    proc.kill()
+    _, stderr = proc.communicate()
+    return elapsed_ms, (stderr or b"").decode("utf-8", errors="replace")
+
+
+def parse_importtime(stderr, top=8):
+    """Return the most expensive top-level imports from `python -X importtime` output"""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        # Nested imports are indented; their cost is already in the parent's cumulative time
+        if name.startswith("  "):
+            continue
+        imports.append({"module": name.strip(), "self_us": int(self_us), "cumulative_us": int(cumulative_us)})
+    imports.sort(key=lambda entry: entry["cumulative_us"], reverse=True)
+    return imports[:top]
+
+
+def benchmark_script(script, args, runs):
+    timings = [measure_first_output(script, args)[0] for _ in range(runs)]
+    _, importtime_stderr = measure_first_output(script, args, extra_flags=("-X", "importtime"))
+    if None in timings:
+        return {
+            "script": script,
+            "runs": runs,
+            "error": "exited without output",
+            "within_budget": False,
+            "stderr_tail": importtime_stderr.splitlines()[-1:],
+        }
+    return {
+        "script": script,
+        "runs": runs,
+        "median_ms": round(statistics.median(timings), 2),
+        "min_ms": round(min(timings), 2),
+        "max_ms": round(max(timings), 2),
+        "budget_ms": STARTUP_BUDGET_MS,
+        "within_budget": statistics.median(timings) <= STARTUP_BUDGET_MS,
+        "top_imports": parse_importtime(importtime_stderr),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark agent script startup time")
+    parser.add_argument("scripts", nargs="*", help="scripts to benchmark (default: all agents)")
+    parser.add_argument("--runs", type=int, default=10, help="launches per script")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    # Interpreter startup alone is the floor every script pays
+    baseline = statistics.median(
+        measure_first_output("-c", ["print()"])[0] for _ in range(args.runs)
+    )
+    results = [benchmark_script(script, AGENT_SCRIPTS.get(script, []), args.runs)
+               for script in (args.scripts or AGENT_SCRIPTS)]
+
+    if args.json:
+        print(json.dumps({"interpreter_baseline_ms": round(baseline, 2), "results": results}, indent=2))
+    else:
+        print("⏱️  Agent Startup Benchmark (time to first output)")
+        print("=" * 60)
+        print(f"Interpreter baseline: {baseline:.1f}ms")
+        for result in results:
+            if "error" in result:
+                print(f"\n❌ {result['script']}: {result['error']} {result['stderr_tail']}")
+                continue
+            status = "✅" if result["within_budget"] else "❌"
+            print(f"\n{status} {result['script']}: median {result['median_ms']}ms "
+                  f"(min {result['min_ms']}ms, max {result['max_ms']}ms, budget {result['budget_ms']:.0f}ms)")
+            for entry in result["top_imports"]:
+                print(f"    {entry['cumulative_us'] / 1000:7.2f}ms  {entry['module']}")
+
+    return 0 if all(result["within_budget"] for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
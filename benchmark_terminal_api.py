@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Terminal API Benchmark - Load harness for /api/terminal (SSE output stream + POST input)
+
+Opens many concurrent terminal sessions with distinct sessionIds and measures
+time-to-first-byte of the SSE stream, keystroke echo round-trip latency, output
+throughput, and memory growth of the Next.js server process as sessions open and close.
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import asyncio
+import argparse
+import statistics
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from procfs import find_listening_pid, read_rss_kb  # noqa: E402
+from perf_stats import percentiles  # noqa: E402
+
+
+def parse_status(status_line, request):
+    """Status code of an HTTP status line; a dropped connection leaves it empty"""
+    fields = status_line.split()
+    if len(fields) < 2 or not fields[1].isdigit():
+        raise ConnectionError(f"{request}: connection closed before a response"
+                              if not status_line else f"{request}: malformed status line {status_line[:80]!r}")
+    return int(fields[1])
+
+
+class SSEStream:
+    """Minimal HTTP/1.1 client for one text/event-stream response (chunked or not)"""
+
+    def __init__(self, reader, writer, chunked):
+        self.reader = reader
+        self.writer = writer
+        self.chunked = chunked
+        self.buffer = b""
+        self.bytes_received = 0
+
+    @classmethod
+    async def open(cls, host, port, path, payload=None):
+        """GET path, or POST payload as JSON when given (e.g. a streamed /api/chat request)"""
+        reader, writer = await asyncio.open_connection(host, port)
+        if payload is None:
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\nAccept: text/event-stream\r\n\r\n".encode())
+        else:
+            body = json.dumps(payload).encode()
+            writer.write(
+                f"POST {path} HTTP/1.1\r\nHost: {host}:{port}\r\nAccept: text/event-stream\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body
+            )
+        await writer.drain()
+        status_line = await reader.readline()
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip().lower()
+        request = f"{'POST' if payload is not None else 'GET'} {path}"
+        try:
+            status = parse_status(status_line, request)
+        except ConnectionError:
+            writer.close()
+            raise
+        if status != 200:
+            writer.close()
+            raise ConnectionError(f"{request} returned {status}")
+        return cls(reader, writer, headers.get("transfer-encoding") == "chunked")
+
+    async def _read_body(self):
+        if not self.chunked:
+            data = await self.reader.read(65536)
+        else:
+            size_line = await self.reader.readline()
+            size = int(size_line.split(b";")[0].strip() or b"0", 16)
+            try:
+                data = await self.reader.readexactly(size) if size else b""
+            except asyncio.IncompleteReadError:
+                raise ConnectionError("terminal stream closed by server mid-chunk") from None
+            await self.reader.readline()
+        if not data:
+            raise ConnectionError("terminal stream closed by server")
+        self.bytes_received += len(data)
+        return data
+
+    async def events(self):
+        """Yield decoded JSON payloads of `data:` events; keep-alive comments are skipped"""
+        while True:
+            while b"\n\n" not in self.buffer:
+                self.buffer += await self._read_body()
+            raw, self.buffer = self.buffer.split(b"\n\n", 1)
+            for line in raw.split(b"\n"):
+                if line.startswith(b"data: "):
+                    yield json.loads(line[6:])
+
+    def close(self):
+        self.writer.close()
+
+
+async def post_json(host, port, path, payload):
+    reader, writer = await asyncio.open_connection(host, port)
+    body = json.dumps(payload).encode()
+    writer.write(
+        f"POST {path} HTTP/1.1\r\nHost: {host}:{port}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+    )
+    await writer.drain()
+    try:
+        status_line = await reader.readline()
+        await reader.read()
+    finally:
+        writer.close()
+    return parse_status(status_line, f"POST {path}")
+
+
+class TerminalSession:
+    """One sessionId: a background reader collects output and wakes marker waiters"""
+
+    def __init__(self, host, port, session_id):
+        self.host = host
+        self.port = port
+        self.session_id = session_id
+        self.output = ""
+        self.stream = None
+        self.reader_task = None
+        self.waiters = []
+        self.ttfb = None
+
+    async def open(self):
+        start = time.perf_counter()
+        self.stream = await SSEStream.open(self.host, self.port, f"/api/terminal?sessionId={self.session_id}")
+        events = self.stream.events()
+        await events.__anext__()  # the 'connected' event
+        self.ttfb = time.perf_counter() - start
+        self.reader_task = asyncio.create_task(self._read(events))
+
+    async def _read(self, events):
+        async for event in events:
+            if event.get("type") != "output":
+                continue
+            self.output += event["data"]
+            for marker, done in list(self.waiters):
+                if marker in self.output:
+                    done.set()
+                    self.waiters.remove((marker, done))
+            # Only the tail can still contain a marker that has not arrived yet
+            self.output = self.output[-4096:]
+
+    async def send(self, text):
+        status = await post_json(self.host, self.port, "/api/terminal",
+                                 {"sessionId": self.session_id, "input": text})
+        if status != 200:
+            raise ConnectionError(f"POST /api/terminal returned {status}")
+
+    async def send_and_wait(self, text, marker, timeout):
+        done = asyncio.Event()
+        self.waiters.append((marker, done))
+        start = time.perf_counter()
+        await self.send(text)
+        await asyncio.wait_for(done.wait(), timeout)
+        return time.perf_counter() - start
+
+    async def close(self, exit_shell):
+        if exit_shell:
+            try:
+                await self.send("exit\r")
+            except (ConnectionError, OSError):
+                pass
+        if self.reader_task:
+            self.reader_task.cancel()
+        if self.stream:
+            self.stream.close()
+
+
+async def exercise_session(session, args, results):
+    try:
+        await session.open()
+        results["ttfb"].append(session.ttfb)
+        for i in range(args.echo_samples):
+            marker = f"m{uuid.uuid4().hex[:10]}"
+            # The pty echoes typed characters, so the marker coming back is the keystroke round-trip
+            results["echo"].append(await session.send_and_wait(marker, marker, args.timeout))
+            await session.send("\x15")  # Ctrl+U clears the typed line
+        if args.output_lines:
+            tag = uuid.uuid4().hex[:10]
+            # Quoting splits the marker in the echoed command so only the real output matches it
+            command = f"yes terminal-benchmark-output | head -n {args.output_lines}; echo done_''{tag}\r"
+            bytes_before = session.stream.bytes_received
+            elapsed = await session.send_and_wait(command, f"done_{tag}", args.timeout)
+            results["throughput"].append((session.stream.bytes_received - bytes_before) / elapsed)
+    except asyncio.TimeoutError:
+        results["stalls"] += 1
+    except (ConnectionError, OSError) as e:
+        results["errors"].append(f"{session.session_id}: {e}")
+
+
+async def run_benchmark(args):
+    parts = urlsplit(args.base_url)
+    host, port = parts.hostname, parts.port or 80
+    pid = args.server_pid or find_listening_pid(port)
+    results = {"ttfb": [], "echo": [], "throughput": [], "stalls": 0, "errors": [], "memory": []}
+
+    def sample_memory(phase):
+        if pid:
+            results["memory"].append({"phase": phase, "rss_kb": read_rss_kb(pid), "t": time.time()})
+
+    sample_memory("baseline")
+    for round_index in range(args.rounds):
+        run_id = uuid.uuid4().hex[:6]
+        sessions = [TerminalSession(host, port, f"bench-{run_id}-{i}") for i in range(args.sessions)]
+        start = time.perf_counter()
+        await asyncio.gather(*(exercise_session(s, args, results) for s in sessions))
+        sample_memory(f"round {round_index + 1} open")
+        await asyncio.gather(*(s.close(args.exit_shells) for s in sessions))
+        await asyncio.sleep(args.settle)
+        sample_memory(f"round {round_index + 1} closed")
+        results.setdefault("round_seconds", []).append(round(time.perf_counter() - start, 3))
+
+    throughput = results["throughput"]
+    memory = results["memory"]
+    return {
+        "base_url": args.base_url,
+        "server_pid": pid,
+        "sessions_per_round": args.sessions,
+        "rounds": args.rounds,
+        "round_seconds": results.get("round_seconds", []),
+        "time_to_first_byte": percentiles(results["ttfb"]),
+        "echo_round_trip": percentiles(results["echo"]),
+        "output_bytes_per_sec": {
+            "count": len(throughput),
+            "median": round(statistics.median(throughput)) if throughput else None,
+            "min": round(min(throughput)) if throughput else None,
+        },
+        "stalls": results["stalls"],
+        "errors": results["errors"][:20],
+        "error_count": len(results["errors"]),
+        "memory": memory,
+        "rss_growth_kb": (memory[-1]["rss_kb"] - memory[0]["rss_kb"])
+                         if len(memory) > 1 and memory[0]["rss_kb"] and memory[-1]["rss_kb"] else None,
+    }
+
+
+def print_report(report):
+    print("🖥️  Terminal API Benchmark")
+    print("=" * 60)
+    print(f"Server: {report['base_url']} (pid {report['server_pid'] or 'unknown'})")
+    print(f"Sessions: {report['sessions_per_round']} x {report['rounds']} rounds")
+    for label, key in (("Time to first byte", "time_to_first_byte"), ("Echo round-trip", "echo_round_trip")):
+        stats = report[key]
+        if stats:
+            print(f"  {label}: p50 {stats['p50_ms']}ms  p95 {stats['p95_ms']}ms  "
+                  f"p99 {stats['p99_ms']}ms  max {stats['max_ms']}ms  (n={stats['count']})")
+    throughput = report["output_bytes_per_sec"]
+    if throughput["count"]:
+        print(f"  Output throughput: median {throughput['median']:,} B/s  min {throughput['min']:,} B/s")
+    print(f"  Stalls (timed out waiting for output): {report['stalls']}")
+    print(f"  Errors: {report['error_count']}")
+    for error in report["errors"][:5]:
+        print(f"    • {error}")
+    if report["memory"]:
+        print("  Server RSS:")
+        for sample in report["memory"]:
+            print(f"    {sample['phase']:<20} {sample['rss_kb'] or 0:>10,} kB")
+        if report["rss_growth_kb"] is not None:
+            print(f"  RSS growth: {report['rss_growth_kb']:+,} kB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark /api/terminal under concurrent sessions")
+    parser.add_argument("--base-url", default="http://localhost:3000")
+    parser.add_argument("--sessions", type=int, default=20, help="concurrent sessions per round")
+    parser.add_argument("--rounds", type=int, default=3, help="open/close rounds (shows memory growth)")
+    parser.add_argument("--echo-samples", type=int, default=10, help="echo round-trips per session")
+    parser.add_argument("--output-lines", type=int, default=20000, help="lines of output per session (0 to skip)")
+    parser.add_argument("--timeout", type=float, default=10.0, help="seconds before a wait counts as a stall")
+    parser.add_argument("--settle", type=float, default=2.0, help="seconds to wait after closing before sampling RSS")
+    parser.add_argument("--exit-shells", action="store_true",
+                        help="send 'exit' before closing (default abandons shells like a closed tab)")
+    parser.add_argument("--server-pid", type=int, help="node process to sample (default: owner of the port)")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run_benchmark(args))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    return 0 if not report["error_count"] and not report["stalls"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
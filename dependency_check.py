@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Dependency check - Verify node_modules against package-lock.json, package by package
+
+The lockfile names every installed path and the version it must hold. Each one is
+checked with a stat of node_modules/<path>/package.json and, only when that file is
+new or changed, a read of its "version". Stats and reads run on a thread pool (they
+release the GIL), so thousands of packages take a fraction of a second.
+
+The parsed lockfile and the stat stamp and version of every installed package.json
+are cached in .agent-cache/dependency_manifest.json under the hash of the lockfile and
+package.json. A repeat check with both unchanged skips the JSON parse and, for packages whose
+package.json did not change, every read.
+
+    python3 dependency_check.py
+    python3 dependency_check.py --production --json
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import platform
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from result_sink import write_json_atomic
+
+DEFAULT_MANIFEST_CACHE = os.path.join(".agent-cache", "dependency_manifest.json")
+MANIFEST_VERSION = 1
+MAX_WORKERS = 32
+# Packages per thread-pool task; one future per package costs more than its stat
+BATCH_SIZE = 256
+MAX_LISTED = 50
+
+# Node's names for this machine, for skipping optional packages built for other platforms
+NODE_OS = {"win32": "win32", "cygwin": "win32", "darwin": "darwin"}.get(sys.platform, sys.platform)
+NODE_CPU = {"x86_64": "x64", "amd64": "x64", "aarch64": "arm64", "arm64": "arm64", "i386": "ia32",
+            "i686": "ia32", "armv7l": "arm"}.get(platform.machine().lower(), platform.machine().lower())
+
+
+class LockedPackage(NamedTuple):
+    path: str  # node_modules/a/node_modules/@scope/b
+    version: str
+    dev: bool
+    optional: bool
+    installable: bool  # False for optional packages built for another os or cpu
+
+
+class DependencyReport(NamedTuple):
+    checked: int
+    missing: List[str]
+    mismatched: List[Tuple[str, str, str]]  # (path, locked version, installed version)
+    skipped_optional: int
+    out_of_sync: List[str]  # package.json dependencies the lockfile does not record
+    manifest_cached: bool
+    reads: int
+    seconds: float
+
+    @property
+    def ok(self) -> bool:
+        return not (self.missing or self.mismatched or self.out_of_sync)
+
+    def to_dict(self) -> Dict:
+        return {
+            "checked": self.checked,
+            "missing": self.missing[:MAX_LISTED],
+            "missing_count": len(self.missing),
+            "mismatched": [{"package": package_name(path), "path": path, "locked": locked, "installed": installed}
+                           for path, locked, installed in self.mismatched[:MAX_LISTED]],
+            "mismatched_count": len(self.mismatched),
+            "skipped_optional": self.skipped_optional,
+            "out_of_sync": self.out_of_sync,
+            "manifest_cached": self.manifest_cached,
+            "package_json_reads": self.reads,
+            "seconds": round(self.seconds, 3),
+        }
+
+
+def package_name(path: str) -> str:
+    """node_modules/a/node_modules/@scope/b -> @scope/b"""
+    return path.rsplit("node_modules/", 1)[-1]
+
+
+def _platform_matches(allowed: Optional[List[str]], current: str) -> bool:
+    if not allowed:
+        return True
+    if any(value.startswith("!") for value in allowed):
+        return ("!" + current) not in allowed
+    return current in allowed
+
+
+def locked_packages(lock: Dict) -> List[LockedPackage]:
+    """Installed paths and versions from a lockfile; v2/v3 "packages" or v1 nested "dependencies" """
+    packages = []
+    if "packages" in lock:
+        for path, entry in lock["packages"].items():
+            # "" is the project itself; links point at workspace folders, not installs
+            if not path or entry.get("link") or "version" not in entry:
+                continue
+            installable = (_platform_matches(entry.get("os"), NODE_OS)
+                           and _platform_matches(entry.get("cpu"), NODE_CPU))
+            packages.append(LockedPackage(path, entry["version"], bool(entry.get("dev")), bool(entry.get("optional")),
+                                          installable))
+        return packages
+
+    pending = [("node_modules/", lock.get("dependencies", {}))]
+    while pending:
+        prefix, dependencies = pending.pop()
+        for name, entry in dependencies.items():
+            path = prefix + name
+            if "version" in entry and not entry["version"].startswith("file:"):
+                packages.append(LockedPackage(path, entry["version"], bool(entry.get("dev")),
+                                              bool(entry.get("optional")), True))
+            if entry.get("dependencies"):
+                pending.append((path + "/node_modules/", entry["dependencies"]))
+    return packages
+
+
+def _out_of_sync(package_json: Dict, lock: Dict) -> List[str]:
+    """Dependencies package.json declares that the lockfile's root entry does not"""
+    root = lock.get("packages", {}).get("")
+    if root is None:
+        return []
+    locked = {}
+    for field in ("dependencies", "devDependencies", "optionalDependencies"):
+        locked.update(root.get(field, {}))
+    declared = {}
+    for field in ("dependencies", "devDependencies", "optionalDependencies"):
+        declared.update(package_json.get(field, {}))
+    return sorted(f"{name}@{spec}" for name, spec in declared.items() if locked.get(name) != spec)
+
+
+def _load_manifest(path: Optional[str], lock_hash: str) -> Optional[Dict]:
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("version") != MANIFEST_VERSION or manifest.get("lock_hash") != lock_hash:
+        return None
+    return manifest
+
+
+def _installed(task):
+    """(stamp, version) of one package.json; reads it only if its stamp is not the cached one"""
+    package_json, cached = task
+    try:
+        stat = os.stat(package_json)
+    except OSError:
+        return None, None, False
+    stamp = [stat.st_mtime_ns, stat.st_size]
+    if cached is not None and cached[:2] == stamp:
+        return stamp, cached[2], False
+    try:
+        with open(package_json, "rb") as f:
+            version = json.loads(f.read()).get("version", "")
+    except (OSError, ValueError):
+        version = ""
+    return stamp, version, True
+
+
+def _installed_batch(tasks):
+    return [_installed(task) for task in tasks]
+
+
+def check_dependencies(root: str = ".", manifest_path: Optional[str] = DEFAULT_MANIFEST_CACHE,
+                       include_dev: bool = True, workers: int = MAX_WORKERS) -> DependencyReport:
+    """Compare every lockfile entry with what is installed under root/node_modules
+
+    Raises OSError if package-lock.json is missing and ValueError if it is not JSON.
+    """
+    start = time.perf_counter()
+    with open(os.path.join(root, "package-lock.json"), "rb") as f:
+        lock_bytes = f.read()
+    try:
+        with open(os.path.join(root, "package.json"), "rb") as f:
+            package_bytes = f.read()
+    except OSError:
+        package_bytes = b""
+    # package.json is part of the key: out_of_sync is derived from it
+    lock_hash = hashlib.blake2b(lock_bytes + b"\0" + package_bytes, digest_size=16).hexdigest()
+    manifest = _load_manifest(manifest_path and os.path.join(root, manifest_path), lock_hash)
+    manifest_cached = manifest is not None
+
+    if manifest is None:
+        lock = json.loads(lock_bytes)
+        try:
+            out_of_sync = _out_of_sync(json.loads(package_bytes), lock) if package_bytes else []
+        except ValueError:
+            out_of_sync = []
+        manifest = {"version": MANIFEST_VERSION, "lock_hash": lock_hash, "out_of_sync": out_of_sync,
+                    "packages": [list(package) for package in locked_packages(lock)], "installed": {}}
+    packages = [LockedPackage(*entry) for entry in manifest["packages"]]
+
+    # npm never installs packages built for another platform
+    skipped = sum(1 for package in packages if not package.installable)
+    wanted = [package for package in packages if package.installable and (include_dev or not package.dev)]
+    installed = manifest["installed"]
+    tasks = [(os.path.join(root, package.path, "package.json"), installed.get(package.path)) for package in wanted]
+    batches = [tasks[i:i + BATCH_SIZE] for i in range(0, len(tasks), BATCH_SIZE)]
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(batches)))) as pool:
+        results = [result for batch in pool.map(_installed_batch, batches) for result in batch]
+
+    missing, mismatched, reads = [], [], 0
+    for package, (stamp, version, was_read) in zip(wanted, results):
+        reads += was_read
+        if stamp is None:
+            installed.pop(package.path, None)
+            if not package.optional:
+                missing.append(package_name(package.path) if package.path.count("node_modules/") == 1
+                               else package.path)
+            else:
+                skipped += 1
+            continue
+        installed[package.path] = stamp + [version]
+        if version != package.version:
+            mismatched.append((package.path, package.version, version))
+
+    if manifest_path and (reads or not manifest_cached):
+        cache_path = os.path.join(root, manifest_path)
+        os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+        write_json_atomic(cache_path, manifest, separators=(",", ":"))
+    return DependencyReport(len(wanted), missing, mismatched, skipped, manifest["out_of_sync"], manifest_cached,
+                            reads, time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check installed node_modules against package-lock.json")
+    parser.add_argument("--root", default=".", help="project directory")
+    parser.add_argument("--production", action="store_true", help="ignore devDependencies")
+    parser.add_argument("--no-cache", action="store_true", help="neither read nor write the manifest cache")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        report = check_dependencies(args.root, None if args.no_cache else DEFAULT_MANIFEST_CACHE,
+                                    include_dev=not args.production)
+    except (OSError, ValueError) as e:
+        print(f"❌ Cannot read package-lock.json: {e}", file=sys.stderr)
+        sys.exit(2)
+    if args.json:
+        print(json.dumps(report.to_dict(), indent=2))
+    else:
+        print(f"📦 {report.checked} locked packages checked in {report.seconds * 1000:.0f}ms "
+              f"({'cached' if report.manifest_cached else 'parsed'} lockfile, {report.reads} package.json reads)")
+        for name in report.missing[:MAX_LISTED]:
+            print(f"  ❌ missing    {name}")
+        for path, locked, installed in report.mismatched[:MAX_LISTED]:
+            print(f"  ⚠️  mismatched {package_name(path)}: locked {locked}, installed {installed or '?'}")
+        for spec in report.out_of_sync:
+            print(f"  ⚠️  package.json declares {spec}, package-lock.json does not; run 'npm install'")
+        if report.ok:
+            print("✅ node_modules matches package-lock.json")
+    if not report.ok:
+        sys.exit(1)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -3,103 +3,111 @@
 Terminal Diagnostics Script using Error Handler Agent
 """
 
+import os
 import sys
+import time
 import subprocess
 import json
-sys.path.append('.')
-
-class ErrorType:
-    COMPILATION = "compilation"
-    RUNTIME = "runtime"
-    DEPENDENCY = "dependency"
-    SYNTAX = "syntax"
-    NETWORK = "network"
-    PERMISSION = "permission"
-    CONFIGURATION = "configuration"
-
-class ErrorContext:
-    def __init__(self, error_message, error_type, file_path=None, line_number=None, 
-                 stack_trace=None, language=None, framework=None):
-        self.error_message = error_message
-        self.error_type = error_type
-        self.file_path = file_path
-        self.line_number = line_number
-        self.stack_trace = stack_trace
-        self.language = language
-        self.framework = framework
-
-# Simplified Error Handler for this specific use case
-class ErrorHandlerAgent:
-    def __init__(self):
-        self.solutions = {
-            "node": [
-                "Install Node.js from https://nodejs.org",
-                "Check if Node.js is in your PATH: echo $PATH",
-                "Restart terminal after installation",
-                "Try using nvm to manage Node.js versions"
-            ],
-            "npm": [
-                "Node.js installation includes npm",
-                "Reinstall Node.js if npm is missing",
-                "Check npm permissions: npm config get prefix",
-                "Clear npm cache: npm cache clean --force"
-            ],
-            "port": [
-                "Kill process using the port: lsof -ti:3000 | xargs kill -9",
-                "Use a different port: npm run dev -- -p 3001",
-                "Check for other services using the port",
-                "Restart your computer to clear all processes"
-            ],
-            "permission": [
-                "Fix npm permissions: sudo chown -R $(whoami) ~/.npm",
-                "Use npx instead of global npm installs",
-                "Check file permissions: ls -la",
-                "Run with sudo if absolutely necessary (not recommended)"
-            ],
-            "dependency": [
-                "Delete node_modules: rm -rf node_modules",
-                "Clear npm cache: npm cache clean --force", 
-                "Reinstall: npm install",
-                "Check package.json for correct scripts"
-            ]
-        }
-    
-    def analyze_error(self, error_message, context=None):
-        error_type = self._classify_error(error_message)
-        return ErrorContext(error_message, error_type)
-    
-    def _classify_error(self, error_message):
-        if "command not found" in error_message.lower() or "not found" in error_message.lower():
-            return "dependency"
-        elif "permission denied" in error_message.lower():
-            return "permission" 
-        elif "port" in error_message.lower() or "EADDRINUSE" in error_message:
-            return "port"
-        elif "npm" in error_message.lower():
-            return "npm"
-        elif "node" in error_message.lower():
-            return "node"
-        else:
-            return "configuration"
-    
-    def generate_report(self, context):
-        error_type = context.error_type
-        solutions = self.solutions.get(error_type, ["Check error message and search for solutions online"])
-        
-        return {
-            "error_analysis": {
-                "type": error_type,
-                "message": context.error_message,
-                "location": {"file": context.file_path, "line": context.line_number},
-                "context": {"language": context.language, "framework": context.framework}
-            },
-            "suggested_solutions": solutions,
-            "next_steps": [
-                "Apply suggested solutions in order",
-                "Test each solution",
-                "Document what works for future reference"
-            ]
-        }
+import argparse
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from error_handler import ErrorType, RulePack, ErrorHandlerAgent  # noqa: E402
+import procfs  # noqa: E402
+
+# Terminal setup categories, checked in order before the engine's built-in patterns
+TERMINAL_RULE_PACK = RulePack(
+    name="terminal",
+    patterns={
+        "dependency": [r"not found"],
+        "permission": [r"permission denied"],
+        "port": [r"port", r"EADDRINUSE"],
+        "npm": [r"npm"],
+        "node": [r"node"],
+    },
+    error_types={
+        "dependency": ErrorType.DEPENDENCY,
+        "permission": ErrorType.PERMISSION,
+        "port": ErrorType.CONFIGURATION,
+        "npm": ErrorType.DEPENDENCY,
+        "node": ErrorType.DEPENDENCY,
+        "configuration": ErrorType.CONFIGURATION,
+    },
+    solutions={
+        "node": [
+            "Install Node.js from https://nodejs.org",
+            "Check if Node.js is in your PATH: echo $PATH",
+            "Restart terminal after installation",
+            "Try using nvm to manage Node.js versions"
+        ],
+        "npm": [
+            "Node.js installation includes npm",
+            "Reinstall Node.js if npm is missing",
+            "Check npm permissions: npm config get prefix",
+            "Clear npm cache: npm cache clean --force"
+        ],
+        "port": [
+            "Kill process using the port: lsof -ti:3000 | xargs kill -9",
+            "Use a different port: npm run dev -- -p 3001",
+            "Check for other services using the port",
+            "Restart your computer to clear all processes"
+        ],
+        "permission": [
+            "Fix npm permissions: sudo chown -R $(whoami) ~/.npm",
+            "Use npx instead of global npm installs",
+            "Check file permissions: ls -la",
+            "Run with sudo if absolutely necessary (not recommended)"
+        ],
+        "dependency": [
+            "Delete node_modules: rm -rf node_modules",
+            "Clear npm cache: npm cache clean --force", 
+            "Reinstall: npm install",
+            "Check package.json for correct scripts"
+        ],
+        "configuration": ["Check error message and search for solutions online"]
+    },
+    default_category="configuration",
+)
+
+# Profiler findings are phrased as messages so the engine classifies them like any other error
+PROFILER_RULE_PACK = RulePack(
+    name="profiler",
+    patterns={
+        "cpu_hotspot": [r"CPU hotspot"],
+        "package_hotspot": [r"Package hotspot"],
+        "gc_pressure": [r"GC pressure"],
+        "heap_retainer": [r"Heap retainer"],
+    },
+    error_types={
+        "cpu_hotspot": ErrorType.RUNTIME,
+        "package_hotspot": ErrorType.RUNTIME,
+        "gc_pressure": ErrorType.RUNTIME,
+        "heap_retainer": ErrorType.RUNTIME,
+    },
+    solutions={
+        "cpu_hotspot": [
+            "Open the saved .cpuprofile in Chrome DevTools (Performance tab) to see the callers",
+            "Memoize or cache the result if the function is called with the same inputs",
+            "Move the work off the request path (build time, background job, or a worker thread)"
+        ],
+        "package_hotspot": [
+            "If it is the bundler (webpack, next, @swc), try Turbopack: npm run dev -- --turbopack",
+            "Import from package subpaths instead of barrel files, or list them in experimental.optimizePackageImports",
+            "Check for a file watcher or HMR loop recompiling on every change (see dev_server.log)"
+        ],
+        "gc_pressure": [
+            "Look for per-request allocations of large buffers or strings",
+            "Raise the heap limit to confirm: NODE_OPTIONS=--max-old-space-size=4096 npm run dev",
+            "Compare two heap snapshots a few minutes apart to find what keeps growing"
+        ],
+        "heap_retainer": [
+            "Check module-level Maps and caches for entries that are never removed",
+            "Make sure closed terminal sessions and their listeners are cleaned up (diagnose_terminal.py leaks)",
+            "Bound caches by size or age instead of keeping every entry"
+        ],
+    },
+)
+
+def create_terminal_agent():
+    return ErrorHandlerAgent(rule_packs=(TERMINAL_RULE_PACK,))
 
 def get_terminal_info():
     """Collect terminal and system information"""
@@ -159,11 +167,227 @@ def check_common_terminal_issues():
     
     return issues
 
-def main():
+def collect_diagnostics(agent=None):
+    """Run all terminal checks and return system info, issues and per-issue reports"""
+    agent = agent or create_terminal_agent()
+    info = get_terminal_info()
+    issues = check_common_terminal_issues()
+    reports = [agent.generate_report(agent.analyze_error(issue, {"system_info": info})) for issue in issues]
+    return {"system_info": info, "issues": issues, "reports": reports}
+
+def snapshot_terminal_sessions(server_pid, port):
+    """Count pty shells under the server and compare them with its open connections.
+
+    node-pty shells are direct children of a node process, so shells whose parent
+    is another shell (subshells, pipelines) are counted as part of their session.
+    Open connections include HMR websockets and in-flight requests as well as SSE
+    streams, so the leaked count is a lower bound.
+    """
+    processes = procfs.list_processes()
+    tree = procfs.descendants(server_pid, processes)
+    shells = []
+    for proc in tree:
+        parent = processes.get(proc["ppid"], {})
+        if proc["comm"] not in procfs.SHELL_NAMES or parent.get("comm") in procfs.SHELL_NAMES:
+            continue
+        session_tree = [proc] + procfs.descendants(proc["pid"], processes)
+        shells.append({
+            "pid": proc["pid"],
+            "shell": proc["comm"],
+            "age_seconds": round(procfs.process_age_seconds(proc), 1),
+            "rss_kb": procfs.read_rss_kb(proc["pid"]) or 0,
+            "session_rss_kb": sum(procfs.read_rss_kb(p["pid"]) or 0 for p in session_tree),
+            "session_processes": len(session_tree),
+        })
+    shells.sort(key=lambda shell: shell["age_seconds"], reverse=True)
+
+    connections = procfs.count_established(port, server_pid)
+    leaked = max(0, len(shells) - connections)
+    # Abandoned tabs are the oldest sessions, so the excess is attributed to them
+    for index, shell in enumerate(shells):
+        shell["likely_leaked"] = index < leaked
+    return {
+        "timestamp": time.time(),
+        "server_pid": server_pid,
+        "server_rss_kb": procfs.read_rss_kb(server_pid),
+        "shells": len(shells),
+        "open_connections": connections,
+        "leaked": leaked,
+        "sessions": shells,
+    }
+
+def run_leak_check(port, server_pid=None, soak_seconds=0, interval=10.0, json_output=False):
+    """Sample pty shells vs connections once, or repeatedly over a soak run"""
+    server_pid = server_pid or procfs.find_listening_pid(port)
+    if server_pid is None:
+        print(f"❌ No process is listening on port {port}; start the dev server or pass --pid")
+        return None
+
+    if not json_output:
+        print("🔍 Terminal Session Leak Check")
+        print("=" * 50)
+        print(f"Server pid {server_pid} on port {port}")
+        print(f"\n{'elapsed':>8} {'shells':>7} {'conns':>6} {'leaked':>7} {'server RSS':>12}")
+
+    samples = []
+    start = time.time()
+    while True:
+        snapshot = snapshot_terminal_sessions(server_pid, port)
+        samples.append({k: v for k, v in snapshot.items() if k != "sessions"})
+        if not json_output:
+            print(f"{time.time() - start:>7.0f}s {snapshot['shells']:>7} {snapshot['open_connections']:>6} "
+                  f"{snapshot['leaked']:>7} {snapshot['server_rss_kb'] or 0:>9,} kB", flush=True)
+        if time.time() - start + interval > soak_seconds:
+            break
+        time.sleep(interval)
+
+    first, last = samples[0], samples[-1]
+    hours = max(last["timestamp"] - first["timestamp"], 1e-9) / 3600
+    report = {
+        "port": port,
+        "server_pid": server_pid,
+        "samples": samples,
+        "growth": {
+            "shells": last["shells"] - first["shells"],
+            "leaked": last["leaked"] - first["leaked"],
+            "server_rss_kb": (last["server_rss_kb"] or 0) - (first["server_rss_kb"] or 0),
+            "leaked_per_hour": round((last["leaked"] - first["leaked"]) / hours, 2) if len(samples) > 1 else None,
+        },
+        "leaked_sessions": [shell for shell in snapshot["sessions"] if shell["likely_leaked"]],
+        "sessions": snapshot["sessions"],
+    }
+
+    if json_output:
+        print(json.dumps(report, indent=2))
+        return report
+
+    if len(samples) > 1:
+        growth = report["growth"]
+        print(f"\n📈 Growth over {last['timestamp'] - first['timestamp']:.0f}s: "
+              f"shells {growth['shells']:+}, leaked {growth['leaked']:+} "
+              f"({growth['leaked_per_hour']}/h), server RSS {growth['server_rss_kb']:+,} kB")
+    if report["leaked_sessions"]:
+        print(f"\n❌ {len(report['leaked_sessions'])} pty sessions without an open connection:")
+        for shell in report["leaked_sessions"]:
+            print(f"  pid {shell['pid']} ({shell['shell']}): age {shell['age_seconds'] / 60:.1f} min, "
+                  f"RSS {shell['rss_kb']:,} kB, session {shell['session_rss_kb']:,} kB "
+                  f"across {shell['session_processes']} processes")
+    else:
+        print("\n✅ Every pty shell has a matching open connection")
+    return report
+
+def profile_findings(cpu, heap, cpu_threshold=5.0, package_threshold=15.0, gc_threshold=10.0, heap_threshold=10.0):
+    """Turn profile summaries into messages for the profiler rule pack"""
+    findings = []
+    for function in cpu["hot_functions"]:
+        if function["self_pct"] >= cpu_threshold:
+            findings.append(f"CPU hotspot: {function['function']} used {function['self_pct']}% of CPU "
+                            f"({function['self_ms']} ms self) at {function['url'] or '(native)'}:{function['line']}:1")
+    for group, stats in cpu["by_module"].items():
+        if group not in ("app", "node internals", "(native)") and not group.startswith("(") \
+                and stats["self_pct"] >= package_threshold:
+            findings.append(f"Package hotspot: {group} accounts for {stats['self_pct']}% of CPU ({stats['self_ms']} ms)")
+    gc = cpu["pseudo_functions"].get("(garbage collector)")
+    if gc and gc["self_pct"] >= gc_threshold:
+        findings.append(f"GC pressure: garbage collector took {gc['self_pct']}% of CPU ({gc['self_ms']} ms)")
+    for entry in (heap or {}).get("top_classes", []):
+        if entry["self_pct"] >= heap_threshold:
+            retainer = entry["retainers"][0]["class"] if entry["retainers"] else "unknown"
+            findings.append(f"Heap retainer: {entry['class']} holds {entry['self_mb']} MB ({entry['self_pct']}% of heap) "
+                            f"in {entry['count']:,} objects, mostly referenced from {retainer}")
+    return findings
+
+def run_profile(port=3000, server_pid=None, inspector_port=9229, seconds=10.0, sampling_interval_us=1000,
+                heap=True, top=20, output="node_profile_report.json", cpuprofile=None, json_output=False):
+    """Attach to the dev server's inspector, profile CPU for a window, summarize a heap snapshot"""
+    import node_inspector
+    from result_sink import write_json_atomic
+
+    server_pid = server_pid or procfs.find_listening_pid(port)
+    try:
+        target = node_inspector.open_inspector(server_pid, inspector_port)
+    except (node_inspector.InspectorError, OSError) as e:
+        print(f"❌ {e}")
+        return None
+    inspector_pid = procfs.find_listening_pid(inspector_port)
+    if not json_output:
+        print("🔬 Node Dev Server Profile")
+        print("=" * 50)
+        print(f"Server pid {server_pid or 'unknown'} on port {port}; inspector {target.get('title')} "
+              f"(pid {inspector_pid or 'unknown'}) on 127.0.0.1:{inspector_port}")
+        if server_pid and inspector_pid and inspector_pid != server_pid:
+            print(f"⚠️  The inspector on port {inspector_port} belongs to pid {inspector_pid}, not the server; "
+                  f"pass --inspector-port to pick another")
+        print(f"Sampling CPU for {seconds:.0f}s...", flush=True)
+
+    try:
+        session = node_inspector.InspectorSession(target["webSocketDebuggerUrl"], timeout=max(120.0, seconds * 2))
+        try:
+            profile = node_inspector.collect_cpu_profile(session, seconds, sampling_interval_us)
+            if cpuprofile:
+                with open(cpuprofile, "w") as f:
+                    json.dump(profile, f)
+            cpu = node_inspector.summarize_cpu_profile(profile, top)
+            heap_summary = None
+            if heap:
+                if not json_output:
+                    print("Taking heap snapshot (the server pauses while it is written)...", flush=True)
+                heap_summary = node_inspector.summarize_heap_snapshot(node_inspector.take_heap_snapshot(session), top)
+        finally:
+            session.close()
+    except (node_inspector.InspectorError, OSError) as e:
+        # OSError covers a refused connection, a reset and socket.timeout while the server is busy
+        print(f"❌ {e}")
+        return None
+
+    agent = ErrorHandlerAgent(rule_packs=(PROFILER_RULE_PACK,))
+    findings = profile_findings(cpu, heap_summary)
+    report = {
+        "timestamp": time.time(),
+        "server_pid": server_pid,
+        "inspector_pid": inspector_pid,
+        "window_seconds": seconds,
+        "cpu": cpu,
+        "heap": heap_summary,
+        "reports": [agent.generate_report(agent.analyze_error(finding)) for finding in findings],
+    }
+    if output:
+        write_json_atomic(output, report, indent=2)
+
+    if json_output:
+        print(json.dumps(report, indent=2))
+        return report
+
+    idle = cpu["pseudo_functions"].get("(idle)")
+    if idle and idle["self_pct"] >= 90:
+        print(f"\n💤 The server was idle for {idle['self_pct']}% of the window; reproduce the slowness while profiling")
+    print(f"\n🔥 Hot functions ({cpu['samples']} samples, {cpu['sampled_ms']:.0f} ms):")
+    for function in cpu["hot_functions"][:10]:
+        print(f"  {function['self_pct']:>6.2f}% self {function['total_pct']:>6.2f}% total  "
+              f"{function['function']}  {function['url']}:{function['line']}")
+    print("\n📦 CPU by package:")
+    for group, stats in list(cpu["by_module"].items())[:8]:
+        print(f"  {stats['self_pct']:>6.2f}%  {group}")
+    if heap_summary:
+        print(f"\n🧠 Heap {heap_summary['heap_mb']} MB in {heap_summary['objects']:,} objects; largest classes:")
+        for entry in heap_summary["top_classes"][:8]:
+            retainers = ", ".join(r["class"] for r in entry["retainers"][:3]) or "-"
+            print(f"  {entry['self_mb']:>8} MB {entry['self_pct']:>6.2f}%  {entry['class']} "
+                  f"x{entry['count']:,}  (held by {retainers})")
+    for i, finding_report in enumerate(report["reports"], 1):
+        print(f"\n--- Finding {i}: {finding_report['error_analysis']['type']} ---")
+        print(f"  {finding_report['error_analysis']['message']}")
+        for j, solution in enumerate(finding_report["suggested_solutions"], 1):
+            print(f"  {j}. {solution}")
+    if output:
+        print(f"\n📄 Report saved to: {output}")
+    return report
+
+def run_terminal_diagnostics():
     print("🔍 Terminal Diagnostics Analysis")
     print("=" * 50)
     
-    agent = ErrorHandlerAgent()
+    agent = create_terminal_agent()
     
     # Collect system info
     print("\n📊 System Information:")
@@ -211,5 +435,34 @@ def main():
     print("5. Try clearing npm cache: npm cache clean --force")
     print("6. Reinstall dependencies if needed: rm -rf node_modules && npm install")
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Diagnose terminal and dev server problems")
+    subparsers = parser.add_subparsers(dest="command")
+    leaks_parser = subparsers.add_parser("leaks", help="find pty shells left behind by closed terminals")
+    leaks_parser.add_argument("--port", type=int, default=3000, help="port the Next.js server listens on")
+    leaks_parser.add_argument("--pid", type=int, help="server pid (default: owner of --port)")
+    leaks_parser.add_argument("--soak", type=float, default=0, help="keep sampling for this many seconds")
+    leaks_parser.add_argument("--interval", type=float, default=10.0, help="seconds between soak samples")
+    leaks_parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    profile_parser = subparsers.add_parser("profile", help="CPU profile and heap summary of the running dev server")
+    profile_parser.add_argument("--port", type=int, default=3000, help="port the Next.js server listens on")
+    profile_parser.add_argument("--pid", type=int, help="node pid to profile (default: owner of --port)")
+    profile_parser.add_argument("--inspector-port", type=int, default=9229, help="inspector port on 127.0.0.1")
+    profile_parser.add_argument("--seconds", type=float, default=10.0, help="CPU sampling window")
+    profile_parser.add_argument("--sampling-interval", type=int, default=1000, help="microseconds between samples")
+    profile_parser.add_argument("--no-heap", action="store_true", help="skip the heap snapshot")
+    profile_parser.add_argument("--top", type=int, default=20, help="functions and classes to keep")
+    profile_parser.add_argument("--output", default="node_profile_report.json", help="report file ('' to skip)")
+    profile_parser.add_argument("--cpuprofile", help="also save the raw profile for Chrome DevTools")
+    profile_parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    if args.command == "profile":
+        return run_profile(args.port, args.pid, args.inspector_port, args.seconds, args.sampling_interval,
+                           not args.no_heap, args.top, args.output, args.cpuprofile, args.json)
+    if args.command == "leaks":
+        return run_leak_check(args.port, args.pid, args.soak, args.interval, args.json)
+    return run_terminal_diagnostics()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
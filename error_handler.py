@@ -0,0 +1,567 @@
+"""
+Error Handling Engine - Shared error classification and resolution used by every agent
+
+Tools add their own categories through a RulePack instead of redefining the engine.
+"""
+
+import os
+import re
+import gzip
+from typing import Dict, Iterator, List, Optional, Tuple
+from dataclasses import dataclass, field
+from enum import Enum
+
+class ErrorType(Enum):
+    COMPILATION = "compilation"
+    RUNTIME = "runtime"
+    DEPENDENCY = "dependency"
+    SYNTAX = "syntax"
+    NETWORK = "network"
+    PERMISSION = "permission"
+    CONFIGURATION = "configuration"
+
+@dataclass
+class ErrorContext:
+    error_message: str
+    error_type: ErrorType
+    file_path: Optional[str] = None
+    line_number: Optional[int] = None
+    stack_trace: Optional[str] = None
+    language: Optional[str] = None
+    framework: Optional[str] = None
+    category: Optional[str] = None
+
+@dataclass(frozen=True)
+class RulePack:
+    """Tool-specific error categories layered on top of the built-in patterns.
+
+    Each category maps to the patterns that select it (checked before the built-in
+    patterns, in order), the ErrorType it reports as, and its own solutions.
+    """
+    name: str
+    patterns: Dict[str, List[str]]
+    error_types: Dict[str, ErrorType]
+    solutions: Dict[str, List[str]] = field(default_factory=dict)
+    default_category: Optional[str] = None
+
+# Pattern tables are compiled once at import instead of on every ErrorHandlerAgent()
+ERROR_PATTERNS = {
+    ErrorType.COMPILATION: [
+        r"error: (.+)",
+        r"fatal error: (.+)",
+        r"undefined reference to (.+)",
+        r"cannot find symbol (.+)"
+    ],
+    ErrorType.SYNTAX: [
+        r"SyntaxError: (.+)",
+        r"IndentationError: (.+)",
+        r"unexpected token (.+)",
+        r"missing semicolon"
+    ],
+    ErrorType.DEPENDENCY: [
+        r"ModuleNotFoundError: (.+)",
+        r"ImportError: (.+)",
+        r"package (.{1,200}) not found",
+        r"cannot resolve dependency (.+)"
+    ],
+    ErrorType.NETWORK: [
+        r"connection refused",
+        r"timeout",
+        r"network unreachable",
+        r"DNS resolution failed"
+    ],
+    ErrorType.PERMISSION: [
+        r"permission denied",
+        r"access forbidden",
+        r"unauthorized",
+        r"insufficient privileges"
+    ]
+}
+
+# Huge messages (a minified bundle on one line) are analyzed in bounded pieces: only the
+# head and tail are scanned, rule regexes run on overlapping windows, and each rule gets
+# a fixed number of windows, so the work per message is capped whatever the input
+MAX_ANALYZED_CHARS = 64 * 1024
+ANALYZED_TAIL_CHARS = 16 * 1024
+SCAN_WINDOW_CHARS = 2048
+SCAN_OVERLAP_CHARS = 256
+MAX_WINDOWS_PER_RULE = 8
+MAX_REPORTED_CHARS = 4096
+
+def bounded_text(message: str) -> str:
+    """message itself, or its head and tail when it is longer than MAX_ANALYZED_CHARS"""
+    if len(message) <= MAX_ANALYZED_CHARS:
+        return message
+    head = MAX_ANALYZED_CHARS - ANALYZED_TAIL_CHARS
+    return message[:head] + "\n" + message[-ANALYZED_TAIL_CHARS:]
+
+def scan_windows(text: str) -> Iterator[Tuple[int, str]]:
+    """(offset, slice) pieces of text that overlap so a short match is never cut in two"""
+    if len(text) <= SCAN_WINDOW_CHARS:
+        yield 0, text
+        return
+    step = SCAN_WINDOW_CHARS - SCAN_OVERLAP_CHARS
+    for offset in range(0, len(text) - SCAN_OVERLAP_CHARS, step):
+        yield offset, text[offset:offset + SCAN_WINDOW_CHARS]
+
+def excerpt(text: str, position: int, original_length: Optional[int] = None) -> str:
+    """text cut to MAX_REPORTED_CHARS around position, saying how much was left out"""
+    original_length = original_length or len(text)
+    if original_length <= MAX_REPORTED_CHARS:
+        return text
+    half = MAX_REPORTED_CHARS // 4
+    start = max(0, min(position - half, len(text) - 2 * half))
+    if start <= 2 * half:
+        shown = text[:MAX_REPORTED_CHARS]
+        return f"{shown} … [{original_length - len(shown):,} more chars]"
+    head = text[:half]
+    around = text[start:start + 2 * half]
+    return f"{head} … [{original_length - len(head) - len(around):,} chars omitted] … {around} …"
+
+# Regex syntax that ends the literal text a pattern starts with
+_REGEX_METACHARS = set(".^$*+?{}[]\\|()")
+
+def _literal_prefix(pattern: str) -> str:
+    literal = []
+    for char in pattern:
+        if char in _REGEX_METACHARS:
+            break
+        literal.append(char)
+    return "".join(literal).lower()
+
+class ErrorClassifier:
+    """Ordered rules compiled once; the first rule that matches anywhere wins.
+
+    Every rule pattern starts with literal text, so the message is lowercased once
+    and each rule is first screened with a plain substring test. The regex only
+    runs for rules whose literal is present, and pure-literal rules never need it.
+    """
+
+    def __init__(self, rules: List[Tuple[ErrorType, Optional[str], str]]):
+        self.rules = []
+        for error_type, category, pattern in rules:
+            literal = _literal_prefix(pattern)
+            regex = None if literal == pattern.lower() else re.compile(pattern, re.IGNORECASE)
+            self.rules.append((error_type, category, literal, regex))
+
+    def classify(self, error_message: str) -> Optional[Tuple[ErrorType, Optional[str]]]:
+        if len(error_message) > SCAN_WINDOW_CHARS:
+            result = self.search(error_message)
+            return None if result is None else (result[0], result[1])
+        error_lower = error_message.lower()
+        for error_type, category, literal, regex in self.rules:
+            if literal not in error_lower:
+                continue
+            if regex is None or regex.search(error_message):
+                return error_type, category
+        return None
+
+    def search(self, error_message: str) -> Optional[Tuple[ErrorType, Optional[str], int]]:
+        """The first rule that matches and roughly where in the message its match starts"""
+        text = bounded_text(error_message)
+        if len(text) > SCAN_WINDOW_CHARS:
+            return self._search_windows(text)
+        error_lower = text.lower()
+        for error_type, category, literal, regex in self.rules:
+            if literal not in error_lower:
+                continue
+            if regex is None:
+                return error_type, category, error_lower.find(literal)
+            match = regex.search(text)
+            if match:
+                return error_type, category, match.start()
+        return None
+
+    def _search_windows(self, text: str) -> Optional[Tuple[ErrorType, Optional[str], int]]:
+        windows = [(offset, window, window.lower()) for offset, window in scan_windows(text)]
+        for error_type, category, literal, regex in self.rules:
+            tried = 0
+            for offset, window, window_lower in windows:
+                if literal not in window_lower:
+                    continue
+                if regex is None:
+                    return error_type, category, offset + window_lower.find(literal)
+                match = regex.search(window)
+                if match:
+                    return error_type, category, offset + match.start()
+                tried += 1
+                if tried >= MAX_WINDOWS_PER_RULE:
+                    break
+        return None
+
+BASE_RULES = [
+    (error_type, None, pattern)
+    for error_type, patterns in ERROR_PATTERNS.items()
+    for pattern in patterns
+]
+
+# One compiled classifier per combination of rule packs, shared by every agent instance
+_classifiers: Dict[Tuple[str, ...], ErrorClassifier] = {(): ErrorClassifier(BASE_RULES)}
+
+def get_classifier(rule_packs: Tuple[RulePack, ...] = ()) -> ErrorClassifier:
+    key = tuple(pack.name for pack in rule_packs)
+    classifier = _classifiers.get(key)
+    if classifier is None:
+        pack_rules = [
+            (pack.error_types[category], category, pattern)
+            for pack in rule_packs
+            for category, patterns in pack.patterns.items()
+            for pattern in patterns
+        ]
+        classifier = _classifiers[key] = ErrorClassifier(pack_rules + BASE_RULES)
+    return classifier
+
+# Common patterns for file:line references. A path only starts after whitespace or a
+# colon, and no run can give back a character the token after it would accept (a path
+# never contains the colon that ends it), so backtracking stays within one token and a
+# long line without a match is scanned in linear time.
+LOCATION_PATTERNS = [
+    re.compile(r"(?<![^\s:])([^\s:]+):(\d+):"),
+    re.compile(r"File \"([^\"]+)\", line (\d+)"),
+    re.compile(r"at ([^\s:]+):(\d+):")
+]
+
+LANGUAGE_INDICATORS = {
+    'python': ['python', 'pip', 'traceback', 'modulenotfounderror'],
+    'javascript': ['node', 'npm', 'webpack', 'unexpected token'],
+    'java': ['java', 'javac', 'cannot find symbol', 'classnotfoundexception'],
+    'swift': ['swift', 'xcode', 'cannot find in scope'],
+    'c++': ['g++', 'clang++', 'undefined reference'],
+    'rust': ['rustc', 'cargo', 'cannot find crate']
+}
+
+FRAMEWORK_INDICATORS = {
+    'react': ['react', 'jsx', 'component'],
+    'vue': ['vue', 'vue-cli'],
+    'angular': ['angular', 'ng'],
+    'django': ['django', 'manage.py'],
+    'flask': ['flask', 'werkzeug'],
+    'express': ['express', 'middleware']
+}
+
+# Log reading is shared with the dev server log analyzer so both see the same lines
+MAX_LINE_BYTES = 64 * 1024
+MAX_STACK_FRAMES = 20
+ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;?]*[A-Za-z]")
+ERROR_LINE_MARKERS = ("error", "exception", "failed", "⨯")
+CODE_FRAME_LINE = re.compile(r"^>?\s*\d*\s*\|")
+# "at fn (file:12:5)" or "at file:12:5"; inside parentheses the file may contain its own,
+# as in webpack-internal:///(rsc)/./src/app/page.tsx, so only the wrapping pair is dropped
+STACK_FRAME_LOCATION = re.compile(r"at (?:[^()]*\((.+):(\d+):\d+\)|([^\s()]+):(\d+):\d+)")
+# Prefixes bundlers and runtimes put in front of a project-relative path
+PATH_PREFIXES = ("file://", "webpack-internal:///", "webpack:///")
+
+def project_relative_path(file_path: str) -> str:
+    """A stack frame's file without bundler prefixes: webpack-internal:///(rsc)/./src/x.ts -> src/x.ts"""
+    for prefix in PATH_PREFIXES:
+        if file_path.startswith(prefix):
+            file_path = file_path[len(prefix):]
+            break
+    file_path = file_path.lstrip("(").split("?", 1)[0]
+    # webpack-internal:///(rsc)/./src/app/page.tsx names src/app/page.tsx
+    if "/./" in file_path:
+        file_path = file_path.split("/./", 1)[1]
+    return file_path
+
+def stack_frame_location(frame: str) -> Optional[Tuple[str, int]]:
+    """(project-relative file, line) named by one stripped "at ..." frame, if it names one"""
+    match = STACK_FRAME_LOCATION.fullmatch(frame)
+    if match is None:
+        return None
+    file_path, line_number = match.group(1, 2) if match.group(1) is not None else match.group(3, 4)
+    return project_relative_path(file_path), int(line_number)
+
+def rotated_logs(path: str) -> List[str]:
+    """path and its numbered rotations (path.1, path.2.gz, ...), oldest first"""
+    directory = os.path.dirname(path) or "."
+    base = os.path.basename(path) + "."
+    rotations = []
+    if os.path.isdir(directory):
+        for name in os.listdir(directory):
+            if not name.startswith(base):
+                continue
+            number = name[len(base):]
+            if number.endswith(".gz"):
+                number = number[:-3]
+            if number.isdigit():
+                rotations.append((int(number), os.path.join(directory, name)))
+    paths = [rotated for _, rotated in sorted(rotations, reverse=True)]
+    if os.path.exists(path):
+        paths.append(path)
+    return paths
+
+def iter_log_lines(path: str, rotated: bool = True, max_line_bytes: int = MAX_LINE_BYTES) -> Iterator[str]:
+    """Stream lines of a log (and its rotations) with colors stripped, in constant memory.
+
+    Lines longer than max_line_bytes are truncated; the rest is read and dropped
+    instead of being buffered. Rotations ending in .gz are decompressed on the fly.
+    """
+    for file_path in rotated_logs(path) if rotated else [path]:
+        opener = gzip.open if file_path.endswith(".gz") else open
+        with opener(file_path, "rb") as f:
+            while True:
+                raw = f.readline(max_line_bytes)
+                if not raw:
+                    break
+                rest = raw
+                while not rest.endswith(b"\n"):
+                    rest = f.readline(max_line_bytes)
+                    if not rest:
+                        break
+                line = raw.decode("utf-8", "replace").rstrip("\r\n")
+                if "\x1b" in line:
+                    line = ANSI_ESCAPE.sub("", line)
+                yield line
+
+class ErrorHandlerAgent:
+    def __init__(self, rule_packs: Tuple[RulePack, ...] = (), knowledge_base=None, fallback_model=None,
+                 source_context=None, source_maps=None):
+        self.error_patterns = ERROR_PATTERNS
+        self.rule_packs = tuple(rule_packs)
+        # Optional error_knowledge.KnowledgeBase; fixes that worked before rank ahead of the generic ones
+        self.knowledge_base = knowledge_base
+        # Optional error_model.FallbackClassifier, consulted only when no rule matches
+        self.fallback_model = fallback_model
+        # Optional source_context.SourceContext; reports then show the code around each frame
+        self.source_context = source_context
+        # Optional source_maps.SourceMapResolver; frames in .next build output are mapped back to src
+        self.source_maps = source_maps
+        self.classifier = get_classifier(self.rule_packs)
+        
+        self.solutions = {
+            ErrorType.COMPILATION: self._handle_compilation_error,
+            ErrorType.SYNTAX: self._handle_syntax_error,
+            ErrorType.DEPENDENCY: self._handle_dependency_error,
+            ErrorType.NETWORK: self._handle_network_error,
+            ErrorType.PERMISSION: self._handle_permission_error
+        }
+
+    def analyze_error(self, error_message: str, context: Dict = None) -> ErrorContext:
+        """Analyze error message and determine type and context"""
+        text = bounded_text(error_message)
+        match = self.classifier.search(text)
+        if match is not None:
+            error_type, category, position = match
+        else:
+            (error_type, category), position = self.classify_unmatched([text])[0], 0
+        
+        file_path, line_number = self._extract_location(text)
+        if self.source_maps is not None and file_path and file_path.endswith((".js", ".mjs", ".cjs")):
+            original = self.source_maps.resolve_location(text)
+            if original is not None:
+                file_path, line_number = original.source, original.line
+        language = self._detect_language(text, context)
+        framework = self._detect_framework(text, context)
+        
+        return ErrorContext(
+            error_message=excerpt(text, position, len(error_message)),
+            error_type=error_type,
+            file_path=file_path,
+            line_number=line_number,
+            language=language,
+            framework=framework,
+            category=category
+        )
+
+    def scan_log(self, path: str, context: Dict = None) -> Iterator[ErrorContext]:
+        """Stream a log and analyze each error line, with the "at ..." frames below it as its stack trace"""
+        pending = None
+        frames: List[str] = []
+        for line in iter_log_lines(path):
+            stripped = line.strip()
+            if pending is not None and stripped.startswith("at "):
+                if len(frames) < MAX_STACK_FRAMES:
+                    frames.append(stripped)
+                continue
+            if CODE_FRAME_LINE.match(stripped):
+                continue
+            if pending is not None:
+                yield self._with_stack(pending, frames, context)
+                pending, frames = None, []
+            lowered = stripped.lower()
+            if any(marker in lowered for marker in ERROR_LINE_MARKERS):
+                pending = stripped
+        if pending is not None:
+            yield self._with_stack(pending, frames, context)
+
+    def _with_stack(self, message: str, frames: List[str], context: Dict = None) -> ErrorContext:
+        error_context = self.analyze_error(message, context)
+        if frames:
+            stack_trace = "\n".join(frames)
+            if self.source_maps is not None:
+                stack_trace = self.source_maps.resolve_stack(stack_trace)
+            error_context.stack_trace = stack_trace
+            if error_context.file_path is None:
+                location = stack_frame_location(stack_trace.split("\n", 1)[0])
+                if location:
+                    error_context.file_path, error_context.line_number = location
+        return error_context
+
+    def classify(self, error_message: str) -> Tuple[ErrorType, Optional[str]]:
+        """Classify error into an ErrorType and, if a rule pack matched, its category"""
+        result = self.classifier.classify(error_message)
+        if result is not None:
+            return result
+        return self.classify_unmatched([error_message])[0]
+
+    def classify_many(self, error_messages: List[str]) -> List[Tuple[ErrorType, Optional[str]]]:
+        """classify() for a batch; the messages no rule matches go to the fallback model together"""
+        results = [self.classifier.classify(message) for message in error_messages]
+        misses = [i for i, result in enumerate(results) if result is None]
+        if misses:
+            for i, result in zip(misses, self.classify_unmatched([error_messages[i] for i in misses])):
+                results[i] = result
+        return results
+
+    def classify_unmatched(self, error_messages: List[str]) -> List[Tuple[ErrorType, Optional[str]]]:
+        """Fallback for messages no rule matched: a rule pack default, then the model, then RUNTIME"""
+        for pack in self.rule_packs:
+            if pack.default_category:
+                return [(pack.error_types[pack.default_category], pack.default_category)] * len(error_messages)
+        if self.fallback_model is None:
+            return [(ErrorType.RUNTIME, None)] * len(error_messages)
+        return [(error_type or ErrorType.RUNTIME, None) for error_type in self.fallback_model.predict(error_messages)]
+
+    def _classify_error(self, error_message: str) -> ErrorType:
+        """Classify error based on patterns"""
+        return self.classify(error_message)[0]
+
+    def _extract_location(self, error_message: str) -> Tuple[Optional[str], Optional[int]]:
+        """Extract file path and line number from error message"""
+        text = bounded_text(error_message)
+        for pattern in LOCATION_PATTERNS:
+            for _, window in scan_windows(text):
+                match = pattern.search(window)
+                if match:
+                    return match.group(1), int(match.group(2))
+        return None, None
+
+    def _detect_language(self, error_message: str, context: Dict = None) -> Optional[str]:
+        """Detect programming language from error patterns"""
+        error_lower = bounded_text(error_message).lower()
+        for lang, indicators in LANGUAGE_INDICATORS.items():
+            if any(indicator in error_lower for indicator in indicators):
+                return lang
+        return None
+
+    def _detect_framework(self, error_message: str, context: Dict = None) -> Optional[str]:
+        """Detect framework from error patterns"""
+        error_lower = bounded_text(error_message).lower()
+        for framework, indicators in FRAMEWORK_INDICATORS.items():
+            if any(indicator in error_lower for indicator in indicators):
+                return framework
+        return None
+
+    def suggest_solution(self, error_context: ErrorContext) -> List[str]:
+        """Generate solution suggestions based on error context"""
+        solutions = self._generic_solutions(error_context)
+        if self.knowledge_base is not None:
+            known = self.knowledge_base.known_fixes(error_context)
+            if known:
+                solutions = known + [solution for solution in solutions if solution not in known]
+        return solutions
+
+    def _generic_solutions(self, error_context: ErrorContext) -> List[str]:
+        for pack in self.rule_packs:
+            if error_context.category in pack.solutions:
+                return pack.solutions[error_context.category]
+        handler = self.solutions.get(error_context.error_type)
+        if handler:
+            return handler(error_context)
+        return ["Unable to determine specific solution. Please review error details."]
+
+    def _handle_compilation_error(self, context: ErrorContext) -> List[str]:
+        solutions = []
+        if "undefined reference" in context.error_message:
+            solutions.extend([
+                "Check if all required libraries are linked",
+                "Verify function declarations match implementations",
+                "Ensure all object files are included in build"
+            ])
+        elif "cannot find symbol" in context.error_message:
+            solutions.extend([
+                "Check import statements and package declarations",
+                "Verify class/method names are spelled correctly",
+                "Ensure required dependencies are in classpath"
+            ])
+        else:
+            solutions.append("Review compilation flags and include paths")
+        return solutions
+
+    def _handle_syntax_error(self, context: ErrorContext) -> List[str]:
+        solutions = []
+        if context.language == "python":
+            solutions.extend([
+                "Check indentation consistency (tabs vs spaces)",
+                "Verify parentheses, brackets, and quotes are balanced",
+                "Review syntax for Python version compatibility"
+            ])
+        elif context.language == "javascript":
+            solutions.extend([
+                "Check for missing semicolons or commas",
+                "Verify bracket and parentheses matching",
+                "Review variable declarations and scoping"
+            ])
+        return solutions
+
+    def _handle_dependency_error(self, context: ErrorContext) -> List[str]:
+        solutions = []
+        if context.language == "python":
+            solutions.extend([
+                "Install missing package: pip install <package_name>",
+                "Check virtual environment activation",
+                "Verify PYTHONPATH includes module location"
+            ])
+        elif context.language == "javascript":
+            solutions.extend([
+                "Install missing package: npm install <package_name>",
+                "Check package.json dependencies",
+                "Clear npm cache: npm cache clean --force"
+            ])
+        return solutions
+
+    def _handle_network_error(self, context: ErrorContext) -> List[str]:
+        return [
+            "Check internet connectivity",
+            "Verify firewall settings",
+            "Test with different network or VPN",
+            "Check if service/API is accessible"
+        ]
+
+    def _handle_permission_error(self, context: ErrorContext) -> List[str]:
+        return [
+            "Run with appropriate permissions (sudo if needed)",
+            "Check file/directory ownership and permissions",
+            "Verify user has access to required resources",
+            "Review security policies and access controls"
+        ]
+
+    def generate_report(self, error_context: ErrorContext) -> Dict:
+        """Generate comprehensive error analysis report"""
+        solutions = self.suggest_solution(error_context)
+        
+        report = {
+            "error_analysis": {
+                "type": error_context.category or error_context.error_type.value,
+                "message": error_context.error_message,
+                "location": {
+                    "file": error_context.file_path,
+                    "line": error_context.line_number
+                },
+                "context": {
+                    "language": error_context.language,
+                    "framework": error_context.framework
+                }
+            },
+            "suggested_solutions": solutions,
+            "next_steps": [
+                "Apply suggested solutions in order of likelihood",
+                "Test each solution incrementally",
+                "Document successful resolution for future reference"
+            ]
+        }
+        if self.source_context is not None:
+            report["source_context"] = self.source_context.enrich(error_context)
+        if self.knowledge_base is not None:
+            report["similar_incidents"] = self.knowledge_base.nearest(error_context, k=3)
+        return report
@@ -0,0 +1,295 @@
+"""
+Error knowledge base - Past errors and the fixes that resolved them, searchable by similarity
+
+Messages are normalized (urls, paths, hex ids and numbers become placeholders) so the
+same failure from different runs and machines lands on one incident. Incidents are
+found again through a token inverted index scored by IDF-weighted Jaccard similarity:
+rare tokens ("eaddrinuse", "requests") pick the candidates, common ones ("error",
+"<num>") only take part in the final score, so a query touches a few thousand
+postings at most however many incidents are stored.
+
+The store is an append-only NDJSON event log:
+
+    {"event":"seen","key":"…","message":"…","error_type":"dependency","category":null,"file":null,"t":…}
+    {"event":"fix","key":"…","solution":"pip install requests","worked":true,"t":…}
+
+Replaying it means normalizing every message again, so a load that replays many events
+saves the incidents (tokens included) to a snapshot beside the log, with the log offset
+it covers. Later loads read the snapshot and replay only the events appended since.
+"""
+
+import gc
+import os
+import re
+import json
+import math
+import time
+import hashlib
+import threading
+from typing import Dict, List, Optional, Union
+
+from error_handler import ErrorContext
+
+DEFAULT_KB_PATH = os.path.join(".agent-cache", "error_knowledge.ndjson")
+
+# Only the head of a message is normalized; the rest rarely changes which incident it is
+MAX_NORMALIZED_CHARS = 2000
+# Tokens with longer posting lists are too common to choose candidates with
+MAX_POSTINGS_SCANNED = 5000
+MAX_CANDIDATES = 200
+# A load that replays this many events past the snapshot writes a new one
+SNAPSHOT_AFTER_EVENTS = 1000
+SNAPSHOT_VERSION = 1
+# Log bytes before the snapshot offset that must still match: a truncated or replaced log does not
+SNAPSHOT_CHECK_BYTES = 256
+
+# (trigger, pattern, placeholder): a pattern only runs if its trigger text is in the message.
+# Paths may only start at a word boundary, which keeps the scan linear on long words.
+NORMALIZERS = [
+    ("://", re.compile(r"https?://\S+"), " <url> "),
+    ("/", re.compile(r"(?<![\w.@~-])(?:[A-Za-z]:)?[\w.@~-]*(?:/[\w.@~-]+)+/?"), " <path> "),
+    ("\\", re.compile(r"(?<![\w.@~-])(?:[A-Za-z]:)?[\w.@~-]*(?:\\[\w.@~-]+)+"), " <path> "),
+    ("", re.compile(r"\b0x[0-9a-fA-F]+\b|\b[0-9a-f]{8,}\b"), " <hex> "),
+    ("", re.compile(r"\b\d+(?:\.\d+)*\b"), " <num> "),
+]
+TOKEN = re.compile(r"<\w+>|[a-z_$][a-z0-9_$]+")
+
+
+def normalize(message: str) -> List[str]:
+    """Tokens of a message with run-specific values replaced by placeholders"""
+    text = message[:MAX_NORMALIZED_CHARS]
+    for trigger, pattern, placeholder in NORMALIZERS:
+        if trigger in text:
+            text = pattern.sub(placeholder, text)
+    return TOKEN.findall(text.lower())
+
+
+def incident_key(tokens: List[str]) -> str:
+    return hashlib.blake2b(" ".join(tokens).encode(), digest_size=8).hexdigest()
+
+
+def _log_check(log, offset: int) -> Optional[str]:
+    """Digest of the log bytes just before offset, or None if the log is shorter than offset"""
+    start = max(0, offset - SNAPSHOT_CHECK_BYTES)
+    log.seek(start)
+    data = log.read(offset - start)
+    if len(data) < offset - start:
+        return None
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+
+class Incident:
+    """One normalized error with how often it was seen and how each attempted fix went"""
+
+    __slots__ = ("key", "message", "error_type", "category", "file_path", "tokens", "count", "last_seen", "fixes")
+
+    def __init__(self, key, message, error_type, category, file_path, tokens):
+        self.key = key
+        self.message = message
+        self.error_type = error_type
+        self.category = category
+        self.file_path = file_path
+        self.tokens = tokens
+        self.count = 0
+        self.last_seen = None
+        self.fixes: Dict[str, List[int]] = {}
+
+    def to_dict(self, similarity=None):
+        result = {
+            "message": self.message,
+            "type": self.category or self.error_type,
+            "file": self.file_path,
+            "count": self.count,
+            "last_seen": self.last_seen,
+            "fixes": [{"solution": solution, "worked": worked, "failed": failed}
+                      for solution, (worked, failed) in sorted(self.fixes.items(), key=lambda item: -item[1][0])],
+        }
+        if similarity is not None:
+            result["similarity"] = round(similarity, 3)
+        return result
+
+
+class KnowledgeBase:
+    """Incidents indexed by normalized token for nearest-neighbour lookup"""
+
+    def __init__(self, path: Optional[str] = DEFAULT_KB_PATH):
+        self.path = path
+        self.snapshot_path = os.path.splitext(path)[0] + ".snapshot.json" if path else None
+        self.incidents: List[Incident] = []
+        self.by_key: Dict[str, int] = {}
+        self.postings: Dict[str, List[int]] = {}
+        # Recording checks for an incident and then adds it; the agent server records from several threads
+        self.lock = threading.Lock()
+        if path and os.path.exists(path):
+            # Loading only allocates objects that stay alive; collecting in between would only re-walk them
+            collecting = gc.isenabled()
+            gc.disable()
+            try:
+                self._load()
+            finally:
+                if collecting:
+                    gc.enable()
+
+    def __len__(self):
+        return len(self.incidents)
+
+    def _load(self):
+        with open(self.path, "rb") as f:
+            offset = self._load_snapshot(f)
+            f.seek(offset)
+            replayed = 0
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # A run killed (or still) mid-write leaves a partial last line
+                    break
+                offset += len(line)
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                self._apply(event)
+                replayed += 1
+            if replayed >= SNAPSHOT_AFTER_EVENTS:
+                self._write_snapshot(offset, _log_check(f, offset))
+
+    def _load_snapshot(self, log) -> int:
+        """Incidents from the snapshot if it still matches the log; returns the log offset to replay from"""
+        try:
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                snapshot = json.load(f)
+            offset = snapshot["offset"]
+            if snapshot.get("version") != SNAPSHOT_VERSION or _log_check(log, offset) != snapshot["check"]:
+                return 0
+            # The postings are saved too: rebuilding them costs more than reading them
+            postings = snapshot["postings"]
+            for key, message, error_type, category, file_path, tokens, count, last_seen, fixes in snapshot["incidents"]:
+                incident = Incident(key, message, error_type, category, file_path, tuple(tokens))
+                incident.count = count
+                incident.last_seen = last_seen
+                incident.fixes = fixes
+                self.by_key[key] = len(self.incidents)
+                self.incidents.append(incident)
+            self.postings = postings
+        except (OSError, ValueError, KeyError, TypeError):
+            self.incidents, self.by_key, self.postings = [], {}, {}
+            return 0
+        return offset
+
+    def _write_snapshot(self, offset: int, check: str):
+        from result_sink import write_json_atomic  # deferred: snapshots are written rarely
+        incidents = [[incident.key, incident.message, incident.error_type, incident.category, incident.file_path,
+                      incident.tokens, incident.count, incident.last_seen, incident.fixes]
+                     for incident in self.incidents]
+        try:
+            write_json_atomic(self.snapshot_path, {"version": SNAPSHOT_VERSION, "offset": offset, "check": check,
+                                                   "incidents": incidents, "postings": self.postings}, separators=(",", ":"))
+        except OSError:
+            pass  # without a snapshot the next load replays the whole log again
+
+    def _incident(self, key, message, error_type, category, file_path, tokens=None):
+        index = self.by_key.get(key)
+        if index is not None:
+            return self.incidents[index]
+        tokens = tuple(sorted(set(tokens if tokens is not None else normalize(message))))
+        incident = Incident(key, message, error_type, category, file_path, tokens)
+        index = self.by_key[key] = len(self.incidents)
+        self.incidents.append(incident)
+        for token in tokens:
+            self.postings.setdefault(token, []).append(index)
+        return incident
+
+    def _apply(self, event, tokens=None):
+        incident = self._incident(event["key"], event.get("message", ""), event.get("error_type"),
+                                  event.get("category"), event.get("file"), tokens)
+        if event["event"] == "seen":
+            incident.count += 1
+            incident.last_seen = event.get("t")
+        elif event["event"] == "fix":
+            tally = incident.fixes.setdefault(event["solution"], [0, 0])
+            tally[0 if event.get("worked", True) else 1] += 1
+        return incident
+
+    def _record(self, event, tokens=None):
+        with self.lock:
+            incident = self._apply(event, tokens)
+            if self.path:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(event, separators=(",", ":")) + "\n")
+        return incident
+
+    def _event(self, kind, error_context: ErrorContext, tokens, **extra):
+        event = {"event": kind, "key": incident_key(tokens), "message": error_context.error_message[:MAX_NORMALIZED_CHARS],
+                 "error_type": error_context.error_type.value, "category": error_context.category,
+                 "file": error_context.file_path, "t": round(time.time(), 3)}
+        event.update(extra)
+        return event
+
+    def remember(self, error_context: ErrorContext) -> Incident:
+        """Record one occurrence of an error"""
+        tokens = normalize(error_context.error_message)
+        return self._record(self._event("seen", error_context, tokens), tokens)
+
+    def record_resolution(self, error_context: ErrorContext, solution: str, worked: bool = True) -> Incident:
+        """Record that solution was tried for this error and whether it fixed it (and that it was seen, if new)"""
+        tokens = normalize(error_context.error_message)
+        if incident_key(tokens) not in self.by_key:
+            self._record(self._event("seen", error_context, tokens), tokens)
+        return self._record(self._event("fix", error_context, tokens, solution=solution, worked=worked), tokens)
+
+    def _idf(self, token):
+        return math.log(1.0 + len(self.incidents) / (1 + len(self.postings.get(token, ()))))
+
+    def nearest(self, query: Union[ErrorContext, str], k: int = 5, min_similarity: float = 0.3) -> List[Dict]:
+        """Most similar past incidents, best first, as dicts with a similarity in 0..1"""
+        message = query.error_message if isinstance(query, ErrorContext) else query
+        tokens = set(normalize(message))
+        if not tokens or not self.incidents:
+            return []
+
+        # Rare tokens first: their short posting lists choose the candidates
+        ordered = sorted(tokens, key=lambda token: len(self.postings.get(token, ())))
+        partial: Dict[int, float] = {}
+        for token in ordered:
+            postings = self.postings.get(token)
+            if not postings:
+                continue
+            if len(postings) > MAX_POSTINGS_SCANNED and partial:
+                break
+            weight = self._idf(token)
+            for index in postings[-MAX_POSTINGS_SCANNED:]:
+                partial[index] = partial.get(index, 0.0) + weight
+        if not partial:
+            return []
+
+        query_weights = {token: self._idf(token) for token in tokens}
+        query_total = sum(query_weights.values())
+        candidates = sorted(partial, key=partial.get, reverse=True)[:MAX_CANDIDATES]
+        scored = []
+        for index in candidates:
+            incident = self.incidents[index]
+            shared = 0.0
+            extra = 0.0
+            for token in incident.tokens:
+                weight = query_weights.get(token)
+                if weight is None:
+                    extra += self._idf(token)
+                else:
+                    shared += weight
+            similarity = shared / (query_total + extra) if query_total + extra else 0.0
+            if similarity >= min_similarity:
+                scored.append((similarity, incident.count, index))
+        scored.sort(reverse=True)
+        return [self.incidents[index].to_dict(similarity) for similarity, _, index in scored[:k]]
+
+    def known_fixes(self, error_context: ErrorContext, k: int = 5, min_similarity: float = 0.5) -> List[str]:
+        """Solutions that worked for similar errors, weighted by similarity and track record"""
+        scores: Dict[str, float] = {}
+        for incident in self.nearest(error_context, k=k, min_similarity=min_similarity):
+            for fix in incident["fixes"]:
+                score = incident["similarity"] * (fix["worked"] - fix["failed"])
+                if score > 0:
+                    scores[fix["solution"]] = scores.get(fix["solution"], 0.0) + score
+        return sorted(scores, key=scores.get, reverse=True)
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Error fallback model - Hashed n-gram linear classifier for errors no regex rule matches
+
+Requires NumPy; the engine works without it and callers import this module lazily.
+
+Each message becomes hashed features (normalized words, word bigrams and character
+trigrams, plus a constant bias feature) in 2**bits buckets. A softmax-regression
+weight matrix of shape (2**bits, classes) scores a whole batch at once: the weight
+rows of every feature are gathered and summed per message with np.add.reduceat, so
+no dense feature matrix is ever built.
+
+    python3 error_model.py train --data labeled_errors.jsonl --from-kb
+    python3 error_model.py predict "EACCES: open '/usr/lib/node_modules/x'"
+
+Training data is JSON lines of {"message": "...", "error_type": "dependency"}.
+"""
+
+import os
+import sys
+import json
+import zlib
+import argparse
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from error_handler import ErrorType  # noqa: E402
+from error_knowledge import DEFAULT_KB_PATH, KnowledgeBase, normalize  # noqa: E402
+
+DEFAULT_MODEL_PATH = os.path.join(".agent-cache", "error_model.npz")
+HASH_BITS = 18
+MIN_CONFIDENCE = 0.5
+_BIAS_FEATURE = b"<bias>"
+
+
+def featurize(messages: Sequence[str], bits: int = HASH_BITS) -> Tuple["np.ndarray", "np.ndarray"]:
+    """Hashed feature ids of a batch, flattened, and the offset where each message's ids start
+
+    Word and word-bigram features are hashed per message; character trigrams are hashed
+    for the whole batch at once from one byte buffer, which is most of the features.
+    """
+    texts = [(" " + " ".join(normalize(message)) + " ").encode() for message in messages]
+    word_hashes, word_counts = [], []
+    for data in texts:
+        words = data.split()
+        grams = {_BIAS_FEATURE}
+        grams.update(b"w:" + word for word in words)
+        grams.update(b"b:" + first + b" " + second for first, second in zip(words, words[1:]))
+        word_hashes.extend(map(zlib.crc32, grams))
+        word_counts.append(len(grams))
+    word_ids = (np.array(word_hashes, dtype=np.uint32) >> np.uint32(32 - bits)).astype(np.int64)
+    word_rows = np.repeat(np.arange(len(texts)), word_counts)
+
+    lengths = np.fromiter((len(data) for data in texts), dtype=np.int64, count=len(texts))
+    buffer = np.frombuffer(b"".join(texts), dtype=np.uint8).astype(np.uint32)
+    row_of_byte = np.repeat(np.arange(len(texts)), lengths)
+    position = np.arange(len(buffer)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    # A trigram may not run into the next message's bytes
+    starts = np.nonzero(position <= np.repeat(lengths, lengths) - 3)[0]
+    trigrams = (buffer[starts] << 16) | (buffer[starts + 1] << 8) | buffer[starts + 2]
+    trigram_ids = ((trigrams * np.uint32(0x9E3779B1)) >> np.uint32(32 - bits)).astype(np.int64)
+
+    ids = np.concatenate([word_ids, trigram_ids])
+    rows = np.concatenate([word_rows, row_of_byte[starts]])
+    order = np.argsort(rows, kind="stable")
+    offsets = np.zeros(len(texts), dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=len(texts))[:-1], out=offsets[1:])
+    # Every message has the bias feature, so no row is empty and reduceat never sees equal offsets
+    return ids[order], offsets
+
+
+def _scores(weights, flat, offsets):
+    lengths = np.diff(np.append(offsets, len(flat)))
+    return np.add.reduceat(weights[flat], offsets, axis=0) / np.sqrt(lengths)[:, None], lengths
+
+
+def _softmax(scores):
+    scores = scores - scores.max(axis=1, keepdims=True)
+    np.exp(scores, out=scores)
+    scores /= scores.sum(axis=1, keepdims=True)
+    return scores
+
+
+class FallbackClassifier:
+    """Linear model over hashed features predicting an ErrorType"""
+
+    def __init__(self, weights: "np.ndarray", classes: Sequence[str], bits: int = HASH_BITS):
+        self.weights = weights
+        self.classes = list(classes)
+        self.types = [ErrorType(value) for value in self.classes]
+        self.bits = bits
+
+    def scores(self, messages: Sequence[str]) -> "np.ndarray":
+        return _scores(self.weights, *featurize(messages, self.bits))[0]
+
+    def predict_proba(self, messages: Sequence[str]) -> "np.ndarray":
+        if not messages:
+            return np.zeros((0, len(self.classes)), dtype=np.float32)
+        return _softmax(self.scores(messages))
+
+    def predict(self, messages: Sequence[str], min_confidence: float = MIN_CONFIDENCE) -> List[Optional[ErrorType]]:
+        """Most likely ErrorType per message, or None where the model is not confident enough"""
+        probabilities = self.predict_proba(messages)
+        best = probabilities.argmax(axis=1) if len(probabilities) else []
+        return [self.types[label] if probabilities[row, label] >= min_confidence else None
+                for row, label in enumerate(best)]
+
+    @classmethod
+    def train(cls, messages: Sequence[str], labels: Sequence[str], bits: int = HASH_BITS, epochs: int = 10,
+              batch_size: int = 256, learning_rate: float = 0.5, l2: float = 1e-5, seed: int = 0):
+        """Softmax regression with AdaGrad; only the weight rows a batch touches are updated"""
+        classes = sorted(set(labels))
+        index = {label: i for i, label in enumerate(classes)}
+        targets = np.array([index[label] for label in labels], dtype=np.int64)
+        flat, offsets = featurize(messages, bits)
+        rows = np.split(flat, offsets[1:])
+        weights = np.zeros((1 << bits, len(classes)), dtype=np.float32)
+        squared = np.full_like(weights, 1e-8)
+        rng = np.random.default_rng(seed)
+
+        for _ in range(epochs):
+            order = rng.permutation(len(rows))
+            for start in range(0, len(order), batch_size):
+                chosen = order[start:start + batch_size]
+                batch = [rows[i] for i in chosen]
+                batch_flat = np.concatenate(batch)
+                batch_offsets = np.zeros(len(batch), dtype=np.int64)
+                np.cumsum([len(row) for row in batch[:-1]], out=batch_offsets[1:])
+                scores, lengths = _scores(weights, batch_flat, batch_offsets)
+                probabilities = _softmax(scores)
+                probabilities[np.arange(len(chosen)), targets[chosen]] -= 1.0
+                probabilities /= (np.sqrt(lengths) * len(chosen))[:, None]
+                # Sum the gradient per distinct feature before touching the weights
+                features, inverse = np.unique(batch_flat, return_inverse=True)
+                gradient = np.zeros((len(features), len(classes)), dtype=np.float32)
+                np.add.at(gradient, inverse, np.repeat(probabilities, lengths, axis=0))
+                gradient += l2 * weights[features]
+                squared[features] += gradient * gradient
+                weights[features] -= learning_rate * gradient / np.sqrt(squared[features])
+        return cls(weights, classes, bits)
+
+    def save(self, path: str = DEFAULT_MODEL_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        np.savez_compressed(path, weights=self.weights, classes=np.array(self.classes), bits=self.bits)
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_MODEL_PATH) -> Optional["FallbackClassifier"]:
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            return cls(data["weights"], [str(value) for value in data["classes"]], int(data["bits"]))
+
+
+def load_training_data(path: Optional[str] = None, knowledge_base: Optional[KnowledgeBase] = None
+                       ) -> Tuple[List[str], List[str]]:
+    """Labeled messages from a JSON-lines file and/or the incidents of a knowledge base"""
+    messages, labels = [], []
+    if path:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    messages.append(record["message"])
+                    labels.append(ErrorType(record["error_type"]).value)
+    if knowledge_base is not None:
+        for incident in knowledge_base.incidents:
+            if incident.error_type:
+                messages.append(incident.message)
+                labels.append(incident.error_type)
+    return messages, labels
+
+
+def accuracy(predicted: Iterable[Optional[ErrorType]], expected: Sequence[str], fallback=ErrorType.RUNTIME) -> float:
+    """Share of correct labels, counting an unconfident prediction as the fallback"""
+    hits = sum((label or fallback).value == truth for label, truth in zip(predicted, expected))
+    return hits / len(expected) if expected else 0.0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train or query the fallback error classifier")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    train_parser = subparsers.add_parser("train", help="fit the model on labeled errors")
+    train_parser.add_argument("--data", help="JSON lines of {\"message\", \"error_type\"}")
+    train_parser.add_argument("--from-kb", action="store_true", help="also learn from knowledge-base incidents")
+    train_parser.add_argument("--kb", default=DEFAULT_KB_PATH)
+    train_parser.add_argument("--epochs", type=int, default=10)
+    train_parser.add_argument("--bits", type=int, default=HASH_BITS, help="log2 of the hashed feature space")
+    train_parser.add_argument("--output", default=DEFAULT_MODEL_PATH)
+    predict_parser = subparsers.add_parser("predict", help="classify messages with a trained model")
+    predict_parser.add_argument("messages", nargs="+")
+    predict_parser.add_argument("--model", default=DEFAULT_MODEL_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == "train":
+        knowledge_base = KnowledgeBase(args.kb) if args.from_kb else None
+        messages, labels = load_training_data(args.data, knowledge_base)
+        if len(set(labels)) < 2:
+            print("❌ Need labeled examples of at least two error types (--data and/or --from-kb)", file=sys.stderr)
+            return None
+        model = FallbackClassifier.train(messages, labels, bits=args.bits, epochs=args.epochs)
+        model.save(args.output)
+        print(f"✅ Trained on {len(messages)} messages ({', '.join(model.classes)}); "
+              f"training accuracy {accuracy(model.predict(messages), labels):.1%}; saved to {args.output}")
+        return model
+
+    model = FallbackClassifier.load(args.model)
+    if model is None:
+        print(f"❌ No model at {args.model}; run: python3 error_model.py train --data ...", file=sys.stderr)
+        return None
+    for message, probabilities in zip(args.messages, model.predict_proba(args.messages)):
+        label = int(probabilities.argmax())
+        print(f"{model.classes[label]:<14} {probabilities[label]:.2f}  {message}")
+    return model
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Error Engine Fuzz - Worst-case analysis time of the error handler on hostile input
+
+Two parts, both against ErrorHandlerAgent.analyze_error (built-in rules and the
+terminal rule pack):
+
+    adversarial  inputs built to make backtracking regexes quadratic (a minified
+                 bundle with no colon, "package " repeated with no " not found",
+                 "error: " followed by megabytes), timed at growing sizes
+    fuzz         random mixes of the fragments the rules and location patterns
+                 look for, at random sizes
+
+Every analysis must finish within --budget-ms, and the time for the largest
+adversarial input may be at most --max-growth times the time for a 64 KB one
+(the analyzed text is capped, so the time should flatten). The exit status is 1
+if any check fails.
+
+    python3 fuzz_error_engine.py
+    python3 fuzz_error_engine.py --max-mb 16 --iterations 500 --json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from error_handler import ErrorHandlerAgent  # noqa: E402
+from diagnose_terminal import create_terminal_agent  # noqa: E402
+
+
+def _repeat(unit, size):
+    return (unit * (size // len(unit) + 1))[:size]
+
+
+ADVERSARIAL = {
+    "minified bundle, no colon": lambda size: _repeat("function(a,b){return a+b};var x=", size),
+    "colons, no line numbers": lambda size: _repeat("webpack-internal:abc:", size),
+    "'package' without 'not found'": lambda size: _repeat("package foo ", size),
+    "'error: ' then one long line": lambda size: "error: " + _repeat("y", size),
+    "'at ' frames without colon": lambda size: _repeat("at anonymous ", size),
+    "'File \"' without closing": lambda size: _repeat('File "', size),
+    "match only at the very end": lambda size: _repeat("x", size) + " ModuleNotFoundError: src/a.py:3:1",
+    "case-folding expansion": lambda size: _repeat("İ", size) + " permission denied",
+}
+
+# Pieces of the built-in and terminal patterns, so random inputs keep almost matching
+FRAGMENTS = ["error: ", "package ", " not found", ":", "::", "at ", "File \"", "\", line ", "12", "3:",
+             "permission denied", "ModuleNotFoundError", "EADDRINUSE", "npm", "node", "timeout",
+             "src/app/page.tsx", "\n", " ", "x", "yyyyyyyy", "İ", "é", "(", ")", "webpack"]
+
+
+def time_analysis(agent, message):
+    start = time.perf_counter()
+    context = agent.analyze_error(message)
+    report = agent.generate_report(context)
+    elapsed = time.perf_counter() - start
+    json.dumps(report)
+    return elapsed, context
+
+
+def run_adversarial(agents, sizes, budget_ms, max_growth):
+    results, failures = [], []
+    for name, build in ADVERSARIAL.items():
+        for agent_name, agent in agents.items():
+            timings = {}
+            for size in sizes:
+                elapsed, context = time_analysis(agent, build(size))
+                timings[size] = round(elapsed * 1000, 2)
+                if elapsed * 1000 > budget_ms:
+                    failures.append(f"{name} [{agent_name}] at {size:,} chars took {elapsed * 1000:.1f}ms")
+            base = max(timings[sizes[0]], 0.05)
+            growth = round(timings[sizes[-1]] / base, 1)
+            if growth > max_growth:
+                failures.append(f"{name} [{agent_name}] grew {growth}x from {sizes[0]:,} to {sizes[-1]:,} chars")
+            results.append({"input": name, "agent": agent_name, "ms_by_size": timings, "growth": growth,
+                            "reported_chars": len(context.error_message)})
+    return results, failures
+
+
+def run_fuzz(agents, iterations, max_size, budget_ms, seed):
+    rng = random.Random(seed)
+    slowest, failures = [], []
+    for i in range(iterations):
+        size = int(max_size ** rng.random())
+        parts, length = [], 0
+        while length < size:
+            fragment = rng.choice(FRAGMENTS) * rng.choice((1, 1, 1, 8, 64))
+            parts.append(fragment)
+            length += len(fragment)
+        message = "".join(parts)
+        for agent_name, agent in agents.items():
+            try:
+                elapsed, _ = time_analysis(agent, message)
+            except Exception as e:  # noqa: BLE001 - any crash on fuzz input is a finding
+                failures.append(f"iteration {i} [{agent_name}] raised {type(e).__name__}: {e}")
+                continue
+            slowest.append((elapsed, len(message), agent_name, i))
+            if elapsed * 1000 > budget_ms:
+                failures.append(f"iteration {i} [{agent_name}] {len(message):,} chars took {elapsed * 1000:.1f}ms")
+    slowest.sort(reverse=True)
+    return [{"ms": round(elapsed * 1000, 2), "chars": chars, "agent": agent_name, "iteration": i}
+            for elapsed, chars, agent_name, i in slowest[:5]], failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check that error analysis time stays bounded on hostile input")
+    parser.add_argument("--max-mb", type=float, default=4.0, help="largest adversarial input")
+    parser.add_argument("--iterations", type=int, default=200, help="random fuzz inputs")
+    parser.add_argument("--fuzz-max-kb", type=int, default=512, help="largest random input")
+    parser.add_argument("--budget-ms", type=float, default=250.0, help="slowest acceptable single analysis")
+    parser.add_argument("--max-growth", type=float, default=8.0,
+                        help="allowed time ratio between the largest and the 64 KB adversarial input")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    agents = {"built-in": ErrorHandlerAgent(), "terminal": create_terminal_agent()}
+    sizes = [64 * 1024, 256 * 1024, 1024 * 1024]
+    sizes += [size for size in (4 * 1024 * 1024, 16 * 1024 * 1024) if size <= args.max_mb * 1024 * 1024]
+    adversarial, adversarial_failures = run_adversarial(agents, sizes, args.budget_ms, args.max_growth)
+    slowest, fuzz_failures = run_fuzz(agents, args.iterations, args.fuzz_max_kb * 1024, args.budget_ms, args.seed)
+    failures = adversarial_failures + fuzz_failures
+    results = {"adversarial": adversarial, "fuzz_slowest": slowest, "failures": failures}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print("🧨 Error Engine Fuzz")
+        print("=" * 72)
+        print(f"{'input':<32} {'agent':<9} " + " ".join(f"{size // 1024:>7}K" for size in sizes) + "  growth")
+        for result in adversarial:
+            print(f"{result['input']:<32} {result['agent']:<9} "
+                  + " ".join(f"{result['ms_by_size'][size]:>6}ms" for size in sizes) + f"  x{result['growth']}")
+        print(f"\nFuzz: {args.iterations} inputs up to {args.fuzz_max_kb} KB; slowest:")
+        for entry in slowest:
+            print(f"  {entry['ms']:>8}ms  {entry['chars']:>9,} chars  [{entry['agent']}] iteration {entry['iteration']}")
+        if failures:
+            print(f"\n❌ {len(failures)} check(s) failed:")
+            for failure in failures:
+                print(f"  - {failure}")
+        else:
+            print(f"\n✅ Every analysis finished within {args.budget_ms:.0f}ms")
+    if failures:
+        sys.exit(1)
+    return results
+
+
+if __name__ == "__main__":
+    main()
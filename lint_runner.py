@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Lint runner - ESLint through `next lint`, cached, sharded across processes, merged from JSON
+
+Each run passes explicit --file arguments, so a change lints only its own files. A
+full run lints every source file under src/, split into shards by a stable hash of the
+path; the shards run as concurrent `next lint` processes. Each shard keeps its own
+ESLint cache under .agent-cache/eslint/ (content strategy, so a checkout that only
+touches mtimes does not invalidate it). Concurrent processes never share a cache
+file, and a file always lands in the same shard and so finds its cache entry again.
+
+Every shard writes ESLint's JSON formatter output to its own file. The shards are merged
+into one report with per-file diagnostics.
+
+In front of all that, .agent-cache/eslint/results.json keeps each file's content hash
+and diagnostics under a hash of the lint configuration. A file whose content hash
+matches is not handed to ESLint at all, and a run where every file matches starts no
+process.
+
+    python3 lint_runner.py                      # whole project, one shard per CPU
+    python3 lint_runner.py src/app/page.tsx     # just these files
+"""
+
+import os
+import sys
+import json
+import time
+import zlib
+import hashlib
+import argparse
+import subprocess
+from typing import Dict, List, NamedTuple, Optional
+
+from module_resolver import ModuleResolver
+from process_usage import ProcessAccounting
+from result_sink import write_json_atomic
+
+DEFAULT_CACHE_DIR = os.path.join(".agent-cache", "eslint")
+# Below this many files per shard, another process costs more than it saves
+MIN_FILES_PER_SHARD = 50
+MAX_DIAGNOSTICS_PER_FILE = 20
+SHARD_TIMEOUT = 120
+# Besides .eslintrc* and eslint.config.*: plugin versions and the TypeScript setup rules read
+CONFIG_FILES = ("package-lock.json", "tsconfig.json", ".eslintignore")
+
+
+class LintReport(NamedTuple):
+    files: int
+    errors: int
+    warnings: int
+    diagnostics: Dict[str, List[str]]  # file -> ["12:5 error no-unused-vars 'x' is defined but never used"]
+    shards: int
+    failures: List[str]  # shards that produced no JSON, with what they printed
+    seconds: float
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors and not self.failures
+
+    def to_dict(self) -> Dict:
+        return {"files": self.files, "errors": self.errors, "warnings": self.warnings, "shards": self.shards,
+                "seconds": round(self.seconds, 2), "diagnostics": self.diagnostics, "failures": self.failures}
+
+
+def shard_of(path: str, shards: int) -> int:
+    """Stable across runs and machines, unlike hash()"""
+    return zlib.crc32(path.encode()) % shards
+
+
+def lintable_files(root: str = ".") -> List[str]:
+    resolver = ModuleResolver(root)
+    return sorted(os.path.relpath(path, resolver.root) for path in resolver.source_files("src"))
+
+
+def _command(files: List[str], cache_location: str, output_file: str) -> List[str]:
+    command = ["npm", "run", "lint", "--", "--cache-location", cache_location, "--cache-strategy", "content",
+               "--format", "json", "--output-file", output_file]
+    for path in files:
+        command += ["--file", path]
+    return command
+
+
+def _file_results(results: List[Dict], root: str) -> Dict[str, List]:
+    """ESLint JSON results as {file: [errors, warnings, diagnostics]}"""
+    by_file = {}
+    for result in results:
+        path = os.path.relpath(result.get("filePath", "?"), root)
+        entries = []
+        for message in result.get("messages", [])[:MAX_DIAGNOSTICS_PER_FILE]:
+            severity = "error" if message.get("severity") == 2 or message.get("fatal") else "warning"
+            entries.append(f"{message.get('line', 0)}:{message.get('column', 0)} {severity} "
+                           f"{message.get('ruleId') or 'parse'} {message.get('message', '').strip()}")
+        by_file[path] = [result.get("errorCount", 0) + result.get("fatalErrorCount", 0),
+                         result.get("warningCount", 0), entries]
+    return by_file
+
+
+def _digest(path: str) -> Optional[str]:
+    try:
+        with open(path, "rb") as f:
+            return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+    except OSError:
+        return None
+
+
+def config_digest(root: str) -> str:
+    """Changes to any of these can change every file's diagnostics"""
+    digest = hashlib.blake2b(digest_size=16)
+    for name in sorted(os.listdir(root)):
+        if name in CONFIG_FILES or name.startswith((".eslintrc", "eslint.config.")):
+            digest.update(name.encode() + b"\0" + (_digest(os.path.join(root, name)) or "").encode())
+    return digest.hexdigest()
+
+
+def _load_results_cache(path: str, config: str) -> Dict[str, List]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return cache.get("files", {}) if cache.get("config") == config else {}
+
+
+def run_lint(files: Optional[List[str]] = None, root: str = ".", shards: Optional[int] = None,
+             cache_dir: str = DEFAULT_CACHE_DIR, timeout: float = SHARD_TIMEOUT,
+             accounting: Optional[ProcessAccounting] = None) -> LintReport:
+    """Lint files (every source file under src/ if None) in cached shards and merge the results
+
+    files may be absolute or relative to the working directory; they are cached, sharded
+    and reported relative to root, so ./src/a.ts and src/a.ts are the same file.
+    With an accounting, the shards are started through it and their usage lands there.
+    """
+    start = time.perf_counter()
+    root = os.path.abspath(root)
+    if files is not None:
+        files = sorted({os.path.relpath(os.path.abspath(path), root) for path in files})
+    else:
+        files = lintable_files(root)
+    if not files:
+        return LintReport(0, 0, 0, {}, 0, [], time.perf_counter() - start)
+
+    # Files whose content and lint configuration are unchanged keep their last results
+    cache_root = os.path.join(root, cache_dir)
+    os.makedirs(cache_root, exist_ok=True)
+    results_path = os.path.join(cache_root, "results.json")
+    config = config_digest(root)
+    cached = _load_results_cache(results_path, config)
+    digests = {path: _digest(os.path.join(root, path)) for path in files}
+    by_file = {path: cached[path][1:] for path in files if path in cached and cached[path][0] == digests[path]}
+    stale = [path for path in files if path not in by_file]
+
+    if shards is None:
+        shards = max(1, min(os.cpu_count() or 1, len(stale) // MIN_FILES_PER_SHARD))
+    groups: Dict[int, List[str]] = {}
+    for path in stale:
+        groups.setdefault(shard_of(path, shards), []).append(path)
+
+    popen = accounting.popen if accounting is not None else subprocess.Popen
+    running = []
+    for shard, group in sorted(groups.items()):
+        # The cache is per shard count too: with another count the same file lands in another shard
+        cache_location = os.path.join(cache_root, f"cache-{shard}-of-{shards}")
+        output_file = os.path.join(cache_root, f"results-{shard}-of-{shards}.json")
+        if os.path.exists(output_file):
+            os.remove(output_file)
+        process = popen(_command(group, cache_location, output_file), cwd=root,
+                        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        running.append((shard, group, process, output_file))
+
+    failures = []
+    deadline = time.monotonic() + timeout
+    for shard, group, process, output_file in running:
+        try:
+            output, _ = process.communicate(timeout=max(0.0, deadline - time.monotonic()))
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.communicate()
+            failures.append(f"shard {shard}: timed out after {timeout:.0f}s")
+            continue
+        try:
+            with open(output_file, encoding="utf-8") as f:
+                results = _file_results(json.load(f), root)
+        except (OSError, ValueError):
+            # ESLint crashed or never started: its own output is the only clue
+            failures.append(f"shard {shard} (exit {process.returncode}): {output.strip()[-2000:]}")
+            continue
+        for path in group:
+            # Files ESLint ignores have no result and nothing to report
+            by_file[path] = results.get(path, [0, 0, []])
+            cached[path] = [digests[path]] + by_file[path]
+
+    if running:
+        write_json_atomic(results_path, {"config": config, "files": cached}, separators=(",", ":"))
+    diagnostics = {path: entries for path, (_, _, entries) in sorted(by_file.items()) if entries}
+    return LintReport(len(files), sum(result[0] for result in by_file.values()),
+                      sum(result[1] for result in by_file.values()), diagnostics, len(running), failures,
+                      time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run ESLint cached and sharded, and print merged diagnostics")
+    parser.add_argument("files", nargs="*", help="files to lint (default: every source file under src/)")
+    parser.add_argument("--shards", type=int, help="concurrent ESLint processes (default: one per CPU)")
+    parser.add_argument("--json", action="store_true", help="print the merged report as JSON")
+    args = parser.parse_args(argv)
+
+    report = run_lint(args.files or None, shards=args.shards)
+    if args.json:
+        print(json.dumps(report.to_dict(), indent=2))
+    else:
+        print(f"🧹 {report.files} files linted in {report.shards} shard(s) in {report.seconds:.1f}s: "
+              f"{report.errors} errors, {report.warnings} warnings")
+        for path, entries in sorted(report.diagnostics.items()):
+            print(f"  {path}")
+            for entry in entries:
+                print(f"    {entry}")
+        for failure in report.failures:
+            print(f"  ❌ {failure}")
+    if not report.ok:
+        sys.exit(1)
+    return report
+
+
+if __name__ == "__main__":
+    main()
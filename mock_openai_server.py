@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Mock OpenAI Server - Local stand-in for chat.completions.create
+
+Point the app at it instead of api.openai.com (the OpenAI SDK reads OPENAI_BASE_URL):
+
+    python3 mock_openai_server.py --port 8787 &
+    OPENAI_BASE_URL=http://127.0.0.1:8787/v1 OPENAI_API_KEY=mock npm run dev
+
+Latency, token rate, completion length and injected errors are set on the command
+line or changed at runtime with POST /mock/config, so one running dev server can be
+benchmarked under different upstream conditions. GET /mock/stats reports counters.
+Requests with "stream": true get chat.completion.chunk SSE events paced at tokens_per_sec.
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FILLER_WORDS = ("the", "component", "renders", "state", "hook", "returns", "props", "value",
+                "async", "function", "terminal", "editor", "file", "tree", "update", "cache")
+
+
+class MockConfig:
+    """Upstream behaviour; every field can be changed while the server runs"""
+
+    FIELDS = {
+        "latency_ms": float,         # time before the first token
+        "tokens_per_sec": float,     # generation speed; 0 means instant
+        "completion_tokens": int,    # tokens per response
+        "error_rate": float,         # fraction of requests answered with error_status
+        "error_status": int,
+        "jitter_ms": float,          # uniform random extra latency
+    }
+
+    def __init__(self, **values):
+        self.latency_ms = 0.0
+        self.tokens_per_sec = 0.0
+        self.completion_tokens = 50
+        self.error_rate = 0.0
+        self.error_status = 500
+        self.jitter_ms = 0.0
+        self.update(values)
+
+    def update(self, values):
+        for name, value in values.items():
+            if name not in self.FIELDS:
+                raise ValueError(f"unknown mock setting: {name}")
+            setattr(self, name, self.FIELDS[name](value))
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+
+class MockStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.injected_errors = 0
+        self.completion_tokens = 0
+
+    def record(self, tokens=0, error=False):
+        with self.lock:
+            self.requests += 1
+            self.completion_tokens += tokens
+            self.injected_errors += int(error)
+
+    def as_dict(self):
+        with self.lock:
+            return {"requests": self.requests, "injected_errors": self.injected_errors,
+                    "completion_tokens": self.completion_tokens}
+
+
+def count_prompt_tokens(messages):
+    # Whitespace words are close enough to tokens for load testing
+    return sum(len(str(message.get("content", "")).split()) for message in messages)
+
+
+def generate_tokens(count):
+    return [random.choice(FILLER_WORDS) + " " for _ in range(count)]
+
+
+class MockOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "MockOpenAI/1.0"
+    # Headers and body go out in separate writes; with Nagle on, delayed ACKs add ~40ms per response
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass  # per-request logging would dominate the timings being measured
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_GET(self):
+        if self.path == "/mock/stats":
+            self._send_json(200, {"config": self.server.config.as_dict(), "stats": self.server.stats.as_dict()})
+        elif self.path.rstrip("/").endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": "gpt-4o-mini", "object": "model"}]})
+        else:
+            self._send_json(404, {"error": {"message": f"No route for GET {self.path}", "type": "invalid_request_error"}})
+
+    def do_POST(self):
+        try:
+            payload = self._read_json()
+        except ValueError:
+            self._send_json(400, {"error": {"message": "Invalid JSON body", "type": "invalid_request_error"}})
+            return
+
+        if self.path == "/mock/config":
+            try:
+                self.server.config.update(payload)
+            except (ValueError, TypeError) as e:
+                self._send_json(400, {"error": {"message": str(e), "type": "invalid_request_error"}})
+                return
+            self._send_json(200, self.server.config.as_dict())
+        elif self.path.rstrip("/").endswith("/chat/completions"):
+            self._chat_completion(payload)
+        else:
+            self._send_json(404, {"error": {"message": f"No route for POST {self.path}", "type": "invalid_request_error"}})
+
+    def _chat_completion(self, payload):
+        config = self.server.config
+        messages = payload.get("messages") or []
+        if not isinstance(messages, list):
+            self._send_json(400, {"error": {"message": "messages must be an array", "type": "invalid_request_error"}})
+            return
+
+        time.sleep((config.latency_ms + random.uniform(0, config.jitter_ms)) / 1000)
+        if config.error_rate and random.random() < config.error_rate:
+            self.server.stats.record(error=True)
+            self._send_json(config.error_status, {"error": {
+                "message": "Injected failure from mock OpenAI server",
+                "type": "rate_limit_error" if config.error_status == 429 else "server_error",
+                "code": None,
+            }})
+            return
+
+        token_count = config.completion_tokens
+        if payload.get("max_tokens"):
+            token_count = min(token_count, int(payload["max_tokens"]))
+        tokens = generate_tokens(token_count)
+        prompt_tokens = count_prompt_tokens(messages)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(tokens),
+            "total_tokens": prompt_tokens + len(tokens),
+        }
+        completion_id = f"chatcmpl-mock-{random.getrandbits(48):012x}"
+        model = payload.get("model", "gpt-4o-mini")
+        if payload.get("stream"):
+            include_usage = bool((payload.get("stream_options") or {}).get("include_usage"))
+            self._stream_completion(completion_id, model, tokens, usage if include_usage else None)
+            self.server.stats.record(tokens=len(tokens))
+            return
+
+        if config.tokens_per_sec:
+            time.sleep(len(tokens) / config.tokens_per_sec)
+        self.server.stats.record(tokens=len(tokens))
+        self._send_json(200, {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "".join(tokens).strip()},
+                "finish_reason": "stop",
+            }],
+            "usage": usage,
+        })
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+
+    def _stream_completion(self, completion_id, model, tokens, usage):
+        """Send chat.completion.chunk events paced at tokens_per_sec, like stream: true upstream"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        created = int(time.time())
+
+        def event(delta, finish_reason=None, **extra):
+            chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                     "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}] if delta is not None else [],
+                     **extra}
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode())
+
+        interval = 1 / self.server.config.tokens_per_sec if self.server.config.tokens_per_sec else 0
+        try:
+            event({"role": "assistant", "content": ""})
+            for token in tokens:
+                if interval:
+                    time.sleep(interval)
+                event({"content": token})
+            event({}, finish_reason="stop")
+            if usage:
+                event(None, usage=usage)
+            self._write_chunk(b"data: [DONE]\n\n")
+            self._write_chunk(b"")
+        except (BrokenPipeError, ConnectionResetError):
+            # Client aborted mid-stream; nothing left to send it
+            self.close_connection = True
+
+
+class MockOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config=None):
+        super().__init__(address, MockOpenAIHandler)
+        self.config = config or MockConfig()
+        self.stats = MockStats()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+
+def start_in_thread(host="127.0.0.1", port=0, **config):
+    """Start a mock server on a background thread (port 0 picks a free port)"""
+    server = MockOpenAIServer((host, port), MockConfig(**config))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible chat completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="delay before the first token")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="uniform random extra delay")
+    parser.add_argument("--tokens-per-sec", type=float, default=0.0, help="generation speed (0 = instant)")
+    parser.add_argument("--completion-tokens", type=int, default=50, help="tokens per completion")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=500, help="HTTP status for injected failures")
+    args = parser.parse_args(argv)
+
+    config = MockConfig(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, tokens_per_sec=args.tokens_per_sec,
+                        completion_tokens=args.completion_tokens, error_rate=args.error_rate,
+                        error_status=args.error_status)
+    server = MockOpenAIServer((args.host, args.port), config)
+    print(f"🤖 Mock OpenAI server at {server.base_url} {json.dumps(config.as_dict())}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Module resolver - Resolve every import in src/ the way TypeScript and Next.js do, and report the ones that fail
+
+Specifiers are read from import/export ... from, side-effect imports, import() and
+require(), skipping comments and string literals. Each resolves like moduleResolution
+"bundler":
+
+    ./x, ../x    relative to the importing file
+    @/x          through tsconfig.json compilerOptions.paths (and baseUrl)
+    react, a/b   a package in the nearest node_modules, and the subpath through its
+                 "exports" map or as a file; node builtins and node: always resolve
+
+A path resolves as itself, with each source extension, as a directory index, or (for
+"./x.js") as the TypeScript file it is compiled from. Every existence check is a
+lookup in a memoized directory listing, so a directory costs one scandir however
+many specifiers probe it.
+
+Without node_modules, package imports are checked against package.json's declared
+dependencies instead.
+
+    python3 module_resolver.py
+    python3 module_resolver.py --json
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+SOURCE_EXTENSIONS = (".ts", ".tsx", ".js", ".jsx", ".mjs", ".cjs")
+# Probed in this order after the specifier itself, as TypeScript does
+RESOLVE_EXTENSIONS = (".ts", ".tsx", ".d.ts", ".js", ".jsx", ".mjs", ".cjs", ".json")
+# "./x.js" in TypeScript source names x.ts
+COMPILED_EXTENSIONS = {".js": (".ts", ".tsx"), ".jsx": (".tsx",), ".mjs": (".mts",), ".cjs": (".cts",)}
+# One scan over the source: comments and string literals are matched (and skipped) as whole
+# tokens, so specifier-like text inside them is never read as an import. A static import or
+# re-export must start a line and reach "from" through an import clause (default name,
+# {names} or * as name), so "from '...'" elsewhere in a statement is not taken for one.
+IMPORT = re.compile(r"""
+    //[^\n]*
+  | /\*.*?\*/
+  | ^[ \t]*(?:import|export)\b(?:\s*type\b)?\s*(?:[\w$]+\s*,?\s*)?(?:\{[^}]*\}|\*\s*(?:as\s+[\w$]+)?)?
+    \s*from\s*['"]([^'"\n]+)['"]
+  | ^[ \t]*import\s*['"]([^'"\n]+)['"]
+  | \b(?:import|require)\s*\(\s*['"]([^'"\n]+)['"]\s*\)
+  | '(?:[^'\\\n]|\\.)*'
+  | "(?:[^"\\\n]|\\.)*"
+  | `(?:[^`\\]|\\.)*`
+""", re.M | re.S | re.X)
+NODE_BUILTINS = frozenset((
+    "assert", "async_hooks", "buffer", "child_process", "cluster", "console", "constants", "crypto", "dgram",
+    "diagnostics_channel", "dns", "domain", "events", "fs", "fs/promises", "http", "http2", "https", "inspector",
+    "module", "net", "os", "path", "path/posix", "path/win32", "perf_hooks", "process", "punycode", "querystring",
+    "readline", "repl", "stream", "stream/promises", "stream/web", "string_decoder", "timers", "timers/promises",
+    "tls", "trace_events", "tty", "url", "util", "util/types", "v8", "vm", "wasi", "worker_threads", "zlib",
+))
+
+
+class ImportIssue(NamedTuple):
+    file: str
+    line: int
+    specifier: str
+    reason: str
+
+
+def iter_imports(text: str) -> Iterator[Tuple[int, str]]:
+    """(line, specifier) of every import in a source file"""
+    line, position = 1, 0
+    for match in IMPORT.finditer(text):
+        specifier = match.group(1) or match.group(2) or match.group(3)
+        if specifier is None:
+            continue  # a comment or a string literal
+        line += text.count("\n", position, match.start())
+        position = match.start()
+        yield line, specifier
+
+
+def _load_jsonc(path: str) -> Dict:
+    """tsconfig.json allows comments and trailing commas"""
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    try:
+        return json.loads(text)
+    except ValueError:
+        text = re.sub(r"/\*.*?\*/|^\s*//.*$", "", text, flags=re.S | re.M)
+        return json.loads(re.sub(r",(\s*[}\]])", r"\1", text))
+
+
+def package_name(specifier: str) -> str:
+    """react-dom/client -> react-dom, @scope/pkg/sub -> @scope/pkg"""
+    parts = specifier.split("/")
+    return "/".join(parts[:2]) if specifier.startswith("@") else parts[0]
+
+
+class ModuleResolver:
+    """Resolves specifiers to files with one cached directory listing per directory"""
+
+    def __init__(self, root: str = "."):
+        self.root = os.path.abspath(root)
+        self.listings: Dict[str, Optional[Dict[str, bool]]] = {}
+        self.package_exports: Dict[str, Optional[Dict]] = {}
+        self.resolved: Dict[Tuple[str, str], Tuple[Optional[str], str]] = {}
+        self.scans = 0
+        self.aliases: List[Tuple[str, List[str]]] = []
+        self.base_url = self.root
+        self._read_tsconfig()
+        self.declared = self._declared_packages()
+
+    def _read_tsconfig(self):
+        try:
+            options = _load_jsonc(os.path.join(self.root, "tsconfig.json")).get("compilerOptions", {})
+        except (OSError, ValueError):
+            return
+        self.base_url = os.path.normpath(os.path.join(self.root, options.get("baseUrl", ".")))
+        for pattern, targets in options.get("paths", {}).items():
+            self.aliases.append((pattern, targets))
+        # Longest prefix first, as TypeScript picks the most specific pattern
+        self.aliases.sort(key=lambda alias: -len(alias[0].split("*", 1)[0]))
+
+    def _declared_packages(self) -> frozenset:
+        try:
+            with open(os.path.join(self.root, "package.json"), encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return frozenset()
+        names = set()
+        for field in ("dependencies", "devDependencies", "peerDependencies", "optionalDependencies"):
+            names.update(manifest.get(field, {}))
+        return frozenset(names)
+
+    def listing(self, directory: str) -> Optional[Dict[str, bool]]:
+        """{name: is_dir} of a directory, or None if it does not exist; scanned once"""
+        entries = self.listings.get(directory, False)
+        if entries is not False:
+            return entries
+        self.scans += 1
+        try:
+            with os.scandir(directory) as iterator:
+                entries = {entry.name: entry.is_dir() for entry in iterator}
+        except OSError:
+            entries = None
+        self.listings[directory] = entries
+        return entries
+
+    def is_dir(self, path: str) -> bool:
+        directory, name = os.path.split(path)
+        entries = self.listing(directory)
+        return entries is not None and entries.get(name) is True
+
+    def resolve_path(self, base: str) -> Optional[str]:
+        """base as a file, with an extension, as a directory index, or as the source of a compiled name"""
+        directory, name = os.path.split(base)
+        entries = self.listing(directory)
+        if not entries:
+            return None
+        # Probe the parent's listing directly: one split per base, not one per extension
+        if entries.get(name) is False:
+            return base
+        stem, extension = os.path.splitext(name)
+        for source_extension in COMPILED_EXTENSIONS.get(extension, ()):
+            if entries.get(stem + source_extension) is False:
+                return os.path.join(directory, stem + source_extension)
+        for extension in RESOLVE_EXTENSIONS:
+            if entries.get(name + extension) is False:
+                return base + extension
+        if entries.get(name) is True:
+            index_entries = self.listing(base) or {}
+            for extension in RESOLVE_EXTENSIONS:
+                if index_entries.get("index" + extension) is False:
+                    return os.path.join(base, "index" + extension)
+        return None
+
+    def _alias_bases(self, specifier: str) -> Optional[List[str]]:
+        for pattern, targets in self.aliases:
+            prefix, star, suffix = pattern.partition("*")
+            if star and specifier.startswith(prefix) and specifier.endswith(suffix) \
+                    and len(specifier) >= len(prefix) + len(suffix):
+                matched = specifier[len(prefix):len(specifier) - len(suffix)]
+                return [os.path.normpath(os.path.join(self.base_url, target.replace("*", matched)))
+                        for target in targets]
+            if not star and specifier == pattern:
+                return [os.path.normpath(os.path.join(self.base_url, target)) for target in targets]
+        return None
+
+    def _exports(self, package_dir: str) -> Optional[Dict]:
+        if package_dir not in self.package_exports:
+            exports = None
+            try:
+                with open(os.path.join(package_dir, "package.json"), encoding="utf-8") as f:
+                    exports = json.load(f).get("exports")
+            except (OSError, ValueError):
+                pass
+            if isinstance(exports, (str, list)) or (isinstance(exports, dict)
+                                                    and not any(key.startswith(".") for key in exports)):
+                # Sugar for {".": ...}
+                exports = {".": exports}
+            self.package_exports[package_dir] = exports
+        return self.package_exports[package_dir]
+
+    def _resolve_package(self, importer_dir: str, specifier: str) -> Tuple[Optional[str], str]:
+        name = package_name(specifier)
+        subpath = specifier[len(name):]
+        directory = importer_dir
+        while True:
+            package_dir = os.path.join(directory, "node_modules", name)
+            if self.is_dir(package_dir):
+                break
+            parent = os.path.dirname(directory)
+            if parent == directory:
+                if self.listing(os.path.join(self.root, "node_modules")) is None and name in self.declared:
+                    # Nothing is installed; a declared package is the best available answer
+                    return f"<declared {name}>", ""
+                return None, f"package '{name}' is not installed" + (
+                    "" if name in self.declared else " and not declared in package.json")
+            directory = parent
+
+        if not subpath:
+            return package_dir, ""
+        exports = self._exports(package_dir)
+        if exports is not None:
+            key = "." + subpath
+            if key in exports:
+                return package_dir, ""
+            for pattern in exports:
+                prefix, star, suffix = pattern.partition("*")
+                if star and key.startswith(prefix) and key.endswith(suffix):
+                    return package_dir, ""
+            return None, f"'{key}' is not exported by {name}"
+        resolved = self.resolve_path(os.path.join(package_dir, subpath.lstrip("/")))
+        return resolved, "" if resolved else f"no file for '{subpath.lstrip('/')}' in {name}"
+
+    def resolve(self, importer: str, specifier: str) -> Tuple[Optional[str], str]:
+        """(resolved path, "") or (None, why not) for a specifier in the file importer"""
+        importer_dir = os.path.dirname(importer)
+        key = (importer_dir, specifier) if specifier.startswith(".") else ("", specifier)
+        if key in self.resolved:
+            return self.resolved[key]
+        result = self._resolve(importer_dir, specifier)
+        self.resolved[key] = result
+        return result
+
+    def _resolve(self, importer_dir: str, specifier: str) -> Tuple[Optional[str], str]:
+        specifier = specifier.split("?", 1)[0]
+        if specifier.startswith(("./", "../")) or specifier in (".", ".."):
+            resolved = self.resolve_path(os.path.normpath(os.path.join(importer_dir, specifier)))
+            return resolved, "" if resolved else "no such file"
+        if specifier.startswith("/"):
+            resolved = self.resolve_path(specifier)
+            return resolved, "" if resolved else "no such file"
+        bases = self._alias_bases(specifier)
+        if bases is not None:
+            for base in bases:
+                resolved = self.resolve_path(base)
+                if resolved:
+                    return resolved, ""
+            return None, "no file for the tsconfig path alias"
+        if specifier.startswith("node:") or specifier in NODE_BUILTINS:
+            return f"<builtin {specifier}>", ""
+        return self._resolve_package(importer_dir, specifier)
+
+    def source_files(self, source_dir: str = "src") -> List[str]:
+        """Every source file under source_dir, walked through the listing cache"""
+        files = []
+        pending = [os.path.join(self.root, source_dir)]
+        while pending:
+            directory = pending.pop()
+            for name, is_dir in sorted((self.listing(directory) or {}).items()):
+                path = os.path.join(directory, name)
+                if is_dir:
+                    if name != "node_modules" and not name.startswith("."):
+                        pending.append(path)
+                elif name.endswith(SOURCE_EXTENSIONS) and not name.endswith(".d.ts"):
+                    files.append(path)
+        return files
+
+    def check(self, source_dir: str = "src") -> Tuple[List[ImportIssue], Dict]:
+        """Unresolved imports across source_dir, and counts for the report"""
+        start = time.perf_counter()
+        issues, specifiers = [], 0
+        files = self.source_files(source_dir)
+        for path in files:
+            try:
+                with open(path, encoding="utf-8", errors="replace") as f:
+                    text = f.read()
+            except OSError:
+                continue
+            relative = None
+            for line, specifier in iter_imports(text):
+                specifiers += 1
+                resolved, reason = self.resolve(path, specifier)
+                if resolved is None:
+                    relative = relative or os.path.relpath(path, self.root)
+                    issues.append(ImportIssue(relative, line, specifier, reason))
+        stats = {"files": len(files), "specifiers": specifiers, "unresolved": len(issues),
+                 "directory_scans": self.scans, "seconds": round(time.perf_counter() - start, 3)}
+        return issues, stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report imports in src/ that do not resolve")
+    parser.add_argument("--root", default=".", help="project directory")
+    parser.add_argument("--src", default="src", help="source directory to check")
+    parser.add_argument("--json", action="store_true", help="print issues and counts as JSON")
+    args = parser.parse_args(argv)
+
+    issues, stats = ModuleResolver(args.root).check(args.src)
+    if args.json:
+        print(json.dumps({"issues": [issue._asdict() for issue in issues], **stats}, indent=2))
+    else:
+        print(f"🔗 {stats['specifiers']} imports in {stats['files']} files resolved in {stats['seconds'] * 1000:.0f}ms "
+              f"({stats['directory_scans']} directory scans)")
+        for issue in issues:
+            print(f"  ❌ {issue.file}:{issue.line}  '{issue.specifier}'  {issue.reason}")
+        if not issues:
+            print("✅ Every import resolves")
+    if issues:
+        sys.exit(1)
+    return issues, stats
+
+
+if __name__ == "__main__":
+    main()
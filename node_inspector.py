@@ -0,0 +1,400 @@
+"""
+node_inspector - CPU profiles and heap snapshot summaries from a running Node process
+
+Talks the Chrome DevTools Protocol to the inspector on localhost. A node process that
+was not started with --inspect opens the inspector when it receives SIGUSR1, so a
+running `next dev` can be profiled without restarting it.
+
+Heap snapshots of a dev server run to hundreds of megabytes of JSON, so they are
+parsed as they stream in: the node and edge tables go into flat integer arrays and
+only the string table is kept as Python objects.
+"""
+
+import os
+import json
+import time
+import base64
+import signal
+import socket
+import struct
+import http.client
+from array import array
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import procfs
+
+DEFAULT_INSPECTOR_PORT = 9229
+
+# Profile nodes that are not JavaScript functions
+PSEUDO_FUNCTIONS = {"(root)", "(program)", "(idle)", "(garbage collector)"}
+
+
+class InspectorError(Exception):
+    pass
+
+
+def list_targets(port=DEFAULT_INSPECTOR_PORT, host="127.0.0.1", timeout=2.0) -> List[Dict]:
+    connection = http.client.HTTPConnection(host, port, timeout=timeout)
+    try:
+        connection.request("GET", "/json/list")
+        return json.loads(connection.getresponse().read())
+    finally:
+        connection.close()
+
+
+def open_inspector(pid: Optional[int], port=DEFAULT_INSPECTOR_PORT, wait=5.0) -> Dict:
+    """Return the inspector target on port, sending SIGUSR1 to pid first if nothing is listening"""
+    try:
+        return list_targets(port)[0]
+    except (OSError, IndexError, ValueError):
+        if pid is None:
+            raise InspectorError(f"no inspector on 127.0.0.1:{port} and no pid to signal")
+    # SIGUSR1 terminates a process that does not handle it; only node opens an inspector on it
+    if not procfs.is_node_process(pid):
+        raise InspectorError(f"pid {pid} is not a node process; not sending it SIGUSR1")
+    os.kill(pid, signal.SIGUSR1)
+    deadline = time.time() + wait
+    while time.time() < deadline:
+        time.sleep(0.2)
+        try:
+            return list_targets(port)[0]
+        except (OSError, IndexError, ValueError):
+            continue
+    raise InspectorError(f"pid {pid} did not open an inspector on 127.0.0.1:{port} after SIGUSR1")
+
+
+class InspectorSession:
+    """Minimal WebSocket client for one DevTools protocol target"""
+
+    def __init__(self, websocket_url, timeout=60.0):
+        parts = urlsplit(websocket_url)
+        self.sock = socket.create_connection((parts.hostname, parts.port or 80), timeout=timeout)
+        self.reader = self.sock.makefile("rb")
+        self.next_id = 0
+        self.listeners: Dict[str, Callable[[Dict], None]] = {}
+        key = base64.b64encode(os.urandom(16)).decode()
+        self.sock.sendall(
+            f"GET {parts.path} HTTP/1.1\r\nHost: {parts.netloc}\r\nUpgrade: websocket\r\n"
+            f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n".encode()
+        )
+        status_line = self.reader.readline()
+        if b" 101 " not in status_line:
+            raise InspectorError(f"websocket handshake failed: {status_line.decode(errors='replace').strip()}")
+        while self.reader.readline() not in (b"\r\n", b""):
+            pass
+
+    def _send_frame(self, payload: bytes, opcode=0x1):
+        header = bytearray([0x80 | opcode])
+        if len(payload) < 126:
+            header.append(0x80 | len(payload))
+        elif len(payload) < 1 << 16:
+            header.append(0x80 | 126)
+            header += struct.pack(">H", len(payload))
+        else:
+            header.append(0x80 | 127)
+            header += struct.pack(">Q", len(payload))
+        # Client frames must be masked
+        mask = os.urandom(4)
+        masked = bytes(b ^ mask[i % 4] for i, b in enumerate(payload)) if payload else b""
+        self.sock.sendall(bytes(header) + mask + masked)
+
+    def _read_exactly(self, size):
+        data = self.reader.read(size)
+        if data is None or len(data) < size:
+            raise InspectorError("inspector closed the connection")
+        return data
+
+    def _read_message(self) -> str:
+        fragments = []
+        while True:
+            first, second = self._read_exactly(2)
+            opcode, length = first & 0x0F, second & 0x7F
+            if length == 126:
+                length = struct.unpack(">H", self._read_exactly(2))[0]
+            elif length == 127:
+                length = struct.unpack(">Q", self._read_exactly(8))[0]
+            payload = self._read_exactly(length) if length else b""
+            if opcode == 0x8:
+                raise InspectorError("inspector closed the connection")
+            if opcode == 0x9:
+                self._send_frame(payload, opcode=0xA)
+                continue
+            if opcode in (0x0, 0x1, 0x2):
+                fragments.append(payload)
+                if first & 0x80:
+                    return b"".join(fragments).decode("utf-8")
+
+    def call(self, method, **params) -> Dict:
+        """Send a command and wait for its result, dispatching events that arrive meanwhile"""
+        self.next_id += 1
+        request_id = self.next_id
+        self._send_frame(json.dumps({"id": request_id, "method": method, "params": params}).encode())
+        while True:
+            message = json.loads(self._read_message())
+            if message.get("id") == request_id:
+                if "error" in message:
+                    raise InspectorError(f"{method}: {message['error'].get('message')}")
+                return message.get("result", {})
+            listener = self.listeners.get(message.get("method"))
+            if listener:
+                listener(message.get("params", {}))
+
+    def close(self):
+        try:
+            self._send_frame(b"", opcode=0x8)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+def collect_cpu_profile(session: InspectorSession, seconds: float, sampling_interval_us=1000) -> Dict:
+    session.call("Profiler.enable")
+    session.call("Profiler.setSamplingInterval", interval=sampling_interval_us)
+    session.call("Profiler.start")
+    time.sleep(seconds)
+    profile = session.call("Profiler.stop")["profile"]
+    session.call("Profiler.disable")
+    return profile
+
+
+def source_location(call_frame: Dict) -> str:
+    url = call_frame.get("url") or ""
+    for prefix in ("file://", "webpack-internal:///"):
+        if url.startswith(prefix):
+            url = url[len(prefix):]
+    return url
+
+
+def module_group(url: str) -> str:
+    """Bucket a script url: an npm package, node internals, or app source"""
+    if not url:
+        return "(native)"
+    if "node_modules/" in url:
+        package = url.rsplit("node_modules/", 1)[1].split("/")
+        return "/".join(package[:2]) if package[0].startswith("@") else package[0]
+    if url.startswith(("node:", "internal/")) or "/" not in url:
+        return "node internals"
+    return "app"
+
+
+def summarize_cpu_profile(profile: Dict, top=20) -> Dict:
+    """Self and total time per function, and self time per package"""
+    nodes = {node["id"]: node for node in profile["nodes"]}
+    parents = {}
+    for node in profile["nodes"]:
+        for child in node.get("children", ()):
+            parents[child] = node["id"]
+
+    # timeDeltas[i] is the gap before sample i, so it is the time spent in sample i - 1
+    self_us = defaultdict(int)
+    samples, deltas = profile.get("samples", []), profile.get("timeDeltas", [])
+    for i, node_id in enumerate(samples):
+        self_us[node_id] += deltas[i + 1] if i + 1 < len(deltas) else 0
+    total_us = sum(self_us.values()) or 1
+
+    def function_key(node):
+        frame = node["callFrame"]
+        return (frame.get("functionName") or "(anonymous)", source_location(frame), frame.get("lineNumber", -1) + 1)
+
+    functions = defaultdict(lambda: {"self_us": 0, "total_us": 0})
+    groups = defaultdict(int)
+    for node_id, spent in self_us.items():
+        node = nodes[node_id]
+        key = function_key(node)
+        functions[key]["self_us"] += spent
+        groups[module_group(key[1]) if key[0] not in PSEUDO_FUNCTIONS else key[0]] += spent
+        # Each function on the stack gets the time once, even when it recurses
+        seen = set()
+        current = node_id
+        while current is not None:
+            ancestor_key = function_key(nodes[current])
+            if ancestor_key not in seen:
+                seen.add(ancestor_key)
+                functions[ancestor_key]["total_us"] += spent
+            current = parents.get(current)
+
+    def entry(key, stats):
+        name, url, line = key
+        return {"function": name, "url": url, "line": line,
+                "self_ms": round(stats["self_us"] / 1000, 2), "self_pct": round(100 * stats["self_us"] / total_us, 2),
+                "total_ms": round(stats["total_us"] / 1000, 2),
+                "total_pct": round(100 * stats["total_us"] / total_us, 2)}
+
+    ranked = sorted(functions.items(), key=lambda item: item[1]["self_us"], reverse=True)
+    return {
+        "sampled_ms": round(total_us / 1000, 2),
+        "samples": len(samples),
+        "hot_functions": [entry(key, stats) for key, stats in ranked if key[0] not in PSEUDO_FUNCTIONS][:top],
+        "pseudo_functions": {key[0]: entry(key, stats) for key, stats in ranked if key[0] in PSEUDO_FUNCTIONS},
+        "by_module": {group: {"self_ms": round(spent / 1000, 2), "self_pct": round(100 * spent / total_us, 2)}
+                      for group, spent in sorted(groups.items(), key=lambda item: item[1], reverse=True)},
+    }
+
+
+class HeapSnapshotParser:
+    """Incremental parser for the .heapsnapshot JSON that HeapProfiler streams in chunks
+
+    The snapshot is one object: {"snapshot": {"meta": …}, "nodes": [ints], "edges": [ints],
+    …, "strings": [str]}. The integer tables are parsed straight into arrays; everything
+    else is decoded with json once its section has fully arrived.
+    """
+
+    # Sections in the order they appear; the ones between edges and strings are skipped
+    SECTIONS = (b'"snapshot":', b'"nodes":[', b'"edges":[', b'"strings":[')
+
+    def __init__(self):
+        self.buffer = b""
+        self.pending = list(self.SECTIONS)
+        self.section = None
+        self.meta = None
+        self.nodes = array("Q")
+        self.edges = array("Q")
+        self.strings: List[str] = []
+        self._strings_text = []
+
+    def feed(self, chunk: str):
+        self.buffer += chunk.encode()
+        while self._advance():
+            pass
+
+    def _advance(self) -> bool:
+        if self.section is None:
+            if not self.pending:
+                return False
+            marker = self.pending[0]
+            index = self.buffer.find(marker)
+            if index == -1:
+                # Only a marker split across chunks can still matter
+                self.buffer = self.buffer[-len(marker):]
+                return False
+            self.section = self.pending.pop(0)
+            self.buffer = self.buffer[index + len(marker):]
+            return True
+        if self.section == b'"snapshot":':
+            text = self.buffer.decode()
+            try:
+                self.meta, end = json.JSONDecoder().raw_decode(text)
+            except ValueError:
+                return False
+            self.buffer = text[end:].encode()
+            self.section = None
+            return True
+        if self.section == b'"strings":[':
+            self._strings_text.append(self.buffer)
+            self.buffer = b""
+            return False
+        table = self.nodes if self.section == b'"nodes":[' else self.edges
+        end = self.buffer.find(b"]")
+        if end == -1:
+            # The last number may continue in the next chunk
+            cut = max(self.buffer.rfind(b","), 0)
+            self._extend(table, self.buffer[:cut])
+            self.buffer = self.buffer[cut:]
+            return False
+        self._extend(table, self.buffer[:end])
+        self.buffer = self.buffer[end + 1:]
+        self.section = None
+        return True
+
+    @staticmethod
+    def _extend(table, numbers: bytes):
+        numbers = numbers.strip(b", \n")
+        if numbers:
+            # json's C decoder turns a run of integers into a list faster than splitting or regex
+            table.extend(json.loads(b"[" + numbers + b"]"))
+
+    def finish(self):
+        if self.section == b'"strings":[':
+            text = b"[" + b"".join(self._strings_text)
+            self.strings = json.JSONDecoder().raw_decode(text.decode())[0]
+            self._strings_text = []
+        if self.meta is None:
+            raise InspectorError("heap snapshot ended before its metadata")
+        return self
+
+
+def take_heap_snapshot(session: InspectorSession) -> HeapSnapshotParser:
+    parser = HeapSnapshotParser()
+    session.listeners["HeapProfiler.addHeapSnapshotChunk"] = lambda params: parser.feed(params["chunk"])
+    session.call("HeapProfiler.enable")
+    try:
+        session.call("HeapProfiler.takeHeapSnapshot", reportProgress=False)
+    finally:
+        session.listeners.pop("HeapProfiler.addHeapSnapshotChunk", None)
+    session.call("HeapProfiler.disable")
+    return parser.finish()
+
+
+def summarize_heap_snapshot(snapshot: HeapSnapshotParser, top=20, retainers_per_class=5) -> Dict:
+    """Shallow size per class (like DevTools' Summary view) and which classes retain the largest ones
+
+    Retainers are attributed by direct strong references: every edge into an object of a
+    top class credits that object's size to the class of the object holding the edge.
+    """
+    meta = snapshot.meta["meta"]
+    node_fields, edge_fields = meta["node_fields"], meta["edge_fields"]
+    node_types, edge_types = meta["node_types"][0], meta["edge_types"][0]
+    node_width, edge_width = len(node_fields), len(edge_fields)
+    type_at, name_at = node_fields.index("type"), node_fields.index("name")
+    size_at, edge_count_at = node_fields.index("self_size"), node_fields.index("edge_count")
+    edge_type_at, to_node_at = edge_fields.index("type"), edge_fields.index("to_node")
+    nodes, edges, strings = snapshot.nodes, snapshot.edges, snapshot.strings
+    node_count = len(nodes) // node_width
+
+    # One class id per node, so the edge pass below compares ints instead of strings
+    class_ids: Dict[str, int] = {}
+    node_class = array("I", bytes(4 * node_count))
+    class_size = defaultdict(int)
+    class_count = defaultdict(int)
+    for index in range(node_count):
+        base = index * node_width
+        node_type = node_types[nodes[base + type_at]]
+        if node_type in ("object", "native"):
+            name = strings[nodes[base + name_at]]
+        elif node_type == "closure":
+            name = "(closure)"
+        else:
+            name = f"({node_type})"
+        class_id = class_ids.setdefault(name, len(class_ids))
+        node_class[index] = class_id
+        class_size[class_id] += nodes[base + size_at]
+        class_count[class_id] += 1
+
+    class_names = {class_id: name for name, class_id in class_ids.items()}
+    heap_size = sum(class_size.values()) or 1
+    top_classes = sorted(class_size, key=class_size.get, reverse=True)[:top]
+    is_top = bytearray(len(class_ids))
+    for class_id in top_classes:
+        is_top[class_id] = 1
+
+    weak = {edge_types.index(name) for name in ("weak", "shortcut") if name in edge_types}
+    retained_by = defaultdict(int)
+    edge_base = 0
+    for index in range(node_count):
+        holder = node_class[index]
+        for _ in range(nodes[index * node_width + edge_count_at]):
+            if edges[edge_base + edge_type_at] not in weak:
+                target = edges[edge_base + to_node_at] // node_width
+                target_class = node_class[target]
+                if is_top[target_class] and target_class != holder:
+                    retained_by[(target_class, holder)] += nodes[edges[edge_base + to_node_at] + size_at]
+            edge_base += edge_width
+
+    retainers = defaultdict(list)
+    for (target_class, holder), size in retained_by.items():
+        retainers[target_class].append((size, holder))
+    mb = lambda size: round(size / 1048576, 2)
+    return {
+        "heap_mb": mb(heap_size),
+        "objects": node_count,
+        "top_classes": [{
+            "class": class_names[class_id],
+            "count": class_count[class_id],
+            "self_mb": mb(class_size[class_id]),
+            "self_pct": round(100 * class_size[class_id] / heap_size, 2),
+            "retainers": [{"class": class_names[holder], "referenced_mb": mb(size)}
+                          for size, holder in sorted(retainers[class_id], reverse=True)[:retainers_per_class]],
+        } for class_id in top_classes],
+    }
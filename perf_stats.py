@@ -0,0 +1,102 @@
+"""
+Performance statistics helpers shared by the benchmark and load-test scripts
+"""
+
+
+def percentiles(samples):
+    """Summarize latency samples (seconds) as count/p50/p95/p99/max in milliseconds"""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {
+        "count": len(ordered),
+        "p50_ms": round(pick(0.50) * 1000, 2),
+        "p95_ms": round(pick(0.95) * 1000, 2),
+        "p99_ms": round(pick(0.99) * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2),
+    }
+
+
+class LatencyHistogram:
+    """HDR-style log-linear histogram: fixed memory, ~1% relative error, mergeable
+
+    Values are stored as integer microseconds. Below 2**SUB_BUCKET_BITS every value has
+    its own bucket; above that each power of two is split into 64 linear sub-buckets.
+    """
+
+    SUB_BUCKET_BITS = 7
+    HALF = 1 << (SUB_BUCKET_BITS - 1)
+
+    def __init__(self, max_seconds=3600):
+        self.max_us = int(max_seconds * 1e6)
+        self.counts = [0] * (self._index(self.max_us) + 1)
+        self.count = 0
+        self.total_us = 0
+        self.min_us = None
+        self.max_seen_us = 0
+
+    def _index(self, value):
+        shift = value.bit_length() - self.SUB_BUCKET_BITS
+        if shift <= 0:
+            return value
+        return shift * self.HALF + (value >> shift)
+
+    def _upper_bound(self, index):
+        if index < 2 * self.HALF:
+            return index
+        shift = index // self.HALF - 1
+        return ((index - shift * self.HALF + 1) << shift) - 1
+
+    def record(self, seconds):
+        value = min(max(int(seconds * 1e6), 0), self.max_us)
+        self.counts[self._index(value)] += 1
+        self.count += 1
+        self.total_us += value
+        self.max_seen_us = max(self.max_seen_us, value)
+        self.min_us = value if self.min_us is None else min(self.min_us, value)
+
+    def merge(self, other):
+        for index, count in enumerate(other.counts):
+            if count:
+                self.counts[index] += count
+        self.count += other.count
+        self.total_us += other.total_us
+        self.max_seen_us = max(self.max_seen_us, other.max_seen_us)
+        if other.min_us is not None:
+            self.min_us = other.min_us if self.min_us is None else min(self.min_us, other.min_us)
+
+    def reset(self):
+        self.counts = [0] * len(self.counts)
+        self.count = 0
+        self.total_us = 0
+        self.min_us = None
+        self.max_seen_us = 0
+
+    def percentile(self, q):
+        """Upper bound of the bucket holding the q-quantile, in seconds"""
+        if not self.count:
+            return None
+        rank = max(1, int(q * self.count + 0.5))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self._upper_bound(index), self.max_seen_us) / 1e6
+        return self.max_seen_us / 1e6
+
+    def summary(self):
+        """Same shape as percentiles(), plus p99.9, min and mean"""
+        if not self.count:
+            return None
+        ms = lambda seconds: round(seconds * 1000, 2)
+        return {
+            "count": self.count,
+            "p50_ms": ms(self.percentile(0.50)),
+            "p95_ms": ms(self.percentile(0.95)),
+            "p99_ms": ms(self.percentile(0.99)),
+            "p999_ms": ms(self.percentile(0.999)),
+            "min_ms": ms(self.min_us / 1e6),
+            "mean_ms": ms(self.total_us / self.count / 1e6),
+            "max_ms": ms(self.max_seen_us / 1e6),
+        }
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Process usage - Resource accounting and budgets for the subprocesses the agents run
+
+Children are reaped with os.wait4(), which returns what the child used: peak RSS,
+user and system CPU, block reads and writes and context switches. The figures cover
+the child and every descendant it waited for, so `npx tsc` reports tsc's node process
+and `npm run lint` reports next lint's. A ProcessAccounting collects the usage of
+every child started through it (one test's worth), summed, with peak RSS as the
+largest of them.
+
+A ResourceBudget is applied to each child with setrlimit before exec:
+
+    memory_mb     RLIMIT_DATA; node's heap allocations fail past it and it aborts.
+                  Not RLIMIT_AS: V8 reserves gigabytes of address space it never
+                  touches and cannot start under a realistic one.
+    cpu_seconds   RLIMIT_CPU; SIGXCPU at the limit, SIGKILL a few seconds later
+
+Limits are per process, so the budget is also checked after the fact against the
+totals: a peak RSS or CPU time over budget, or a child killed by a signal while a
+budget was set (other than a kill on timeout), is a violation.
+
+    python3 process_usage.py -- npx tsc --noEmit
+    python3 process_usage.py --memory-mb 2048 --cpu-s 60 -- npm run build
+"""
+
+import os
+import sys
+import json
+import math
+import signal
+import argparse
+import subprocess
+from typing import Any, Dict, List, NamedTuple, Optional
+
+try:
+    import resource
+except ImportError:  # Windows: no rusage and no rlimits, only wall-clock time
+    resource = None
+
+# ru_maxrss is in kilobytes on Linux and in bytes on macOS
+_MAXRSS_PER_MB = 1024 * 1024 if sys.platform == "darwin" else 1024
+# Seconds between SIGXCPU at the soft CPU limit and SIGKILL at the hard one
+CPU_KILL_GRACE = 5
+
+
+class ResourceUsage(NamedTuple):
+    peak_rss_mb: float = 0.0
+    user_cpu_s: float = 0.0
+    system_cpu_s: float = 0.0
+    block_reads: int = 0
+    block_writes: int = 0
+    voluntary_switches: int = 0  # waiting on I/O or locks
+    involuntary_switches: int = 0  # preempted: more runnable work than CPUs
+
+    @classmethod
+    def from_rusage(cls, rusage) -> "ResourceUsage":
+        return cls(rusage.ru_maxrss / _MAXRSS_PER_MB, rusage.ru_utime, rusage.ru_stime, rusage.ru_inblock,
+                   rusage.ru_oublock, rusage.ru_nvcsw, rusage.ru_nivcsw)
+
+    @property
+    def cpu_s(self) -> float:
+        return self.user_cpu_s + self.system_cpu_s
+
+    def combine(self, other: "ResourceUsage") -> "ResourceUsage":
+        """Usage of both: the larger peak RSS, everything else summed"""
+        return ResourceUsage(max(self.peak_rss_mb, other.peak_rss_mb),
+                             *(mine + theirs for mine, theirs in zip(self[1:], other[1:])))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"peak_rss_mb": round(self.peak_rss_mb, 1), "user_cpu_s": round(self.user_cpu_s, 3),
+                "system_cpu_s": round(self.system_cpu_s, 3), "block_reads": self.block_reads,
+                "block_writes": self.block_writes, "voluntary_switches": self.voluntary_switches,
+                "involuntary_switches": self.involuntary_switches}
+
+
+class ResourceBudget(NamedTuple):
+    memory_mb: Optional[int] = None
+    cpu_seconds: Optional[float] = None
+
+    @property
+    def enabled(self) -> bool:
+        return resource is not None and (self.memory_mb is not None or self.cpu_seconds is not None)
+
+    def apply(self):
+        """Set the limits in the child, between fork and exec (a Popen preexec_fn)"""
+        if self.memory_mb is not None:
+            limit = self.memory_mb << 20
+            resource.setrlimit(resource.RLIMIT_DATA, (limit, limit))
+        if self.cpu_seconds is not None:
+            soft = max(1, math.ceil(self.cpu_seconds))
+            resource.setrlimit(resource.RLIMIT_CPU, (soft, soft + CPU_KILL_GRACE))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"memory_mb": self.memory_mb, "cpu_seconds": self.cpu_seconds}
+
+
+class TrackedPopen(subprocess.Popen):
+    """Popen that reaps its child with os.wait4 and hands the rusage to on_exit
+
+    wait() and communicate() reap through _try_wait. A child reaped by poll() instead
+    has no usage.
+    """
+
+    def __init__(self, args, on_exit=None, **kwargs):
+        self.on_exit = on_exit
+        self.killed = False
+        super().__init__(args, **kwargs)
+
+    def kill(self):
+        # A child the caller kills (on a timeout) did not hit a limit
+        self.killed = True
+        super().kill()
+
+    def _try_wait(self, wait_flags):
+        if not hasattr(os, "wait4"):
+            return super()._try_wait(wait_flags)
+        try:
+            pid, status, rusage = os.wait4(self.pid, wait_flags)
+        except ChildProcessError:
+            # Reaped elsewhere (SIGCHLD ignored): same fallback as Popen's own
+            return self.pid, 0
+        if pid == self.pid and self.on_exit is not None:
+            self.on_exit(self, os.waitstatus_to_exitcode(status), ResourceUsage.from_rusage(rusage))
+        return pid, status
+
+
+class ProcessAccounting:
+    """The usage of every child started through it, checked against an optional budget"""
+
+    def __init__(self, budget: Optional[ResourceBudget] = None):
+        self.budget = budget or ResourceBudget()
+        # One entry per reaped child: command, exit code (negative for a signal), whether we killed it, and usage
+        self.processes: List[Dict[str, Any]] = []
+        self.total = ResourceUsage()
+
+    def _record(self, process: TrackedPopen, exit_code: int, usage: ResourceUsage):
+        args = process.args if isinstance(process.args, (list, tuple)) else [process.args]
+        self.processes.append({"command": " ".join(map(str, args))[:120], "exit_code": exit_code,
+                               "killed": process.killed, **usage.to_dict()})
+        self.total = self.total.combine(usage)
+
+    def popen(self, args, **kwargs) -> subprocess.Popen:
+        if self.budget.enabled:
+            kwargs.setdefault("preexec_fn", self.budget.apply)
+        return TrackedPopen(args, on_exit=self._record, **kwargs)
+
+    def run(self, args, timeout: Optional[float] = None, capture_output: bool = False,
+            **kwargs) -> subprocess.CompletedProcess:
+        """subprocess.run() through popen(); a child killed on timeout is still accounted"""
+        if capture_output:
+            kwargs["stdout"] = kwargs["stderr"] = subprocess.PIPE
+        with self.popen(args, **kwargs) as process:
+            try:
+                stdout, stderr = process.communicate(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.communicate()
+                raise
+        return subprocess.CompletedProcess(process.args, process.returncode, stdout, stderr)
+
+    def violations(self) -> List[str]:
+        budget = self.budget
+        if not budget.enabled:
+            return []
+        found = []
+        if budget.memory_mb is not None and self.total.peak_rss_mb > budget.memory_mb:
+            found.append(f"peak RSS {self.total.peak_rss_mb:.0f} MB over the {budget.memory_mb} MB memory budget")
+        if budget.cpu_seconds is not None and self.total.cpu_s > budget.cpu_seconds:
+            found.append(f"{self.total.cpu_s:.1f}s CPU over the {budget.cpu_seconds:g}s CPU budget")
+        for entry in self.processes:
+            # Under RLIMIT_DATA node aborts (SIGABRT); under RLIMIT_CPU the kernel sends SIGXCPU, then SIGKILL
+            if entry["exit_code"] < 0 and not entry["killed"]:
+                found.append(f"'{entry['command']}' was killed by {signal.Signals(-entry['exit_code']).name} "
+                             f"under the resource budget")
+        return found
+
+    def to_dict(self) -> Dict[str, Any]:
+        report = {**self.total.to_dict(), "cpu_s": round(self.total.cpu_s, 3), "processes": self.processes}
+        if self.budget.enabled:
+            report["budget"] = self.budget.to_dict()
+            report["violations"] = self.violations()
+        return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a command and report the resources it and its children used")
+    parser.add_argument("--memory-mb", type=int, help="memory budget (RLIMIT_DATA per process)")
+    parser.add_argument("--cpu-s", type=float, help="CPU budget in seconds (RLIMIT_CPU per process)")
+    parser.add_argument("--json", action="store_true", help="print the usage as JSON")
+    parser.add_argument("command", nargs=argparse.REMAINDER, help="command to run, after --")
+    args = parser.parse_args(argv)
+    command = args.command[1:] if args.command[:1] == ["--"] else args.command
+    if not command:
+        parser.error("no command given")
+
+    accounting = ProcessAccounting(ResourceBudget(args.memory_mb, args.cpu_s))
+    try:
+        result = accounting.run(command)
+    except OSError as e:
+        print(f"❌ Cannot run {command[0]}: {e}", file=sys.stderr)
+        sys.exit(127)
+    report = accounting.to_dict()
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        usage = accounting.total
+        print(f"🧮 exit {result.returncode}: peak RSS {usage.peak_rss_mb:.0f} MB, CPU {usage.user_cpu_s:.2f}s user "
+              f"+ {usage.system_cpu_s:.2f}s sys, {usage.block_reads} block reads, {usage.block_writes} block writes, "
+              f"{usage.voluntary_switches}/{usage.involuntary_switches} voluntary/involuntary switches",
+              file=sys.stderr)
+        for violation in report.get("violations", []):
+            print(f"  ❌ {violation}", file=sys.stderr)
+    if report.get("violations"):
+        sys.exit(1)
+    sys.exit(result.returncode)
+
+
+if __name__ == "__main__":
+    main()
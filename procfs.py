@@ -0,0 +1,154 @@
+"""
+procfs helpers - Process, memory and socket inspection from /proc (Linux only)
+
+Shared by the terminal diagnostics and the load benchmarks so they agree on how
+the Next.js server process and its pty shells are found.
+"""
+
+import os
+from typing import Dict, List, Optional, Set
+
+SHELL_NAMES = {"bash", "zsh", "sh", "dash", "fish", "ksh", "tcsh", "pwsh"}
+NODE_NAMES = {"node", "nodejs"}
+
+# TCP states as hex strings in /proc/net/tcp
+TCP_ESTABLISHED = "01"
+TCP_LISTEN = "0A"
+
+
+def _tcp_sockets(port: int, state: str) -> List[str]:
+    """Return socket inodes on local port in the given state"""
+    inodes = []
+    for table in ("/proc/net/tcp", "/proc/net/tcp6"):
+        try:
+            with open(table) as f:
+                next(f)
+                for line in f:
+                    fields = line.split()
+                    if fields[3] == state and int(fields[1].rsplit(":", 1)[1], 16) == port:
+                        inodes.append(fields[9])
+        except FileNotFoundError:
+            continue
+    return inodes
+
+
+def socket_inodes(pid: int) -> Set[str]:
+    inodes = set()
+    try:
+        for fd in os.listdir(f"/proc/{pid}/fd"):
+            try:
+                link = os.readlink(f"/proc/{pid}/fd/{fd}")
+            except OSError:
+                continue
+            if link.startswith("socket:["):
+                inodes.add(link[8:-1])
+    except (PermissionError, FileNotFoundError, ProcessLookupError):
+        pass
+    return inodes
+
+
+def find_listening_pid(port: int) -> Optional[int]:
+    """Find the pid listening on port by matching socket inodes"""
+    listening = set(_tcp_sockets(port, TCP_LISTEN))
+    if not listening:
+        return None
+    for pid in filter(str.isdigit, os.listdir("/proc")):
+        if socket_inodes(int(pid)) & listening:
+            return int(pid)
+    return None
+
+
+def count_established(port: int, pid: Optional[int] = None) -> int:
+    """Count established connections on a local port, optionally only those owned by pid"""
+    established = _tcp_sockets(port, TCP_ESTABLISHED)
+    if pid is None:
+        return len(established)
+    owned = socket_inodes(pid)
+    return sum(1 for inode in established if inode in owned)
+
+
+def read_rss_kb(pid: int) -> Optional[int]:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except (FileNotFoundError, ProcessLookupError):
+        pass
+    return None
+
+
+def read_stat(pid: int) -> Optional[Dict]:
+    """Parse the fields we need from /proc/<pid>/stat"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            data = f.read()
+    except (FileNotFoundError, ProcessLookupError):
+        return None
+    # comm is parenthesised and may itself contain spaces or parentheses
+    comm = data[data.index("(") + 1:data.rindex(")")]
+    fields = data[data.rindex(")") + 2:].split()
+    return {
+        "pid": pid,
+        "comm": comm,
+        "ppid": int(fields[1]),
+        "tty_nr": int(fields[4]),
+        "starttime_ticks": int(fields[19]),
+    }
+
+
+def read_cmdline(pid: int) -> List[str]:
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            data = f.read()
+    except (FileNotFoundError, ProcessLookupError, PermissionError):
+        return []
+    return [arg.decode(errors="replace") for arg in data.split(b"\0") if arg]
+
+
+def is_node_process(pid: int) -> bool:
+    """Whether pid runs node, by its executable, comm or argv[0]
+
+    next dev renames its process (process.title = "next-server ..."), which rewrites
+    comm and argv, so the executable link is checked first.
+    """
+    names = set()
+    try:
+        names.add(os.path.basename(os.readlink(f"/proc/{pid}/exe")))
+    except OSError:
+        pass
+    stat = read_stat(pid)
+    if stat:
+        names.add(stat["comm"])
+    argv = read_cmdline(pid)
+    if argv:
+        names.add(os.path.basename(argv[0]))
+    return bool(names & NODE_NAMES)
+
+
+def list_processes() -> Dict[int, Dict]:
+    processes = {}
+    for pid in filter(str.isdigit, os.listdir("/proc")):
+        stat = read_stat(int(pid))
+        if stat:
+            processes[stat["pid"]] = stat
+    return processes
+
+
+def descendants(pid: int, processes: Dict[int, Dict]) -> List[Dict]:
+    children: Dict[int, List[int]] = {}
+    for stat in processes.values():
+        children.setdefault(stat["ppid"], []).append(stat["pid"])
+    found = []
+    stack = [pid]
+    while stack:
+        for child in children.get(stack.pop(), []):
+            found.append(processes[child])
+            stack.append(child)
+    return found
+
+
+def process_age_seconds(stat: Dict) -> float:
+    with open("/proc/uptime") as f:
+        uptime = float(f.read().split()[0])
+    return uptime - stat["starttime_ticks"] / os.sysconf("SC_CLK_TCK")
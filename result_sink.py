@@ -0,0 +1,258 @@
+"""
+Result sink - Append-only columnar NDJSON storage for test results and request samples
+
+A run starts with a header line naming its record fields; records are buffered as
+__slots__ objects and flushed in batches, one line per batch with a list per column:
+
+    {"type":"run","run_id":"…","record":"RequestSample","fields":["t","operation",…],…}
+    {"type":"batch","run_id":"…","count":1024,"columns":{"t":[…],"operation":[…],…}}
+
+Field names are written once per batch instead of once per record, and readers work
+batch by batch, so aggregating millions of samples needs memory for one batch only.
+Runs append to the same file; readers pick one run (the latest by default) and skip
+other runs' batches by line prefix without parsing them. A sink opened with keep_runs
+first drops all but the most recent runs, so a file every run appends to stays bounded.
+Appends and pruning take an exclusive flock on the file; pruning replaces it with a
+rewritten copy, and a writer that finds its handle on the replaced file reopens the
+new one before appending, so concurrent runs never lose each other's lines.
+"""
+
+import os
+import json
+import time
+import tempfile
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from perf_stats import LatencyHistogram
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, so concurrent runs sharing a file are not serialized
+    fcntl = None
+
+SINK_FORMAT = "columnar-ndjson"
+SINK_VERSION = 1
+
+_RUN_PREFIX = '{"type":"run",'
+_SEPARATORS = (",", ":")
+
+
+class SinkRecord:
+    """Base for sink records: subclasses list their fields in __slots__"""
+
+    __slots__ = ()
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+
+class RequestSample(SinkRecord):
+    """One request made during a load or soak run"""
+
+    __slots__ = ("t", "operation", "latency_us", "ok")
+
+
+class TestRecord(SinkRecord):
+    """One functional test result, with enums stored as their values"""
+
+    __slots__ = ("test_name", "feature_type", "status", "description", "expected", "actual",
+                 "error_message", "execution_time", "suggestions", "metrics", "resources")
+
+
+class ResultSink:
+    """Buffers records and appends them to path in column batches"""
+
+    def __init__(self, path, record_type, run_id=None, batch_size=1024, meta=None, keep_runs=None):
+        self.path = path
+        self.fields = record_type.__slots__
+        self.run_id = run_id or f"{time.strftime('%Y%m%dT%H%M%S')}-{os.urandom(3).hex()}"
+        self.batch_size = batch_size
+        self.buffer = []
+        self.count = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if keep_runs is not None:
+            # This run is one of the keep_runs
+            prune_runs(path, max(keep_runs - 1, 0))
+        self.file = open(path, "a", encoding="utf-8")
+        self._write({"type": "run", "run_id": self.run_id, "record": record_type.__name__,
+                     "fields": list(self.fields), "format": SINK_FORMAT, "version": SINK_VERSION,
+                     "t": round(time.time(), 3), "meta": meta or {}})
+
+    def _write(self, payload):
+        # A whole line per write keeps the file readable while the run is still appending
+        line = json.dumps(payload, separators=_SEPARATORS, default=str) + "\n"
+        while True:
+            with _locked(self.file):
+                if _is_current(self.file, self.path):
+                    self.file.write(line)
+                    self.file.flush()
+                    return
+            # Another run pruned the file: append to the copy that replaced it
+            self.file.close()
+            self.file = open(self.path, "a", encoding="utf-8")
+
+    def append(self, record):
+        self.buffer.append(record)
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        columns = {name: [getattr(record, name) for record in self.buffer] for name in self.fields}
+        self._write({"type": "batch", "run_id": self.run_id, "count": len(self.buffer), "columns": columns})
+        self.count += len(self.buffer)
+        self.buffer.clear()
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+@contextmanager
+def _locked(file):
+    """Hold an exclusive flock on an open file for the duration of the block"""
+    if fcntl is None:
+        yield file
+        return
+    fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+    try:
+        yield file
+    finally:
+        fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+
+
+def _is_current(file, path) -> bool:
+    """Whether an open file is still the one at path, i.e. prune_runs has not replaced it"""
+    try:
+        on_disk = os.stat(path)
+    except FileNotFoundError:
+        return False
+    opened = os.fstat(file.fileno())
+    return (opened.st_dev, opened.st_ino) == (on_disk.st_dev, on_disk.st_ino)
+
+
+def _replace_with(path, write, mode=0o644):
+    """Write a uniquely named temporary file beside path with write(f), then move it over path"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        if hasattr(os, "fchmod"):
+            # mkstemp creates the file 0600; keep the permissions a plain open() would have given it
+            os.fchmod(fd, mode)
+        with open(fd, "w", encoding="utf-8") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def write_json_atomic(path, payload, **dump_options):
+    """Replace path with payload as JSON; readers see the old file or the new one, never half of either"""
+    _replace_with(path, lambda f: json.dump(payload, f, **dump_options))
+
+
+def last_run_id(path) -> Optional[str]:
+    if not os.path.exists(path):
+        return None
+    run_id = None
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.startswith(_RUN_PREFIX):
+                run_id = json.loads(line)["run_id"]
+    return run_id
+
+
+def prune_runs(path, keep) -> int:
+    """Rewrite path without all but its last keep runs; returns how many runs were dropped"""
+    while True:
+        try:
+            source = open(path, encoding="utf-8")
+        except FileNotFoundError:
+            return 0
+        with source, _locked(source):
+            if not _is_current(source, path):
+                # Another run pruned it while we waited for the lock
+                continue
+            run_ids = [json.loads(line)["run_id"] for line in source if line.startswith(_RUN_PREFIX)]
+            if len(run_ids) <= keep:
+                return 0
+            kept = run_ids[len(run_ids) - keep:] if keep else []
+            prefixes = tuple('{"type":"batch","run_id":' + json.dumps(run_id) + "," for run_id in kept)
+            kept = set(kept)
+
+            def write_kept(target):
+                source.seek(0)
+                for line in source:
+                    if line.startswith(_RUN_PREFIX):
+                        if json.loads(line)["run_id"] in kept:
+                            target.write(line)
+                    elif prefixes and line.startswith(prefixes):
+                        target.write(line)
+
+            # Replaced while still holding the lock: writers waiting on it find their handle stale and reopen
+            _replace_with(path, write_kept, os.fstat(source.fileno()).st_mode & 0o7777)
+            return len(run_ids) - keep
+
+
+def iter_batches(path, run_id=None) -> Iterator[Dict[str, list]]:
+    """Yield the column dict of each batch in one run (default: the latest)"""
+    run_id = run_id or last_run_id(path)
+    if run_id is None:
+        return
+    batch_prefix = '{"type":"batch","run_id":' + json.dumps(run_id) + ","
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.startswith(batch_prefix):
+                yield json.loads(line)["columns"]
+
+
+def iter_rows(path, run_id=None) -> Iterator[Dict[str, Any]]:
+    for columns in iter_batches(path, run_id):
+        names = list(columns)
+        for values in zip(*(columns[name] for name in names)):
+            yield dict(zip(names, values))
+
+
+def aggregate(path, group_by, run_id=None, latency_field=None, latency_scale=1.0, ok_field=None):
+    """Count rows per group_by value, with an optional latency histogram and failure count per group
+
+    latency_scale converts the stored latency to seconds (1e-6 for microseconds).
+    """
+    groups: Dict[Any, Dict[str, Any]] = {}
+    for columns in iter_batches(path, run_id):
+        keys = columns[group_by]
+        latencies = columns[latency_field] if latency_field else None
+        oks = columns[ok_field] if ok_field else None
+        for i, key in enumerate(keys):
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = {"count": 0, "failed": 0,
+                                       "histogram": LatencyHistogram() if latency_field else None}
+            group["count"] += 1
+            if oks is not None and not oks[i]:
+                group["failed"] += 1
+            elif latencies is not None and latencies[i] is not None:
+                group["histogram"].record(latencies[i] * latency_scale)
+    return {
+        key: {"count": group["count"], "failed": group["failed"],
+              "latency": group["histogram"].summary() if group["histogram"] else None}
+        for key, group in groups.items()
+    }
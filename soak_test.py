@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Soak Test - Concurrent virtual users against the whole IDE backend
+
+Each virtual user loops over a weighted mix of actions until the run ends: loading
+the page, typing commands into its own terminal session, and sending streamed chat
+messages, with exponential think time between actions. Latencies go into constant
+memory histograms (a rolling window plus run totals) and every window is appended to
+an NDJSON file, so a multi-hour run can be watched with `tail -f` and plotted later.
+
+Chat actions call the real upstream unless the dev server points at the mock:
+
+    python3 mock_openai_server.py --latency-ms 400 --tokens-per-sec 60 &
+    OPENAI_BASE_URL=http://127.0.0.1:8787/v1 OPENAI_API_KEY=mock npm run dev &
+    python3 soak_test.py --users 50 --duration 3600
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import asyncio
+import argparse
+from collections import deque
+from dataclasses import dataclass, field, asdict
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from perf_stats import LatencyHistogram  # noqa: E402
+from result_sink import ResultSink, RequestSample  # noqa: E402
+from procfs import find_listening_pid, read_rss_kb, count_established  # noqa: E402
+from benchmark_terminal_api import SSEStream, TerminalSession, parse_status  # noqa: E402
+
+DEFAULT_MIX = {"page": 5, "terminal": 3, "chat": 1}
+
+# Harmless, fast commands; each is followed by a marker echo that signals completion
+TERMINAL_COMMANDS = ["pwd", "ls", "echo $SHELL", "date", "git --version", "node --version"]
+
+CHAT_PROMPTS = [
+    "Explain what this React hook does.",
+    "How do I fix 'Cannot find module' in a Next.js app?",
+    "Suggest a name for a function that debounces editor saves.",
+    "What does EADDRINUSE mean?",
+]
+
+
+@dataclass
+class SoakConfig:
+    base_url: str = "http://localhost:3000"
+    users: int = 10
+    duration: float = 300.0
+    ramp_up: float = 30.0                  # seconds over which users are started
+    think_time: float = 2.0                # mean seconds between a user's actions
+    mix: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_MIX))
+    report_interval: float = 10.0          # seconds per histogram window
+    timeout: float = 30.0
+    output: str = "soak_report.ndjson"
+    samples: Optional[str] = None          # columnar sink for every request (result_sink.RequestSample)
+    server_pid: Optional[int] = None
+    seed: Optional[int] = None
+
+
+def parse_mix(value):
+    """'page=5,terminal=3,chat=1' -> {'page': 5.0, ...}"""
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in DEFAULT_MIX:
+            raise ValueError(f"unknown action '{name.strip()}' (expected {', '.join(DEFAULT_MIX)})")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+class SoakMetrics:
+    """Window and run-total histograms per operation, plus error counts; memory does not grow with run length"""
+
+    def __init__(self, sink: Optional[ResultSink] = None):
+        self.sink = sink
+        self.window: Dict[str, LatencyHistogram] = {}
+        self.total: Dict[str, LatencyHistogram] = {}
+        self.window_errors: Dict[str, int] = {}
+        self.total_errors: Dict[str, int] = {}
+        self.recent_errors = deque(maxlen=20)
+
+    def record(self, operation, seconds):
+        if operation not in self.window:
+            self.window[operation] = LatencyHistogram()
+            self.total[operation] = LatencyHistogram()
+        self.window[operation].record(seconds)
+        self.total[operation].record(seconds)
+        if self.sink:
+            self.sink.append(RequestSample(round(time.time(), 3), operation, int(seconds * 1e6), True))
+
+    def error(self, operation, message):
+        self.window_errors[operation] = self.window_errors.get(operation, 0) + 1
+        self.total_errors[operation] = self.total_errors.get(operation, 0) + 1
+        self.recent_errors.append({"operation": operation, "error": message[:200], "t": round(time.time(), 3)})
+        if self.sink:
+            self.sink.append(RequestSample(round(time.time(), 3), operation, None, False))
+
+    @staticmethod
+    def _operations(histograms, errors):
+        report = {}
+        for operation in sorted(set(histograms) | set(errors)):
+            histogram = histograms.get(operation)
+            ok = histogram.count if histogram else 0
+            failed = errors.get(operation, 0)
+            report[operation] = {
+                "latency": histogram.summary() if histogram else None,
+                "errors": failed,
+                "error_rate": round(failed / (ok + failed), 4),
+            }
+        return report
+
+    def take_window(self):
+        """Report the current window and start a new one"""
+        report = self._operations(self.window, self.window_errors)
+        for histogram in self.window.values():
+            histogram.reset()
+        self.window_errors = {}
+        return report
+
+    def totals(self):
+        return self._operations(self.total, self.total_errors)
+
+
+async def http_get(host, port, path, timeout):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\nConnection: close\r\n\r\n".encode())
+        await writer.drain()
+        status_line = await asyncio.wait_for(reader.readline(), timeout)
+        await asyncio.wait_for(reader.read(), timeout)
+        return parse_status(status_line, f"GET {path}")
+    finally:
+        writer.close()
+
+
+class VirtualUser:
+    """One simulated developer: a page, a terminal tab that stays open, a chat conversation"""
+
+    def __init__(self, index, host, port, config, metrics, rng):
+        self.index = index
+        self.host = host
+        self.port = port
+        self.config = config
+        self.metrics = metrics
+        self.rng = rng
+        self.terminal = None
+        self.conversation = []
+
+    async def load_page(self):
+        start = time.perf_counter()
+        status = await http_get(self.host, self.port, "/", self.config.timeout)
+        if status != 200:
+            raise ConnectionError(f"GET / returned {status}")
+        self.metrics.record("page_load", time.perf_counter() - start)
+
+    async def run_terminal_command(self):
+        if self.terminal is None:
+            session = TerminalSession(self.host, self.port, f"soak-{uuid.uuid4().hex[:6]}-{self.index}")
+            await asyncio.wait_for(session.open(), self.config.timeout)
+            self.terminal = session
+            self.metrics.record("terminal_open", session.ttfb)
+        tag = uuid.uuid4().hex[:10]
+        command = self.rng.choice(TERMINAL_COMMANDS)
+        # Quoting splits the marker in the echoed command so only the real output matches it
+        elapsed = await self.terminal.send_and_wait(f"{command}; echo done_''{tag}\r", f"done_{tag}",
+                                                    self.config.timeout)
+        self.metrics.record("terminal_command", elapsed)
+
+    async def send_chat(self):
+        self.conversation.append({"role": "user", "content": self.rng.choice(CHAT_PROMPTS)})
+        start = time.perf_counter()
+        stream = await asyncio.wait_for(
+            SSEStream.open(self.host, self.port, "/api/chat", {"messages": self.conversation, "stream": True}),
+            self.config.timeout)
+        reply = []
+        try:
+            events = stream.events()
+            while True:
+                event = await asyncio.wait_for(events.__anext__(), self.config.timeout)
+                if event.get("type") == "delta":
+                    if not reply:
+                        self.metrics.record("chat_first_token", time.perf_counter() - start)
+                    reply.append(event["content"])
+                elif event.get("type") == "error":
+                    raise ConnectionError(f"chat stream error: {event.get('error')}")
+                elif event.get("type") == "done":
+                    break
+        finally:
+            stream.close()
+        self.metrics.record("chat_complete", time.perf_counter() - start)
+        # Keep the conversation short so request size stays steady over a long run
+        self.conversation = (self.conversation + [{"role": "assistant", "content": "".join(reply)}])[-6:]
+
+    async def run(self, deadline):
+        actions = {"page": self.load_page, "terminal": self.run_terminal_command, "chat": self.send_chat}
+        names = [name for name, weight in self.config.mix.items() if weight > 0]
+        weights = [self.config.mix[name] for name in names]
+        try:
+            while time.monotonic() < deadline:
+                name = self.rng.choices(names, weights)[0]
+                try:
+                    await actions[name]()
+                except asyncio.TimeoutError:
+                    self.metrics.error(name, "timed out")
+                    if name == "terminal":
+                        await self._drop_terminal()
+                except (ConnectionError, OSError, ValueError, IndexError, asyncio.IncompleteReadError) as e:
+                    # One dropped connection is one error, never the end of the soak
+                    self.metrics.error(name, str(e) or type(e).__name__)
+                    if name == "terminal":
+                        await self._drop_terminal()
+                remaining = deadline - time.monotonic()
+                await asyncio.sleep(min(self.rng.expovariate(1 / self.config.think_time), max(remaining, 0)))
+        finally:
+            await self._drop_terminal()
+
+    async def _drop_terminal(self):
+        if self.terminal:
+            # Exit the shell so the soak itself does not leave pty sessions behind
+            await self.terminal.close(exit_shell=True)
+            self.terminal = None
+
+
+def write_record(path, record):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+async def run_soak(config: SoakConfig, progress=print):
+    parts = urlsplit(config.base_url)
+    host, port = parts.hostname, parts.port or 80
+    pid = config.server_pid or find_listening_pid(port)
+    sink = ResultSink(config.samples, RequestSample, meta={"base_url": config.base_url}) if config.samples else None
+    metrics = SoakMetrics(sink)
+    rng = random.Random(config.seed)
+    started = time.monotonic()
+    deadline = started + config.duration
+    active = 0
+
+    write_record(config.output, {"type": "start", "t": round(time.time(), 3), "config": asdict(config),
+                                 "server_pid": pid})
+
+    async def start_user(index):
+        nonlocal active
+        await asyncio.sleep(min(config.ramp_up, config.duration) * index / max(config.users, 1))
+        user = VirtualUser(index, host, port, config, metrics, random.Random(rng.random()))
+        active += 1
+        try:
+            await user.run(deadline)
+        finally:
+            active -= 1
+
+    def snapshot(record_type, operations):
+        record = {
+            "type": record_type,
+            "t": round(time.time(), 3),
+            "elapsed_s": round(time.monotonic() - started, 1),
+            "active_users": active,
+            "server_rss_kb": read_rss_kb(pid) if pid else None,
+            "server_connections": count_established(port, pid) if pid else None,
+            "operations": operations,
+        }
+        write_record(config.output, record)
+        return record
+
+    async def reporter():
+        while True:
+            await asyncio.sleep(config.report_interval)
+            record = snapshot("window", metrics.take_window())
+            line = "  ".join(f"{op} p95 {stats['latency']['p95_ms'] if stats['latency'] else '-'}ms "
+                             f"err {stats['error_rate']:.1%}" for op, stats in record["operations"].items())
+            progress(f"[{record['elapsed_s']:>7}s] users {record['active_users']:<4} "
+                     f"rss {record['server_rss_kb'] or '-'} kB  {line}")
+
+    reporter_task = asyncio.create_task(reporter())
+    try:
+        await asyncio.gather(*(start_user(i) for i in range(config.users)))
+    finally:
+        reporter_task.cancel()
+        if sink:
+            sink.close()
+    summary = snapshot("summary", metrics.totals())
+    summary["recent_errors"] = list(metrics.recent_errors)
+    summary["output"] = config.output
+    if sink:
+        summary["samples"] = {"path": sink.path, "run_id": sink.run_id, "count": sink.count}
+    return summary
+
+
+def print_summary(summary):
+    print("\n🔥 Soak Test Summary")
+    print("=" * 60)
+    print(f"Elapsed: {summary['elapsed_s']}s  Server RSS: {summary['server_rss_kb'] or 'unknown'} kB")
+    for operation, stats in summary["operations"].items():
+        latency = stats["latency"] or {}
+        print(f"  {operation:<18} n={latency.get('count', 0):<7} p50 {latency.get('p50_ms', '-')}ms  "
+              f"p95 {latency.get('p95_ms', '-')}ms  p99 {latency.get('p99_ms', '-')}ms  "
+              f"p99.9 {latency.get('p999_ms', '-')}ms  errors {stats['errors']} ({stats['error_rate']:.2%})")
+    for error in summary["recent_errors"][-5:]:
+        print(f"    • {error['operation']}: {error['error']}")
+    print(f"\n📄 Windows written to: {summary['output']}")
+    if summary.get("samples"):
+        print(f"📄 {summary['samples']['count']:,} request samples in: {summary['samples']['path']} "
+              f"(run {summary['samples']['run_id']})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Soak test the IDE backend with concurrent virtual users")
+    parser.add_argument("--base-url", default=SoakConfig.base_url)
+    parser.add_argument("--users", type=int, default=SoakConfig.users, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=SoakConfig.duration, help="run length in seconds")
+    parser.add_argument("--ramp-up", type=float, default=SoakConfig.ramp_up, help="seconds to start all users")
+    parser.add_argument("--think-time", type=float, default=SoakConfig.think_time,
+                        help="mean seconds between a user's actions")
+    parser.add_argument("--mix", type=parse_mix, default=dict(DEFAULT_MIX),
+                        help="action weights, e.g. page=5,terminal=3,chat=1")
+    parser.add_argument("--report-interval", type=float, default=SoakConfig.report_interval,
+                        help="seconds per histogram window written to --output")
+    parser.add_argument("--timeout", type=float, default=SoakConfig.timeout)
+    parser.add_argument("--output", default=SoakConfig.output, help="NDJSON file windows are appended to")
+    parser.add_argument("--samples", help="also append every request to this columnar sink (result_sink.py)")
+    parser.add_argument("--server-pid", type=int, help="node process to sample (default: owner of the port)")
+    parser.add_argument("--seed", type=int, help="random seed for a reproducible action sequence")
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = parser.parse_args(argv)
+
+    config = SoakConfig(base_url=args.base_url, users=args.users, duration=args.duration, ramp_up=args.ramp_up,
+                        think_time=args.think_time, mix=args.mix, report_interval=args.report_interval,
+                        timeout=args.timeout, output=args.output, samples=args.samples, server_pid=args.server_pid, seed=args.seed)
+    summary = asyncio.run(run_soak(config, progress=(lambda line: print(line, file=sys.stderr)) if args.json else print))
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print_summary(summary)
+    total_errors = sum(stats["errors"] for stats in summary["operations"].values())
+    return 0 if not total_errors else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+"""
+Source context - The lines of code around each located frame of an error
+
+Files are memory-mapped and get a line-offset index (the byte offset where each
+line starts) built once; later lookups in the same file are two array reads and a
+slice of the map. Indexes live in a small LRU keyed by path and are rebuilt when the
+file's mtime or size changes, so thousands of frames into the same few files cost
+one index build per file and no re-reading.
+
+Only files under the project root are read, whatever path an error message names.
+"""
+
+import os
+import mmap
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from error_handler import ErrorContext, project_relative_path, stack_frame_location
+
+DEFAULT_RADIUS = 3
+MAX_CACHED_FILES = 128
+MAX_LINE_CHARS = 240
+MAX_FRAMES = 10
+MAX_RESOLVED_PATHS = 4096
+
+
+class LineIndex:
+    """A memory-mapped file and the byte offset of the start of each of its lines"""
+
+    __slots__ = ("path", "mtime_ns", "size", "map", "offsets")
+
+    def __init__(self, path: str, stat: os.stat_result):
+        self.path = path
+        self.mtime_ns = stat.st_mtime_ns
+        self.size = stat.st_size
+        self.map = None
+        self.offsets = array("Q", [0])
+        if self.size:
+            with open(path, "rb") as f:
+                self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            find = self.map.find
+            position = find(b"\n")
+            while position != -1:
+                self.offsets.append(position + 1)
+                position = find(b"\n", position + 1)
+
+    @property
+    def line_count(self) -> int:
+        # A trailing newline does not start another line
+        if self.map is None:
+            return 0
+        return len(self.offsets) - (1 if self.offsets[-1] == self.size else 0)
+
+    def line(self, number: int) -> Optional[str]:
+        """1-based line without its newline, or None past the end of the file"""
+        if number < 1 or number > self.line_count:
+            return None
+        start = self.offsets[number - 1]
+        end = self.offsets[number] if number < len(self.offsets) else self.size
+        return self.map[start:end].rstrip(b"\r\n").decode("utf-8", "replace")
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+
+
+class SourceContext:
+    """Attaches the surrounding source lines to the located frames of an error"""
+
+    def __init__(self, root: str = ".", radius: int = DEFAULT_RADIUS, max_files: int = MAX_CACHED_FILES):
+        self.root = os.path.realpath(root)
+        self.radius = radius
+        self.max_files = max_files
+        self.indexes: "OrderedDict[str, LineIndex]" = OrderedDict()
+        self.resolved: Dict[str, Optional[str]] = {}
+        self.builds = 0
+
+    def resolve(self, file_path: str) -> Optional[str]:
+        """Absolute path of a frame's file inside the project root, or None"""
+        if file_path in self.resolved:
+            return self.resolved[file_path]
+        if len(self.resolved) >= MAX_RESOLVED_PATHS:
+            self.resolved.clear()
+        path = self.resolved[file_path] = self._resolve(file_path)
+        return path
+
+    def _resolve(self, file_path: str) -> Optional[str]:
+        path = os.path.realpath(os.path.join(self.root, project_relative_path(file_path)))
+        if path != self.root and not path.startswith(self.root + os.sep):
+            return None
+        # Existence is checked by index() on every lookup, not remembered here
+        return path
+
+    def index(self, path: str) -> Optional[LineIndex]:
+        """The cached index for path, rebuilt if the file changed since it was built"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        index = self.indexes.get(path)
+        if index is not None:
+            if index.mtime_ns == stat.st_mtime_ns and index.size == stat.st_size:
+                self.indexes.move_to_end(path)
+                return index
+            # Never read through a stale map: a file that shrank would fault on access
+            index.close()
+            del self.indexes[path]
+        try:
+            index = LineIndex(path, stat)
+        except (OSError, ValueError):
+            return None
+        self.builds += 1
+        self.indexes[path] = index
+        if len(self.indexes) > self.max_files:
+            _, evicted = self.indexes.popitem(last=False)
+            evicted.close()
+        return index
+
+    def snippet(self, file_path: str, line_number: int) -> Optional[Dict]:
+        """{"file", "line", "lines": [{"line", "text", "current"}]} around line_number"""
+        path = self.resolve(file_path)
+        index = self.index(path) if path else None
+        if index is None or not 1 <= line_number <= index.line_count:
+            return None
+        first = max(1, line_number - self.radius)
+        last = min(index.line_count, line_number + self.radius)
+        lines = []
+        for number in range(first, last + 1):
+            text = index.line(number)
+            if len(text) > MAX_LINE_CHARS:
+                text = text[:MAX_LINE_CHARS] + " …"
+            lines.append({"line": number, "text": text, "current": number == line_number})
+        return {"file": os.path.relpath(path, self.root), "line": line_number, "lines": lines}
+
+    def frames(self, error_context: ErrorContext) -> List[Tuple[str, int]]:
+        """(file, line) of the error's own location and of each stack frame that names one"""
+        frames = []
+        if error_context.file_path and error_context.line_number:
+            frames.append((error_context.file_path, error_context.line_number))
+        for frame in (error_context.stack_trace or "").splitlines():
+            # The same parser that locates errors in reports, so snippets name the same frames
+            location = stack_frame_location(frame.strip())
+            if location and location not in frames:
+                frames.append(location)
+                if len(frames) >= MAX_FRAMES:
+                    break
+        return frames
+
+    def enrich(self, error_context: ErrorContext) -> List[Dict]:
+        """Snippets for every located frame whose file is in the project"""
+        snippets = []
+        for file_path, line_number in self.frames(error_context):
+            snippet = self.snippet(file_path, line_number)
+            if snippet is not None:
+                snippets.append(snippet)
+        return snippets
+
+    def close(self):
+        for index in self.indexes.values():
+            index.close()
+        self.indexes.clear()
@@ -0,0 +1,300 @@
+"""
+Source maps - Map positions in Next.js build output (.next/**) back to src/** originals
+
+A source map's "mappings" string is decoded once into parallel arrays, one entry per
+segment in generated order:
+
+    columns   generated column          (array "I")
+    sources   index into map.sources    (array "i", -1 for an unmapped segment)
+    lines     original line             (array "I")
+    origins   original column           (array "I")
+    names     index into map.names      (array "i", -1 when absent)
+
+plus line_starts, where generated line n's segments begin. A lookup is one bisect
+over the columns of a single generated line. Decoded maps are cached per generated
+file and dropped when the map's mtime or size changes or .next/BUILD_ID changes, so
+once warm a stack costs one stat per distinct chunk and a bisect per frame.
+
+Turbopack writes index maps ("sections"); those are flattened into the same arrays.
+"""
+
+import os
+import re
+import json
+import base64
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+DEFAULT_BUILD_DIR = ".next"
+MAX_CACHED_MAPS = 64
+MAX_STACK_FRAMES = 50
+MAX_PROJECT_PATHS = 4096
+# The last few KB of a generated file hold its sourceMappingURL comment
+SOURCE_MAPPING_TAIL_BYTES = 4096
+SOURCE_MAPPING_URL = re.compile(rb"[#@] sourceMappingURL=(\S+)\s*$")
+# file:line:column, where the file may be wrapped in parentheses as in "at fn (file:1:2)".
+# The file cannot contain the colon that ends it, so a failed match backtracks within one token
+FRAME_LOCATION = re.compile(r"(?<![^\s:(])([^\s:()]+):(\d+):(\d+)")
+# Prefixes bundlers put in front of project paths in map "sources"
+SOURCE_PREFIXES = ("turbopack:///[project]/", "[project]/", "webpack:///", "webpack://", "file://")
+
+_BASE64_ALPHABET = b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/"
+_DIGITS = bytes.maketrans(_BASE64_ALPHABET + b",;", bytes(range(66)))
+
+
+class OriginalPosition(NamedTuple):
+    source: str
+    line: int
+    column: int
+    name: Optional[str]
+
+
+class SourceMap:
+    """Decoded mappings of one map file in array form"""
+
+    __slots__ = ("sources", "names", "line_starts", "columns", "source_ids", "lines", "origins", "name_ids")
+
+    def __init__(self):
+        self.sources: List[str] = []
+        self.names: List[str] = []
+        self.line_starts = array("I")
+        self.columns = array("I")
+        self.source_ids = array("i")
+        self.lines = array("I")
+        self.origins = array("I")
+        self.name_ids = array("i")
+
+    @classmethod
+    def from_json(cls, payload: Dict) -> "SourceMap":
+        source_map = cls()
+        if "sections" in payload:
+            for section in payload["sections"]:
+                offset = section.get("offset", {})
+                source_map._add(section["map"], offset.get("line", 0), offset.get("column", 0))
+        else:
+            source_map._add(payload, 0, 0)
+        return source_map
+
+    def _add(self, payload: Dict, line_offset: int, column_offset: int):
+        source_base = len(self.sources)
+        name_base = len(self.names)
+        root = payload.get("sourceRoot") or ""
+        self.sources.extend(root + (source or "") for source in payload.get("sources", []))
+        self.names.extend(payload.get("names", []))
+        # Sections are in generated order; pad line_starts up to where this one begins
+        while len(self.line_starts) < line_offset:
+            self.line_starts.append(len(self.columns))
+        columns, source_ids, lines, origins, name_ids = (self.columns, self.source_ids, self.lines,
+                                                         self.origins, self.name_ids)
+        line_starts = self.line_starts
+        if line_offset >= len(line_starts):
+            line_starts.append(len(columns))
+        # One pass over the bytes: digits become 0..63, "," is 64 and ";" is 65
+        data = (payload.get("mappings", "") + ";").encode("ascii", "ignore").translate(_DIGITS)
+        fields: List[int] = []
+        value = shift = 0
+        column = column_offset
+        source = original_line = original_column = name = 0
+        for digit in data:
+            if digit < 32:
+                value += digit << shift
+                fields.append(-(value >> 1) if value & 1 else value >> 1)
+                value = shift = 0
+            elif digit < 64:
+                value += (digit & 31) << shift
+                shift += 5
+            else:
+                if fields:
+                    column += fields[0]
+                    columns.append(column)
+                    if len(fields) >= 4:
+                        source += fields[1]
+                        original_line += fields[2]
+                        original_column += fields[3]
+                        source_ids.append(source_base + source)
+                        lines.append(original_line)
+                        origins.append(original_column)
+                        if len(fields) >= 5:
+                            name += fields[4]
+                            name_ids.append(name_base + name)
+                        else:
+                            name_ids.append(-1)
+                    else:
+                        source_ids.append(-1)
+                        lines.append(0)
+                        origins.append(0)
+                        name_ids.append(-1)
+                    fields = []
+                if digit == 65:
+                    column = 0
+                    line_starts.append(len(columns))
+        # The ";" appended above opened a line that does not exist
+        line_starts.pop()
+
+    @property
+    def segments(self) -> int:
+        return len(self.columns)
+
+    def lookup(self, line: int, column: int) -> Optional[OriginalPosition]:
+        """Original position of a 1-based generated line and column, like a stack trace shows"""
+        line -= 1
+        if not 0 <= line < len(self.line_starts):
+            return None
+        start = self.line_starts[line]
+        end = self.line_starts[line + 1] if line + 1 < len(self.line_starts) else len(self.columns)
+        index = bisect_right(self.columns, column - 1, start, end) - 1
+        if index < start or self.source_ids[index] < 0:
+            return None
+        name_id = self.name_ids[index]
+        return OriginalPosition(self.sources[self.source_ids[index]], self.lines[index] + 1,
+                                self.origins[index] + 1, self.names[name_id] if name_id >= 0 else None)
+
+
+class SourceMapResolver:
+    """Finds, decodes and caches the maps of generated files and resolves frames through them
+
+    A cached map is re-checked against its file at most once per error: check_build()
+    starts a new error, and the first frame into a chunk after that stats its map.
+    """
+
+    def __init__(self, root: str = ".", build_dir: str = DEFAULT_BUILD_DIR, max_maps: int = MAX_CACHED_MAPS):
+        self.root = os.path.realpath(root)
+        self.build_dir = os.path.join(self.root, build_dir)
+        self.max_maps = max_maps
+        # generated path -> (map stamp, SourceMap or None)
+        self.maps: "OrderedDict[str, Tuple[Tuple, Optional[SourceMap]]]" = OrderedDict()
+        self.verified: Set[str] = set()
+        self.project_paths: Dict[str, str] = {}
+        self.build_id = self._read_build_id()
+        self.decoded = 0
+
+    def _read_build_id(self) -> Optional[Tuple[int, int]]:
+        """mtime and size of .next/BUILD_ID: every build rewrites it, and a stat is cheaper than a read"""
+        try:
+            stat = os.stat(os.path.join(self.build_dir, "BUILD_ID"))
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def check_build(self):
+        """Drop every cached map if .next was rebuilt, and re-check each map on its next use"""
+        self.verified.clear()
+        build_id = self._read_build_id()
+        if build_id != self.build_id:
+            self.maps.clear()
+            self.build_id = build_id
+
+    def _generated_path(self, file_path: str) -> Optional[str]:
+        if file_path.startswith("file://"):
+            file_path = file_path[len("file://"):]
+        path = os.path.join(self.root, file_path) if not os.path.isabs(file_path) else file_path
+        return path if path.endswith((".js", ".mjs", ".cjs")) else None
+
+    def _map_location(self, generated: str) -> Optional[Tuple[str, Optional[bytes]]]:
+        """(map path, inline map bytes) for a generated file, from its sidecar or its sourceMappingURL"""
+        sidecar = generated + ".map"
+        if os.path.exists(sidecar):
+            return sidecar, None
+        try:
+            with open(generated, "rb") as f:
+                f.seek(max(0, os.fstat(f.fileno()).st_size - SOURCE_MAPPING_TAIL_BYTES))
+                match = SOURCE_MAPPING_URL.search(f.read())
+        except OSError:
+            return None
+        if not match:
+            return None
+        url = match.group(1).decode("utf-8", "replace")
+        if url.startswith("data:"):
+            header, _, data = url.partition(",")
+            return generated, base64.b64decode(data) if header.endswith(";base64") else data.encode()
+        return os.path.join(os.path.dirname(generated), url.split("?", 1)[0]), None
+
+    def source_map(self, generated: str) -> Optional[SourceMap]:
+        """The decoded map of a generated file, decoded again only if the map changed"""
+        cached = self.maps.get(generated)
+        if cached is not None:
+            if generated in self.verified:
+                return cached[1]
+            map_path, mtime_ns, size = cached[0]
+            try:
+                stat = os.stat(map_path)
+            except OSError:
+                stat = None
+            if stat is not None and (stat.st_mtime_ns, stat.st_size) == (mtime_ns, size):
+                self.maps.move_to_end(generated)
+                self.verified.add(generated)
+                return cached[1]
+
+        location = self._map_location(generated)
+        if location is None:
+            return None
+        map_path, inline = location
+        try:
+            stat = os.stat(map_path)
+            if inline is None:
+                with open(map_path, "rb") as f:
+                    inline = f.read()
+            source_map = SourceMap.from_json(json.loads(inline))
+        except (OSError, ValueError, KeyError, TypeError):
+            source_map = None
+            stat = None
+        self.decoded += 1
+        if stat is not None:
+            self.maps[generated] = ((map_path, stat.st_mtime_ns, stat.st_size), source_map)
+            self.verified.add(generated)
+            if len(self.maps) > self.max_maps:
+                evicted, _ = self.maps.popitem(last=False)
+                self.verified.discard(evicted)
+        return source_map
+
+    def project_path(self, source: str) -> str:
+        """A map's source name as a path relative to the project root where possible"""
+        path = self.project_paths.get(source)
+        if path is None:
+            if len(self.project_paths) >= MAX_PROJECT_PATHS:
+                self.project_paths.clear()
+            path = self.project_paths[source] = self._project_path(source)
+        return path
+
+    def _project_path(self, source: str) -> str:
+        for prefix in SOURCE_PREFIXES:
+            if source.startswith(prefix):
+                source = source[len(prefix):]
+                break
+        if source.startswith(self.root + os.sep):
+            source = source[len(self.root) + 1:]
+        elif "/./" in source:
+            # webpack://claude-code-ide/./src/app/page.tsx
+            source = source.split("/./", 1)[1]
+        return source[2:] if source.startswith("./") else source
+
+    def resolve(self, file_path: str, line: int, column: int) -> Optional[OriginalPosition]:
+        generated = self._generated_path(file_path)
+        source_map = self.source_map(generated) if generated else None
+        position = source_map.lookup(line, column) if source_map else None
+        if position is None:
+            return None
+        return position._replace(source=self.project_path(position.source))
+
+    def resolve_location(self, text: str) -> Optional[OriginalPosition]:
+        """The first frame in text that maps into the project's own code (not node_modules)"""
+        self.check_build()
+        for count, match in enumerate(FRAME_LOCATION.finditer(text)):
+            if count >= MAX_STACK_FRAMES:
+                break
+            position = self.resolve(match.group(1), int(match.group(2)), int(match.group(3)))
+            if position is not None and "node_modules/" not in position.source:
+                return position
+        return None
+
+    def resolve_stack(self, stack_trace: str) -> str:
+        """stack_trace with every frame that has a source map rewritten to its original position"""
+        self.check_build()
+        def replace(match):
+            position = self.resolve(match.group(1), int(match.group(2)), int(match.group(3)))
+            if position is None:
+                return match.group(0)
+            return f"{position.source}:{position.line}:{position.column}"
+        return FRAME_LOCATION.sub(replace, stack_trace, count=MAX_STACK_FRAMES)
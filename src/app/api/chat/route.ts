@@ -10,7 +10,7 @@ export async function POST(request: NextRequest) {
       )
     }
 
-    const { messages } = await request.json()
+    const { messages, stream = false } = await request.json()
 
     if (!messages || !Array.isArray(messages)) {
       return NextResponse.json(
@@ -28,6 +28,11 @@ export async function POST(request: NextRequest) {
       content: 'You are an expert programming assistant integrated into a VS Code-like IDE. You help developers with code analysis, debugging, best practices, architecture suggestions, documentation, and language-specific guidance. When users share code files, provide specific, actionable feedback. Be concise but thorough. Format code snippets with proper markdown syntax highlighting.'
     }
 
+    if (stream) {
+      // Awaited so a rejected create() (401, 429, network) lands in the catch below
+      return await streamCompletion(openai, [systemMessage, ...messages])
+    }
+
     const completion = await openai.chat.completions.create({
       model: 'gpt-4o-mini',
       messages: [systemMessage, ...messages],
@@ -71,4 +76,71 @@ export async function POST(request: NextRequest) {
       { status: 500 }
     )
   }
-}
\ No newline at end of file
+}
+
+// Relays completion deltas as SSE events ({ type: 'delta' | 'done' | 'error' }), same framing as /api/terminal
+async function streamCompletion(openai: OpenAI, messages: OpenAI.Chat.ChatCompletionMessageParam[]) {
+  // Create the upstream stream before responding so auth and rate-limit errors still get a JSON status
+  const completion = await openai.chat.completions.create({
+    model: 'gpt-4o-mini',
+    messages,
+    max_tokens: 2000,
+    temperature: 0.7,
+    top_p: 1,
+    frequency_penalty: 0,
+    presence_penalty: 0,
+    stream: true,
+    stream_options: { include_usage: true },
+  })
+
+  const encoder = new TextEncoder()
+  // Set by cancel(); enqueue and close throw on a cancelled stream
+  let cancelled = false
+  const send = (controller: ReadableStreamDefaultController<Uint8Array>, payload: object) => {
+    if (!cancelled) {
+      controller.enqueue(encoder.encode(`data: ${JSON.stringify(payload)}\n\n`))
+    }
+  }
+
+  const body = new ReadableStream<Uint8Array>({
+    async start(controller) {
+      let usage: OpenAI.Chat.ChatCompletionChunk['usage']
+      try {
+        for await (const chunk of completion) {
+          const content = chunk.choices[0]?.delta?.content
+          if (content) {
+            send(controller, { type: 'delta', content })
+          }
+          if (chunk.usage) {
+            usage = chunk.usage
+          }
+        }
+        send(controller, { type: 'done', usage })
+      } catch (error) {
+        // After cancel() the loop throws because of our own abort; nobody is listening
+        if (!cancelled) {
+          console.error('OpenAI stream error:', error)
+          send(controller, { type: 'error', error: error instanceof Error ? error.message : 'Stream interrupted' })
+        }
+      } finally {
+        if (!cancelled) {
+          controller.close()
+        }
+      }
+    },
+    cancel() {
+      // Client went away: stop pulling tokens from upstream
+      cancelled = true
+      completion.controller.abort()
+    }
+  })
+
+  return new Response(body, {
+    status: 200,
+    headers: {
+      'Content-Type': 'text/event-stream',
+      'Cache-Control': 'no-cache',
+      'Connection': 'keep-alive',
+    },
+  })
+}
@@ -40,7 +40,8 @@ export function useOpenAI() {
           messages: [...messages, userMessage].map(msg => ({
             role: msg.role,
             content: msg.content
-          }))
+          })),
+          stream: true
         }),
       })
 
@@ -49,16 +50,48 @@ export function useOpenAI() {
         throw new Error(errorData.error || 'Failed to get response')
       }
 
-      const data = await response.json()
-      
-      const assistantMessage: Message = {
-        id: (Date.now() + 1).toString(),
-        role: 'assistant',
-        content: data.content || 'I apologize, but I couldn\'t generate a response.',
-        timestamp: new Date()
+      const assistantId = (Date.now() + 1).toString()
+
+      if (!response.headers.get('Content-Type')?.includes('text/event-stream') || !response.body) {
+        const data = await response.json()
+        setMessages(prev => [...prev, {
+          id: assistantId,
+          role: 'assistant',
+          content: data.content || 'I apologize, but I couldn\'t generate a response.',
+          timestamp: new Date()
+        }])
+        return
       }
 
-      setMessages(prev => [...prev, assistantMessage])
+      // Show the reply as soon as the first token arrives and grow it in place
+      setMessages(prev => [...prev, { id: assistantId, role: 'assistant', content: '', timestamp: new Date() }])
+      const appendContent = (text: string) =>
+        setMessages(prev => prev.map(msg => msg.id === assistantId ? { ...msg, content: msg.content + text } : msg))
+
+      const reader = response.body.getReader()
+      const decoder = new TextDecoder()
+      let buffer = ''
+      let received = false
+      while (true) {
+        const { done, value } = await reader.read()
+        if (done) break
+        buffer += decoder.decode(value, { stream: true })
+        const events = buffer.split('\n\n')
+        buffer = events.pop() || ''
+        for (const event of events) {
+          if (!event.startsWith('data: ')) continue
+          const payload = JSON.parse(event.slice(6))
+          if (payload.type === 'delta') {
+            received = true
+            appendContent(payload.content)
+          } else if (payload.type === 'error') {
+            throw new Error(payload.error)
+          }
+        }
+      }
+      if (!received) {
+        appendContent('I apologize, but I couldn\'t generate a response.')
+      }
     } catch (err) {
       const errorMessage = err instanceof Error ? err.message : 'An error occurred'
       setError(errorMessage)
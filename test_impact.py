@@ -0,0 +1,249 @@
+"""
+Test impact - Which functional tests a change can affect, and why
+
+A change is a list of (status, path) pairs, from `git diff --name-status`, from a
+unified diff or from paths given by hand. Each changed path selects tests three ways:
+
+    rules         path patterns with the tests they feed (package.json -> integrity and
+                  dependency checks, *.ts -> import check and tsc, eslint config -> lint, ...)
+    import graph  a src file reaches an API test if an API route imports it, directly
+                  or through other src modules (@/ aliases and relative imports)
+    structure     deleting or renaming a file re-runs the file and component checks
+
+The harness itself (functional-test-agent.py and the modules it imports) selects every
+test; files no rule knows and that are not on the ignore list do too, so an unknown
+change never silently skips the suite.
+"""
+
+import os
+import subprocess
+from fnmatch import fnmatch
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from module_resolver import SOURCE_EXTENSIONS, ModuleResolver, iter_imports
+
+# The suite in run order; API tests need the dev server
+ALL_TESTS = (
+    "package_json_integrity",
+    "dependency_installation",
+    "file_structure",
+    "component_imports",
+    "typescript_compilation",
+    "lint_compliance",
+    "chat_api",
+    "chat_streaming",
+    "terminal_api",
+)
+API_TESTS = frozenset(("chat_api", "chat_streaming", "terminal_api"))
+
+# (patterns, tests, reason); every rule that matches a path applies
+RULES = [
+    (("package.json",), ("package_json_integrity", "dependency_installation"), "package manifest changed"),
+    (("package-lock.json",), ("dependency_installation",), "lockfile changed"),
+    (("tsconfig.json", "next-env.d.ts"), ("typescript_compilation",), "TypeScript configuration changed"),
+    (("next.config.ts",), ("file_structure", "typescript_compilation", "chat_api", "chat_streaming", "terminal_api"),
+     "Next.js configuration changed"),
+    (("tailwind.config.ts", "postcss.config.mjs"), ("file_structure",), "build configuration changed"),
+    ((".eslintrc*", "eslint.config.*"), ("lint_compliance",), "ESLint configuration changed"),
+    # component_imports resolves every src import in well under a second, so a broken one fails before tsc
+    (("src/*.ts", "src/*.tsx"), ("component_imports", "typescript_compilation", "lint_compliance"),
+     "TypeScript source changed"),
+    (("src/*.js", "src/*.jsx", "src/*.mjs"), ("component_imports", "lint_compliance"), "JavaScript source changed"),
+]
+# Routes and the API tests that call them
+ROUTE_TESTS = {
+    "src/app/api/chat/route.ts": ("chat_api", "chat_streaming"),
+    "src/app/api/terminal/route.ts": ("terminal_api",),
+}
+# Changing the harness can change any result
+HARNESS = ("functional-test-agent.py", "test_impact.py", "dependency_check.py", "module_resolver.py",
+           "lint_runner.py", "process_usage.py", "result_sink.py", "perf_stats.py", "soak_test.py")
+# Files no functional test can notice
+IGNORED = ("*.md", "*.txt", "*.log", ".gitignore", "LICENSE", "public/*", ".agent-cache/*", "*.py",
+           "*.ndjson", "functional_test_report.json", "*.sh", "vercel.json")
+
+
+
+class Change(NamedTuple):
+    status: str  # A, M, D or R, as git reports it
+    path: str
+
+
+class TestSelection:
+    """The tests a change selects, with the reasons each one was chosen"""
+
+    def __init__(self, changes: List[Change]):
+        self.changes = changes
+        self.reasons: Dict[str, List[str]] = {}
+        # Files ESLint needs to look at; None means the whole project
+        self.lint_files: Optional[List[str]] = []
+
+    def add(self, tests: Iterable[str], reason: str):
+        for test in tests:
+            reasons = self.reasons.setdefault(test, [])
+            if reason not in reasons:
+                reasons.append(reason)
+
+    @property
+    def tests(self) -> List[str]:
+        return [test for test in ALL_TESTS if test in self.reasons]
+
+    @property
+    def needs_server(self) -> bool:
+        return any(test in API_TESTS for test in self.reasons)
+
+    def to_dict(self) -> Dict:
+        return {
+            "changed_files": [f"{change.status} {change.path}" for change in self.changes],
+            "selected": self.tests,
+            "skipped": [test for test in ALL_TESTS if test not in self.reasons],
+            "reasons": {test: self.reasons[test] for test in self.tests},
+            "lint_files": self.lint_files,
+        }
+
+
+def parse_name_status(text: str) -> List[Change]:
+    """Changes from `git diff --name-status` output; a rename is a deletion plus its new path"""
+    changes = []
+    for line in text.splitlines():
+        fields = line.split("\t")
+        if len(fields) < 2 or not fields[0]:
+            continue
+        status = fields[0][0]
+        if status in "RC" and len(fields) >= 3:
+            if status == "R":
+                changes.append(Change("D", fields[1]))
+            changes.append(Change("A" if status == "C" else "R", fields[2]))
+        else:
+            changes.append(Change(status, fields[1]))
+    return changes
+
+
+def parse_unified_diff(text: str) -> List[Change]:
+    """Changes from a unified diff, as `git diff` or `git format-patch` writes it"""
+    changes: List[Change] = []
+    path = status = None
+    renamed_from = None
+
+    def flush():
+        if path:
+            if renamed_from:
+                changes.append(Change("D", renamed_from))
+            changes.append(Change(status or "M", path))
+
+    for line in text.splitlines():
+        if line.startswith("diff --git "):
+            flush()
+            _, _, names = line.partition(" b/")
+            path, status, renamed_from = names or None, None, None
+        elif line.startswith("new file mode"):
+            status = "A"
+        elif line.startswith("deleted file mode"):
+            status = "D"
+        elif line.startswith("rename from "):
+            status, renamed_from = "R", line[len("rename from "):]
+        elif line.startswith("rename to "):
+            path = line[len("rename to "):]
+        elif line.startswith("+++ ") and path is None:
+            # A plain diff without git headers
+            target = line[4:].split("\t", 1)[0]
+            path = target[2:] if target.startswith("b/") else target
+    flush()
+    return [change for change in changes if change.path != "/dev/null"]
+
+
+def git_changes(since: str = "HEAD", cwd: str = ".") -> List[Change]:
+    """Committed and uncommitted changes relative to since, plus untracked files"""
+    diff = subprocess.run(["git", "diff", "--name-status", "-M", since], cwd=cwd,
+                          capture_output=True, text=True, check=True)
+    untracked = subprocess.run(["git", "ls-files", "--others", "--exclude-standard"], cwd=cwd,
+                               capture_output=True, text=True, check=True)
+    return parse_name_status(diff.stdout) + [Change("A", path) for path in untracked.stdout.splitlines() if path]
+
+
+class ImportGraph:
+    """Which src modules import which, for walking from a changed file up to the routes"""
+
+    def __init__(self, root: str = ".", source_dir: str = "src"):
+        resolver = ModuleResolver(root)
+        self.importers: Dict[str, Set[str]] = {}
+        prefix = resolver.root + os.sep
+        for path in resolver.source_files(source_dir):
+            try:
+                with open(path, encoding="utf-8", errors="replace") as f:
+                    text = f.read()
+            except OSError:
+                continue
+            importer = os.path.relpath(path, resolver.root).replace(os.sep, "/")
+            for _, specifier in iter_imports(text):
+                resolved, _ = resolver.resolve(path, specifier)
+                # Packages and builtins cannot lead back to a route
+                if resolved and resolved.startswith(prefix) and "/node_modules/" not in resolved:
+                    imported = os.path.relpath(resolved, resolver.root).replace(os.sep, "/")
+                    self.importers.setdefault(imported, set()).add(importer)
+
+    def dependents(self, path: str) -> Dict[str, str]:
+        """Every module that imports path directly or transitively, mapped to the module it imports"""
+        found: Dict[str, str] = {}
+        pending = [path]
+        while pending:
+            current = pending.pop()
+            for importer in self.importers.get(current, ()):
+                if importer not in found and importer != path:
+                    found[importer] = current
+                    pending.append(importer)
+        return found
+
+
+def _matches(path: str, patterns: Tuple[str, ...]) -> bool:
+    name = os.path.basename(path)
+    return any(fnmatch(path, pattern) or ("/" not in pattern and fnmatch(name, pattern)) for pattern in patterns)
+
+
+def select_tests(changes: List[Change], root: str = ".") -> TestSelection:
+    """The smallest set of functional tests that can observe the given changes"""
+    selection = TestSelection(changes)
+    graph = None
+    for change in changes:
+        path = change.path
+        if path in HARNESS:
+            selection.add(ALL_TESTS, f"test harness {path} changed")
+            selection.lint_files = None
+            continue
+
+        matched = False
+        for patterns, tests, reason in RULES:
+            if _matches(path, patterns):
+                selection.add(tests, f"{reason}: {path}")
+                matched = True
+                if "lint_compliance" in tests and not path.endswith(SOURCE_EXTENSIONS):
+                    selection.lint_files = None
+
+        if path.startswith("src/"):
+            matched = True
+            if change.status in "DR":
+                verb = "deleted" if change.status == "D" else "renamed"
+                selection.add(("file_structure", "component_imports"), f"{path} was {verb}")
+            if path.endswith(SOURCE_EXTENSIONS):
+                if selection.lint_files is not None and change.status != "D":
+                    selection.lint_files.append(path)
+                if graph is None:
+                    graph = ImportGraph(root)
+                routes = {path: path} if path in ROUTE_TESTS else {}
+                routes.update((module, via) for module, via in graph.dependents(path).items() if module in ROUTE_TESTS)
+                for route, via in routes.items():
+                    if route == path:
+                        reason = f"{route} changed"
+                    elif via == path:
+                        reason = f"{path} is imported by {route}"
+                    else:
+                        reason = f"{path} reaches {route} through {via}"
+                    selection.add(ROUTE_TESTS[route], reason)
+
+        if not matched and not _matches(path, IGNORED):
+            selection.add(ALL_TESTS, f"no impact rule for {path}; running everything")
+            selection.lint_files = None
+    if selection.lint_files == []:
+        # Only deletions: nothing left to lint, and tsc catches imports of the deleted files
+        selection.reasons.pop("lint_compliance", None)
+    return selection